@@ -0,0 +1,181 @@
+# backtest.py
+"""
+Vectorized reverse-on-signal backtest for the calculate_*_signal outputs.
+
+Mirrors the live bot's instant-reverse logic on closed bars:
+* a bar with plFound goes long, phFound goes short (long wins if both are set)
+* a signal in the direction we already hold is ignored
+* a reversal is close_and_reverse: a reduce-only close leg plus an opening leg,
+  so the position is always +/- `quantity` and a reversal pays fees on two legs
+
+Everything is computed with array operations over the whole history, there is
+no per-bar Python loop.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Same defaults as live_bot.py (not imported: live_bot pulls in ccxt)
+QUANTITY = 0.007
+LEVERAGE = 10
+TAKER_FEE = 0.00055       # Bybit perpetual taker fee
+INITIAL_BALANCE = 10_000.0
+
+
+@dataclass
+class BacktestResult:
+    bars: pd.DataFrame      # per-bar position, fills, fees, pnl, equity, drawdown
+    trades: pd.DataFrame    # one row per position held
+    stats: dict
+
+
+def positions_from_signals(pl_found, ph_found):
+    """Position after each bar (+1 long, -1 short, 0 flat) under instant-reverse rules."""
+    pl = np.asarray(pl_found, dtype=bool)
+    ph = np.asarray(ph_found, dtype=bool)
+    target = np.where(pl, 1, np.where(ph, -1, 0)).astype(np.int8)
+
+    # Forward-fill the last non-zero target
+    last = np.where(target != 0, np.arange(len(target)), -1)
+    np.maximum.accumulate(last, out=last)
+    return np.where(last >= 0, target[np.maximum(last, 0)], 0).astype(np.int8)
+
+
+def run_backtest(
+    df,
+    quantity: float = QUANTITY,
+    leverage: float = LEVERAGE,
+    fee_rate: float = TAKER_FEE,
+    slippage: float = 0.0,
+    fill: str = 'close',
+    initial_balance: float = INITIAL_BALANCE,
+):
+    """
+    Backtest the plFound/phFound columns of a calculate_*_signal output.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Signal output with close (and open for fill='next_open'), plFound, phFound
+    quantity : float
+        Contracts per position, as QUANTITY in live_bot.py
+    leverage : float
+        Used for margin and return-on-margin, as LEVERAGE in live_bot.py
+    fee_rate : float
+        Fee per leg as a fraction of notional
+    slippage : float
+        Adverse price move per fill as a fraction (buys pay more, sells get less)
+    fill : str
+        'close' fills at the close of the signal bar, 'next_open' at the next open
+    initial_balance : float
+        Starting equity in USDT
+
+    Returns
+    -------
+    BacktestResult
+    """
+    close = df['close'].to_numpy(dtype=float)
+    n = len(close)
+    pos = positions_from_signals(df['plFound'], df['phFound'])
+
+    if fill == 'close':
+        fill_px = close.copy()
+    elif fill == 'next_open':
+        pos = np.r_[np.int8(0), pos[:-1]] if n else pos
+        fill_px = df['open'].to_numpy(dtype=float).copy()
+    else:
+        raise ValueError(f"fill must be 'close' or 'next_open', got {fill!r}")
+
+    prev_pos = np.r_[np.int8(0), pos[:-1]] if n else pos
+    trade_dir = np.sign(pos.astype(np.int16) - prev_pos)
+    changed = trade_dir != 0
+    legs = np.abs(pos.astype(np.int16) - prev_pos)   # 1 = open/close, 2 = close + reverse
+
+    # Bars without a fill are marked at their close
+    fill_px = np.where(changed, fill_px * (1 + slippage * trade_dir), close)
+    fees = legs * quantity * fill_px * fee_rate
+
+    # Held into the fill at the old position, out of it at the new one
+    prev_close = np.r_[fill_px[:1], close[:-1]]
+    pnl = quantity * (prev_pos * (fill_px - prev_close) + pos * (close - fill_px))
+
+    equity = initial_balance + np.cumsum(pnl - fees)
+    peak = np.maximum.accumulate(equity) if n else equity
+    drawdown = equity - peak
+
+    bars = pd.DataFrame({
+        'position': pos,
+        'fill': changed,
+        'fill_price': np.where(changed, fill_px, np.nan),
+        'fees': fees,
+        'pnl': pnl,
+        'equity': equity,
+        'drawdown': drawdown,
+    }, index=df.index)
+
+    trades = _trades(df.index, pos, changed, fill_px, close, quantity, leverage, fee_rate)
+    stats = _stats(trades, equity, peak, drawdown, fees, initial_balance, quantity, leverage, close)
+    return BacktestResult(bars=bars, trades=trades, stats=stats)
+
+
+def backtest_signal(df, signal_func, signal_params=None, **backtest_params):
+    """Run one of the calculate_*_signal functions and backtest its output."""
+    signals = signal_func(df.copy(), **(signal_params or {}))
+    return run_backtest(signals, **backtest_params)
+
+
+def _trades(index, pos, changed, fill_px, close, quantity, leverage, fee_rate):
+    change_idx = np.flatnonzero(changed)
+    entries = change_idx[pos[change_idx] != 0]
+
+    # A trade ends at the next position change, or is still open at the last bar
+    nxt = np.searchsorted(change_idx, entries, side='right')
+    is_open = nxt >= len(change_idx)
+    exits = np.where(is_open, len(pos) - 1, change_idx[np.minimum(nxt, len(change_idx) - 1)])
+
+    side = pos[entries].astype(float)
+    entry_px = fill_px[entries]
+    exit_px = np.where(is_open, close[exits], fill_px[exits])
+    fees = quantity * fee_rate * (entry_px + np.where(is_open, 0.0, exit_px))
+    pnl = side * quantity * (exit_px - entry_px) - fees
+    margin = quantity * entry_px / leverage
+
+    return pd.DataFrame({
+        'entry_time': index[entries],
+        'exit_time': index[exits],
+        'side': np.where(side > 0, 'long', 'short'),
+        'entry_price': entry_px,
+        'exit_price': exit_px,
+        'bars_held': exits - entries,
+        'fees': fees,
+        'pnl': pnl,
+        'margin': margin,
+        'return_on_margin': pnl / margin,
+        'open': is_open,
+    })
+
+
+def _stats(trades, equity, peak, drawdown, fees, initial_balance, quantity, leverage, close):
+    pnl = trades['pnl'].to_numpy()
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl < 0]
+    final_equity = float(equity[-1]) if len(equity) else initial_balance
+    max_dd_idx = int(np.argmin(drawdown)) if len(drawdown) else 0
+
+    return {
+        'final_equity': final_equity,
+        'net_pnl': final_equity - initial_balance,
+        'return_pct': 100 * (final_equity - initial_balance) / initial_balance,
+        'total_fees': float(fees.sum()),
+        'max_drawdown': float(-drawdown.min()) if len(drawdown) else 0.0,
+        'max_drawdown_pct': float(100 * -drawdown[max_dd_idx] / peak[max_dd_idx]) if len(drawdown) else 0.0,
+        'trades': len(pnl),
+        'win_rate': float(len(wins) / len(pnl)) if len(pnl) else np.nan,
+        'avg_trade_pnl': float(pnl.mean()) if len(pnl) else np.nan,
+        'profit_factor': float(wins.sum() / -losses.sum()) if len(losses) else np.nan,
+        'avg_bars_held': float(trades['bars_held'].mean()) if len(pnl) else np.nan,
+        'avg_return_on_margin': float(trades['return_on_margin'].mean()) if len(pnl) else np.nan,
+        'worst_return_on_margin': float(trades['return_on_margin'].min()) if len(pnl) else np.nan,
+        'margin_per_position': float(quantity * close[-1] / leverage) if len(close) else 0.0,
+    }
@@ -0,0 +1,118 @@
+# bar_buffer.py
+"""
+Fixed-capacity ring buffer of OHLCV bars for the live loop.
+
+Bars live in preallocated arrays (int64 timestamps plus one float64 block for
+open/high/low/close/volume), so memory stays flat however long the bot runs.
+Every write goes to two slots, i and i + capacity, which keeps the newest
+`capacity` bars contiguous at block[start:start + n]. Views are plain slices of
+that region: no copy and no wrap-around handling when reading.
+
+    bars = BarBuffer(201)
+    bars.extend_frame(history)                    # closed bars
+    bars.update(ts, open, high, low, close, vol)  # new bar -> append, same ts -> overwrite
+    df = bars.frame()                             # zero-copy DataFrame for calculate_*_signal
+"""
+import numpy as np
+import pandas as pd
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class BarBuffer:
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError(f"capacity must be >= 1, got {capacity}")
+        self.capacity = capacity
+        self._ts = np.zeros(2 * capacity, dtype=np.int64)
+        self._block = np.zeros((len(FIELDS), 2 * capacity), dtype=np.float64)
+        self._start = 0     # oldest bar, always < capacity
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    # ------------------------------------------------------------------
+    # Writes (O(1))
+    # ------------------------------------------------------------------
+    def _write(self, i, ts, values):
+        self._ts[i] = self._ts[i + self.capacity] = ts
+        self._block[:, i] = self._block[:, i + self.capacity] = values
+
+    def _push(self, ts, values):
+        if self._len < self.capacity:
+            i = (self._start + self._len) % self.capacity
+            self._len += 1
+        else:
+            i = self._start
+            self._start = (self._start + 1) % self.capacity
+        self._write(i, ts, values)
+
+    def append(self, ts, open, high, low, close, volume):
+        """Add a bar after the newest one, dropping the oldest when full."""
+        self._push(ts, (open, high, low, close, volume))
+
+    def update_last(self, open=None, high=None, low=None, close=None, volume=None):
+        """Overwrite fields of the newest bar (None keeps the current value)."""
+        if not self._len:
+            raise IndexError("update_last on an empty BarBuffer")
+        i = (self._start + self._len - 1) % self.capacity
+        values = [old if new is None else new
+                  for old, new in zip(self._block[:, i].tolist(), (open, high, low, close, volume))]
+        self._write(i, self._ts[i], values)
+
+    def update(self, ts, open, high, low, close, volume):
+        """Live-loop write: a newer `ts` starts a bar, the newest bar's `ts` overwrites it."""
+        if self._len and ts == self.last_ts:
+            self.update_last(open, high, low, close, volume)
+        elif self._len and ts < self.last_ts:
+            raise ValueError(f"bar {ts} is older than the newest bar {self.last_ts}")
+        else:
+            self.append(ts, open, high, low, close, volume)
+
+    def extend(self, rows):
+        """Append [ts, open, high, low, close, volume] rows in order."""
+        for row in rows:
+            self.append(*row[:6])
+
+    def extend_frame(self, df):
+        """Append the last `capacity` bars of an OHLCV DataFrame with a DatetimeIndex."""
+        df = df.iloc[-self.capacity:]
+        ts = df.index.as_unit('ms').asi8
+        values = np.vstack([df[col].to_numpy(dtype=np.float64) for col in FIELDS])
+        for j in range(len(df)):
+            self._push(ts[j], values[:, j])
+
+    def clear(self):
+        self._start = self._len = 0
+
+    # ------------------------------------------------------------------
+    # Zero-copy views (valid until the next write)
+    # ------------------------------------------------------------------
+    @property
+    def last_ts(self):
+        return int(self._ts[self._start + self._len - 1]) if self._len else None
+
+    @property
+    def ts(self):
+        return self._ts[self._start:self._start + self._len]
+
+    @property
+    def values(self):
+        """(5, n) float64 view: rows open, high, low, close, volume; oldest bar first."""
+        return self._block[:, self._start:self._start + self._len]
+
+    def column(self, name):
+        return self._block[FIELDS.index(name), self._start:self._start + self._len]
+
+    def arrays(self):
+        """{'ts': int64, 'open': float64, ...} views."""
+        return {'ts': self.ts, **{col: self.column(col) for col in FIELDS}}
+
+    def frame(self):
+        """
+        OHLCV DataFrame indexed by bar open time, backed by the buffer (one 2D block,
+        nothing copied). New columns added by the strategy functions stay on the frame.
+        """
+        index = pd.DatetimeIndex(self.ts.view('datetime64[ms]'), name='ts', copy=False)
+        return pd.DataFrame(self.values.T, columns=list(FIELDS), index=index, copy=False)
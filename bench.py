@@ -0,0 +1,400 @@
+# bench.py
+"""
+Benchmark and regression suite for the signal and indicator functions.
+
+Every case runs on synthetic OHLCV (fake_exchange.synthetic_frame) at each size:
+
+* time_s         - best of `repeat` runs (median alongside), indicator cache cleared
+                   before each run so the graph-based strategies are measured cold
+* peak_mb        - tracemalloc peak above the starting point, in a separate run
+* retained_mb    - memory the result keeps alive
+* retained_blocks - allocations (memory blocks) the result keeps alive
+* scaling        - slope of log(time) over log(bars) for the largest sizes (1 = linear)
+
+Baselines are JSON files with a format version and the environment they were
+recorded in; --compare flags cases slower or bigger than the baseline by more
+than --threshold. Correctness: --save-reference stores every case's output on
+fixed data before a change, --check-reference compares against it afterwards.
+An .npz reference keeps the values (bit-identical by default, --rtol for float
+tolerance); a .json reference keeps a SHA-256 digest per output, small enough
+to commit, and only checks bit-identity.
+
+bench_baseline.json and bench_reference.json are recorded from the current
+code, so a change that slows a case down or moves an output fails against
+them on a fresh checkout. Re-record both when a change is meant to do that.
+Timings only compare within one environment (--compare warns otherwise).
+--legacy runs the cases on the strategy modules of an older checkout, e.g. the
+baseline commit, for one-off before/after numbers.
+
+    python bench.py                                        # 1e3 .. 1e7 bars, every case
+    python bench.py --sizes 1e3 1e5 --cases hma rsi
+    python bench.py --sizes 1e3 1e4 1e5 1e6 --repeat 7 --save bench_baseline.json
+    python bench.py --sizes 1e3 1e4 1e5 1e6 --repeat 7 --compare bench_baseline.json   # exit 1 on a regression
+    python bench.py --save-reference bench_reference.json
+    python bench.py --check-reference bench_reference.json # exit code 1 on a difference
+    python bench.py --save-reference before.npz            # values, for --rtol
+    git worktree add ../pre-change f4794f0 && python bench.py --legacy ../pre-change --sizes 1e3 1e4
+"""
+import argparse
+import gc
+import hashlib
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import indicator_graph as ig
+import indicators
+from fake_exchange import synthetic_frame
+from strategy1 import calculate_orion_signal, rsi, tr
+from strategy2 import calculate_ema_super_signal
+from strategy3 import calculate_trend_forecast_signal
+
+BASELINE_VERSION = 1
+SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+REFERENCE_BARS = 5_000
+
+# name -> (function of an OHLCV DataFrame, whether it adds columns to its input)
+CASES = {
+    'calculate_orion_signal': (calculate_orion_signal, True),
+    'calculate_ema_super_signal': (calculate_ema_super_signal, True),
+    'calculate_trend_forecast_signal': (calculate_trend_forecast_signal, True),
+    'wpr': (lambda df: indicators.wpr(df['high'], df['low'], df['close'], 14), False),
+    'rsi': (lambda df: rsi(df['close'], 14), False),
+    'tr': (lambda df: tr(df['high'], df['low'], df['close']), False),
+    'hma': (lambda df: indicators.hma(df['close'], 29), False),
+    'ema': (lambda df: indicators.ema(df['close'], 21), False),
+    'rolling_std': (lambda df: indicators.rolling_std(df['close'], 21), False),
+    'atr': (lambda df: indicators.atr(df['high'], df['low'], df['close'], 10), False),
+}
+
+
+def legacy_cases(path):
+    """
+    The same cases on the strategy modules found in `path` (a checkout of the
+    baseline commit, before indicators.py existed). Kernels without a function of
+    their own there are taken from where the old code computed them: hma from
+    strategy3's HMA column, rolling_std from strategy1's stdev, atr from ta.
+    """
+    def load(name):
+        spec = importlib.util.spec_from_file_location(f"legacy_{name}", os.path.join(path, f"{name}.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    s1, s2, s3 = load('strategy1'), load('strategy2'), load('strategy3')
+    from ta.volatility import AverageTrueRange
+    return {
+        'calculate_orion_signal': (s1.calculate_orion_signal, True),
+        'calculate_ema_super_signal': (s2.calculate_ema_super_signal, True),
+        'calculate_trend_forecast_signal': (s3.calculate_trend_forecast_signal, True),
+        'wpr': (lambda df: s1.wpr(df['high'], df['low'], df['close'], 14), False),
+        'rsi': (lambda df: s1.rsi(df['close'], 14), False),
+        'tr': (lambda df: s1.tr(df['high'], df['low'], df['close']), False),
+        'hma': (lambda df: s3.calculate_trend_forecast_signal(df[['close']].copy(), length=29)['hma'], False),
+        'ema': (lambda df: s1.ema(df['close'], 21), False),
+        'rolling_std': (lambda df: s1.stdev(df['close'], 21), False),
+        'atr': (lambda df: AverageTrueRange(df['high'], df['low'], df['close'], window=10).average_true_range(),
+                False),
+    }
+
+
+# ----------------------------------------------------------------------
+# Measuring
+# ----------------------------------------------------------------------
+def measure(name, df, repeat=3):
+    """One case at one size: timings, then memory in a separate traced run."""
+    func, mutates = CASES[name]
+    times = []
+    for _ in range(repeat):
+        data = df.copy() if mutates else df
+        ig.CACHE.clear()
+        started = time.perf_counter()
+        func(data)
+        times.append(time.perf_counter() - started)
+
+    data = df.copy() if mutates else df
+    ig.CACHE.clear()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    base = tracemalloc.get_traced_memory()[0]
+    result = func(data)
+    ig.CACHE.clear()            # count what the result keeps, not the shared cache
+    current, peak = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count_diff for stat in tracemalloc.take_snapshot().compare_to(before, 'filename'))
+    tracemalloc.stop()
+    del result
+
+    return {
+        'case': name,
+        'bars': len(df),
+        'time_s': min(times),
+        'time_median_s': statistics.median(times),
+        'peak_mb': (peak - base) / 2**20,
+        'retained_mb': (current - base) / 2**20,
+        'retained_blocks': blocks,
+    }
+
+
+def scaling(results, min_bars=100_000):
+    """Slope of log(time) over log(bars) per case, from the sizes >= min_bars (all if fewer than two)."""
+    slopes = {}
+    for name, group in results.groupby('case'):
+        big = group[group['bars'] >= min_bars]
+        group = big if len(big) >= 2 else group
+        if len(group) >= 2:
+            slopes[name] = np.polyfit(np.log(group['bars']), np.log(group['time_s']), 1)[0]
+    return pd.Series(slopes, name='scaling')
+
+
+def run(cases=None, sizes=SIZES, repeat=3, seed=0, verbose=True):
+    cases = list(cases or CASES)
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        raise ValueError(f"unknown cases {sorted(unknown)}, expected some of {sorted(CASES)}")
+
+    # Warm-up: imports, numba compilation and first-call overheads stay out of the numbers
+    small = synthetic_frame(500, seed=seed)
+    for name in cases:
+        func, mutates = CASES[name]
+        func(small.copy() if mutates else small)
+
+    rows = []
+    for bars in sizes:
+        df = synthetic_frame(int(bars), seed=seed)
+        for name in cases:
+            row = measure(name, df, repeat)
+            rows.append(row)
+            if verbose:
+                print(f"{name:32s} {row['bars']:>12,} bars  {row['time_s']:10.4f} s  "
+                      f"{row['peak_mb']:10.1f} MB peak", flush=True)
+        del df
+    return pd.DataFrame(rows)
+
+
+# ----------------------------------------------------------------------
+# Baselines
+# ----------------------------------------------------------------------
+def _git_commit(path=None):
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=path).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    try:
+        import numba
+        numba_version = numba.__version__
+    except ImportError:
+        numba_version = None
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'numba': numba_version,
+        'machine': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+    }
+
+
+def save_baseline(results, path, repeat, commit=None):
+    doc = {
+        'version': BASELINE_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit or _git_commit(),
+        'repeat': repeat,
+        'environment': environment(),
+        'results': results.to_dict('records'),
+    }
+    with open(path, 'w') as f:
+        json.dump(doc, f, indent=2)
+
+
+def load_baseline(path):
+    with open(path) as f:
+        doc = json.load(f)
+    if doc.get('version') != BASELINE_VERSION:
+        raise ValueError(f"{path}: baseline format {doc.get('version')}, this suite writes {BASELINE_VERSION}")
+    return doc
+
+
+def compare(results, baseline, threshold=0.25, min_time=0.005, min_mb=1.0):
+    """
+    Join results with the baseline on (case, bars). A case regresses when it is more
+    than `threshold` slower (and min_time seconds) or uses more than `threshold` more
+    peak memory (and min_mb MB). The best time is held against the baseline's median,
+    so a lucky fastest run in the baseline does not fail every later comparison.
+    """
+    base = pd.DataFrame(baseline['results'])[['case', 'bars', 'time_median_s', 'peak_mb']]
+    base = base.rename(columns={'time_median_s': 'time_s'})
+    joined = results.merge(base, on=['case', 'bars'], suffixes=('', '_base'))
+    joined['time_ratio'] = joined['time_s'] / joined['time_s_base']
+    joined['peak_ratio'] = joined['peak_mb'] / joined['peak_mb_base'].where(joined['peak_mb_base'] > 0)
+    slower = (joined['time_ratio'] > 1 + threshold) & (joined['time_s'] - joined['time_s_base'] > min_time)
+    bigger = (joined['peak_ratio'] > 1 + threshold) & (joined['peak_mb'] - joined['peak_mb_base'] > min_mb)
+    joined['regression'] = np.where(slower & bigger, 'time+memory',
+                                    np.where(slower, 'time', np.where(bigger, 'memory', '')))
+    return joined[['case', 'bars', 'time_s', 'time_s_base', 'time_ratio', 'peak_mb', 'peak_mb_base',
+                   'peak_ratio', 'regression']]
+
+
+# ----------------------------------------------------------------------
+# Correctness
+# ----------------------------------------------------------------------
+def _columns(name, output):
+    # Output -> {key: (float or bool array, dtype name)}; object columns (True / False / NaN) as floats
+    frame = output.to_frame(name) if isinstance(output, pd.Series) else output
+    out = {}
+    for col in frame.columns:
+        values = frame[col]
+        if values.dtype == object:
+            data = np.array([np.nan if v is None or (isinstance(v, float) and np.isnan(v)) else float(v)
+                             for v in values])
+        else:
+            data = values.to_numpy()
+        out[f"{name}/{col}"] = (data, str(values.dtype))
+    return out
+
+
+def reference_outputs(cases=None, bars=REFERENCE_BARS, seed=0):
+    df = synthetic_frame(bars, seed=seed)
+    outputs = {}
+    for name in cases or CASES:
+        func, mutates = CASES[name]
+        ig.CACHE.clear()
+        outputs.update(_columns(name, func(df.copy() if mutates else df)))
+    return outputs
+
+
+def _digest(data):
+    return hashlib.sha256(np.ascontiguousarray(data).tobytes()).hexdigest()
+
+
+def save_reference(path, cases=None, bars=REFERENCE_BARS, seed=0, commit=None):
+    """Store the outputs as values (.npz) or as one digest per output (.json)."""
+    outputs = reference_outputs(cases, bars, seed)
+    meta = {'bars': bars, 'seed': seed, 'commit': commit or _git_commit(),
+            'dtypes': {key: dtype for key, (_, dtype) in outputs.items()}}
+    if path.endswith('.json'):
+        meta.update(environment=environment(),
+                    digests={key: _digest(data) for key, (data, _) in outputs.items()})
+        with open(path, 'w') as f:
+            json.dump(meta, f, indent=2)
+        return
+    np.savez_compressed(path, __meta__=np.array(json.dumps(meta)),
+                        **{key: data for key, (data, _) in outputs.items()})
+
+
+def _load_reference(path):
+    # meta, {output: stored values or digest}
+    if path.endswith('.json'):
+        with open(path) as f:
+            meta = json.load(f)
+        return meta, meta['digests']
+    with np.load(path, allow_pickle=False) as stored:
+        meta = json.loads(str(stored['__meta__']))
+        return meta, {key: stored[key] for key in stored.files if key != '__meta__'}
+
+
+def check_reference(path, rtol=0.0):
+    """Compare every stored output with a fresh run on the same data; one row per column."""
+    meta, expected = _load_reference(path)
+    cases = sorted({key.split('/')[0] for key in expected})
+    actual = reference_outputs([c for c in cases if c in CASES], meta['bars'], meta['seed'])
+
+    rows = []
+    for key, ref in expected.items():
+        if key not in actual:
+            rows.append({'output': key, 'status': 'missing', 'max_rel': np.nan})
+            continue
+        got, dtype = actual[key]
+        status, max_rel = 'ok', 0.0
+        if isinstance(ref, str):
+            if _digest(got) != ref:
+                status, max_rel = 'digest', np.nan
+        elif got.shape != ref.shape:
+            status = f"shape {got.shape} != {ref.shape}"
+        elif ref.dtype.kind in 'fc':
+            got = got.astype(float)
+            if not np.array_equal(np.isnan(got), np.isnan(ref)):
+                status = 'nan pattern'
+            elif not np.array_equal(got, ref, equal_nan=True):
+                both = ~np.isnan(ref)
+                max_rel = float(np.max(np.abs(got[both] - ref[both]) / np.maximum(np.abs(ref[both]), 1e-300)))
+                if max_rel > rtol:
+                    status = 'values'
+        elif not np.array_equal(got, ref):
+            status = f"{int(np.sum(got != ref))} rows differ"
+        if status == 'ok' and dtype != meta['dtypes'].get(key):
+            status = f"dtype {dtype} != {meta['dtypes'].get(key)}"
+        rows.append({'output': key, 'status': status, 'max_rel': max_rel})
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark / regression suite for signals and indicators')
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), help='default: all')
+    parser.add_argument('--sizes', nargs='+', type=float, default=SIZES, help='bar counts (1e3 .. 1e7)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', metavar='JSON', help='write the results as a baseline')
+    parser.add_argument('--compare', metavar='JSON', help='flag regressions against a baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown / growth (0.25 = 25%%)')
+    parser.add_argument('--save-reference', metavar='NPZ|JSON', help='store outputs on fixed data and exit')
+    parser.add_argument('--check-reference', metavar='NPZ|JSON',
+                        help='compare outputs with a stored reference and exit')
+    parser.add_argument('--rtol', type=float, default=0.0, help='float tolerance for --check-reference (.npz)')
+    parser.add_argument('--legacy', metavar='DIR', help='run the cases on the strategy modules in DIR '
+                                                        '(a checkout of an older commit)')
+    args = parser.parse_args()
+
+    commit = None
+    if args.legacy:
+        CASES.update(legacy_cases(args.legacy))
+        commit = _git_commit(args.legacy)
+
+    if args.save_reference:
+        save_reference(args.save_reference, args.cases, seed=args.seed, commit=commit)
+        print(f"reference outputs written to {args.save_reference}")
+        sys.exit(0)
+    if args.check_reference:
+        report = check_reference(args.check_reference, args.rtol)
+        print(report.to_string(index=False))
+        failed = report['status'] != 'ok'
+        print(f"{int(failed.sum())} of {len(report)} outputs differ")
+        sys.exit(1 if failed.any() else 0)
+
+    results = run(args.cases, [int(n) for n in args.sizes], args.repeat, args.seed)
+    table = results.set_index(['case', 'bars'])
+    print()
+    print(table.to_string(float_format=lambda x: f"{x:,.4f}"))
+    slopes = scaling(results)
+    if len(slopes):
+        print()
+        print(slopes.to_string(float_format=lambda x: f"{x:.2f}"))
+
+    if args.save:
+        save_baseline(results, args.save, args.repeat, commit)
+        print(f"baseline written to {args.save}")
+    if args.compare:
+        baseline = load_baseline(args.compare)
+        if baseline['environment'] != environment():
+            print(f"WARNING: baseline recorded on {baseline['environment']}")
+        report = compare(results, baseline, args.threshold)
+        print()
+        print(report.to_string(index=False, float_format=lambda x: f"{x:,.4f}"))
+        regressions = report[report['regression'] != '']
+        print(f"{len(regressions)} regressions above {args.threshold:.0%}")
+        sys.exit(1 if len(regressions) else 0)
@@ -0,0 +1,239 @@
+# exchange_state.py
+"""
+Cached, rate-limit-aware view of the account: balance, position sizes and prices.
+
+* every resource has a TTL; reads inside it cost no request
+* concurrent reads of the same stale resource share one request (the first
+  caller fetches, the others wait for its result)
+* positions are refreshed for all tracked symbols with one fetch_positions
+* order acknowledgements update the cached position sizes and last price, so a
+  reversal needs no follow-up position or ticker request; a REST refresh that
+  started before an ack never overwrites it
+* a per-method request budget (token bucket, corrected from Bybit's
+  X-Bapi-Limit-Status headers when present) is spent by every request made here
+  and by the Executor's orders; when a method runs low, a stale cached value is
+  served instead of spending the last requests
+* failed requests raise when nothing is cached and otherwise serve the last
+  value with a printed warning, never a made-up default
+
+    state = ExchangeState(exchange, ['BTCUSDT', 'ETHUSDT'])
+    state.positions()            # {'BTCUSDT': 0.007, 'ETHUSDT': -0.1}, one request
+    state.balance()              # cached for ttl['balance'] seconds
+    state.on_order('BTCUSDT', 'sell', 0.014, 29_950.0)   # from the create_order ack
+"""
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import METRICS
+
+DEFAULT_TTL = {'balance': 60.0, 'positions': 30.0, 'price': 5.0}
+
+
+def fetch_position_sizes(exchange, symbols):
+    """Signed contracts per symbol from one fetch_positions request (flat -> 0.0)."""
+    sizes = dict.fromkeys(symbols, 0.0)
+    held = exchange.fetch_positions(list(symbols))
+    # ccxt reports unified symbols ('BTC/USDT:USDT'), map them back to the ids we trade
+    by_unified = {exchange.market(s)['symbol'] if hasattr(exchange, 'market') else s: s for s in symbols}
+    for pos in held:
+        symbol = by_unified.get(pos['symbol'], pos['symbol'])
+        if symbol in sizes and pos['contracts'] > 0:
+            sizes[symbol] = pos['contracts'] if pos['side'] == 'long' else -pos['contracts']
+    return sizes
+
+
+class RateBudget:
+    """Token bucket of `limit` requests per `window` seconds."""
+
+    def __init__(self, limit=10, window=1.0):
+        self.limit = limit
+        self.window = window
+        self.tokens = float(limit)
+        self.updated = time.monotonic()
+
+    @property
+    def remaining(self):
+        now = time.monotonic()
+        self.tokens = min(self.limit, self.tokens + (now - self.updated) * self.limit / self.window)
+        self.updated = now
+        return self.tokens
+
+    def spend(self, n=1):
+        self.tokens = self.remaining - n
+
+    def update(self, headers):
+        """Adopt the exchange's own count (Bybit: X-Bapi-Limit-Status / X-Bapi-Limit)."""
+        headers = {str(k).lower(): v for k, v in (headers or {}).items()}
+        try:
+            if 'x-bapi-limit' in headers:
+                self.limit = int(headers['x-bapi-limit'])
+            if 'x-bapi-limit-status' in headers:
+                self.tokens = float(headers['x-bapi-limit-status'])
+                self.updated = time.monotonic()
+        except (TypeError, ValueError):
+            pass
+
+
+class ExchangeState:
+    def __init__(self, exchange, symbols=(), ttl=None, reserve=2, metrics=METRICS):
+        self.exchange = exchange
+        self.symbols = list(symbols)
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self.reserve = reserve          # requests per method kept for orders
+        self.metrics = metrics
+        self.budgets = {}               # method -> RateBudget
+        self.sizes = dict.fromkeys(self.symbols)   # signed contracts, None = unknown
+        self.prices = {}                # symbol -> (last price, monotonic time)
+        self._balance = None            # (free USDT, monotonic time)
+        self._positions_at = None       # monotonic time of the last position refresh
+        self._changed = {}              # symbol -> monotonic time of the last ack applied
+        self._inflight = {}             # resource -> Future
+        self._lock = threading.Lock()
+
+    def track(self, symbols):
+        for symbol in symbols:
+            if symbol not in self.sizes:
+                self.symbols.append(symbol)
+                self.sizes[symbol] = None
+                self._positions_at = None
+
+    def budget(self, method):
+        budget = self.budgets.get(method)
+        if budget is None:
+            budget = self.budgets[method] = RateBudget()
+        return budget
+
+    def spent(self, method):
+        """Account for one request of `method` (headers of the latest response when ccxt keeps them)."""
+        with self._lock:
+            budget = self.budget(method)
+            budget.spend()
+            budget.update(getattr(self.exchange, 'last_response_headers', None))
+
+    # ------------------------------------------------------------------
+    # Fetching
+    # ------------------------------------------------------------------
+    def _fresh(self, at, max_age):
+        return at is not None and time.monotonic() - at <= max_age
+
+    def _fetch(self, resource, method, fetch):
+        """Run `fetch` once for all concurrent callers of `resource`."""
+        with self._lock:
+            future = self._inflight.get(resource)
+            leader = future is None
+            if leader:
+                future = self._inflight[resource] = Future()
+        if not leader:
+            self.metrics.incr('state.coalesced')
+            return future.result()
+        try:
+            self.metrics.incr('state.requests')
+            value = fetch()
+            self.spent(method)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            self.spent(method)
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[resource]
+
+    def _refresh(self, resource, method, at, max_age, fetch):
+        # True: `fetch` ran; False: the cached value is fresh, or stale but kept to save budget
+        if self._fresh(at, max_age):
+            self.metrics.incr('state.hits')
+            return False
+        if at is not None and self.budget(method).remaining < self.reserve:
+            self.metrics.incr('state.stale')
+            return False
+        try:
+            self._fetch(resource, method, fetch)
+        except Exception as e:
+            if at is None:
+                raise
+            print(f"STATE {resource} REFRESH FAILED, using value from {time.monotonic() - at:.0f}s ago: {e}")
+            return False
+        return True
+
+    def balance(self, max_age=None):
+        """Free USDT."""
+        def fetch():
+            free = float(self.exchange.fetch_balance(params={'type': 'swap'})['USDT']['free'])
+            self._balance = (free, time.monotonic())
+
+        at = self._balance[1] if self._balance else None
+        self._refresh('balance', 'fetch_balance', at, self.ttl['balance'] if max_age is None else max_age, fetch)
+        return self._balance[0]
+
+    def positions(self, symbols=None, max_age=None):
+        """Signed position size per symbol (all tracked symbols are refreshed together)."""
+        if symbols is not None:
+            self.track(symbols)
+
+        def fetch():
+            started = time.monotonic()
+            sizes = fetch_position_sizes(self.exchange, self.symbols)
+            with self._lock:
+                for symbol, size in sizes.items():
+                    # An ack applied while the request was in flight is newer than its answer
+                    if self._changed.get(symbol, -1.0) < started:
+                        self.sizes[symbol] = size
+                self._positions_at = started
+
+        stale = any(self.sizes[s] is None for s in self.symbols)
+        at = None if stale else self._positions_at
+        self._refresh('positions', 'fetch_positions', at,
+                      self.ttl['positions'] if max_age is None else max_age, fetch)
+        return {s: self.sizes[s] for s in (symbols or self.symbols)}
+
+    def confirmed_size(self, symbol, max_age=None):
+        """
+        Position size read from the exchange within `max_age` (default ttl['positions']),
+        re-read when older. None when it cannot be confirmed: the request failed, or the
+        budget is low and only the stale value was served.
+        """
+        max_age = self.ttl['positions'] if max_age is None else max_age
+        asked = time.monotonic()
+        try:
+            size = self.positions([symbol], max_age=max_age)[symbol]
+        except Exception as e:
+            print(f"POSITION READ FAILED {symbol}: {e}")
+            return None
+        read = self._positions_at
+        return size if read is not None and read >= asked - max_age else None
+
+    def price(self, symbol, max_age=None):
+        """Last price: from acks and the feed when recent enough, otherwise one fetch_ticker."""
+        def fetch():
+            self.observe_price(symbol, self.exchange.fetch_ticker(symbol)['last'])
+
+        entry = self.prices.get(symbol)
+        self._refresh(f"price {symbol}", 'fetch_ticker', entry[1] if entry else None,
+                      self.ttl['price'] if max_age is None else max_age, fetch)
+        return self.prices[symbol][0]
+
+    # ------------------------------------------------------------------
+    # Updates without requests
+    # ------------------------------------------------------------------
+    def observe_price(self, symbol, price):
+        if price:
+            self.prices[symbol] = (price, time.monotonic())
+
+    def on_order(self, symbol, side, filled, price=None):
+        """Apply a create_order acknowledgement: position size, last price and the order budget."""
+        self.spent('create_order')
+        with self._lock:
+            held = self.sizes.get(symbol)
+            if held is not None:
+                self.sizes[symbol] = round(held + (filled if side == 'buy' else -filled), 12)
+            self._changed[symbol] = time.monotonic()
+        self.observe_price(symbol, price)
+
+    def invalidate(self, symbol):
+        """Forget a size whose state is unknown (e.g. a failed order); the next positions() refetches."""
+        with self._lock:
+            self.sizes[symbol] = None
+            self._changed[symbol] = time.monotonic()
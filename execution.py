@@ -0,0 +1,178 @@
+# execution.py
+"""
+Order execution for the instant reversal.
+
+The original close_and_reverse put three sequential round trips between a signal
+and the new position: a reduce-only close, the opening order, and a fetch_ticker
+only to print a price. The Executor:
+
+* trades straight to the target position when the held size is known (from
+  exchange_state: one fetch_positions, then every order ack): reversing
+  `quantity` is a single market order of held + quantity. Neither order of that
+  path is reduce-only, so the size must have been read from the exchange within
+  ttl['positions'] (one fetch_positions when older); a position closed by a
+  liquidation, TP/SL or by hand is seen before it is traded on
+* with mode='concurrent' sends the close and open legs at the same time instead;
+  the close leg is sized from the known position, so their arrival order does not
+  change the result
+* falls back to the safe sequence (reduce-only close, then open) when the size is
+  unknown or unconfirmed, e.g. after a failed order or position request
+* takes filled amount and average price from the order responses, re-submits the
+  unfilled remainder of partial fills, and times every order from submit to ack
+  (`order_ack` in metrics)
+* an ack without fill details (Bybit often returns only the order id for market
+  orders) is completed with one fetch_order; when the fill is still unknown the
+  cached size is dropped, so the position is re-read before it is traded on
+
+    executor = Executor(exchange)
+    executor.sync(['BTCUSDT'])                           # one fetch_positions
+    executor.reverse('long', 'sell', 'BTCUSDT', 0.007)   # one 0.014 sell
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from exchange_state import ExchangeState
+from metrics import METRICS
+
+MODES = ('single', 'concurrent')
+
+
+class Execution(NamedTuple):
+    symbol: str
+    side: str
+    amount: float
+    filled: float
+    average: float     # None when no response carried a price
+    acks: tuple        # submit-to-ack seconds of every order sent
+
+
+def _side(size):
+    return None if not size else ('long' if size > 0 else 'short')
+
+
+def _final(order):
+    # Filled amount known and no longer changing
+    return order.get('filled') is not None and order.get('status') != 'open'
+
+
+class Executor:
+    def __init__(self, exchange, mode='single', metrics=METRICS, max_attempts=3, state=None):
+        if mode not in MODES:
+            raise ValueError(f"unknown mode {mode!r}, expected one of {MODES}")
+        self.exchange = exchange
+        self.mode = mode
+        self.metrics = metrics
+        self.max_attempts = max_attempts
+        self.state = state if state is not None else ExchangeState(exchange, metrics=metrics)
+        self._pool = ThreadPoolExecutor(2, thread_name_prefix='leg') if mode == 'concurrent' else None
+
+    @property
+    def sizes(self):
+        """symbol -> signed contracts held, None = unknown."""
+        return self.state.sizes
+
+    def sync(self, symbols):
+        """Refresh position sizes with one request; returns {symbol: 'long' | 'short' | None}."""
+        try:
+            sizes = self.state.positions(symbols, max_age=0)
+        except Exception as e:
+            print(f"POSITION SYNC FAILED: {e}")
+            sizes = dict.fromkeys(symbols)
+        return {symbol: _side(sizes[symbol]) for symbol in symbols}
+
+    def submit(self, symbol, side, amount, reduce_only=False):
+        """Market order; the unfilled remainder is re-submitted up to max_attempts orders in total."""
+        params = {'reduceOnly': True} if reduce_only else {}
+        filled = priced = cost = 0.0
+        acks = []
+        remaining = amount
+        for _ in range(self.max_attempts):
+            started = time.perf_counter()
+            order = self.exchange.create_order(symbol, 'market', side, remaining, params=params)
+            acks.append(time.perf_counter() - started)
+            self.metrics.observe('order_ack', acks[-1])
+
+            if not _final(order) or not (order.get('average') or order.get('price')):
+                order = self._details(symbol, order)
+            price = order.get('average') or order.get('price')
+            if not _final(order):
+                # Fill unknown: report the order as filled, but re-read the position before trading on it
+                self.state.spent('create_order')
+                self.state.invalidate(symbol)
+                self.state.observe_price(symbol, price)
+                print(f"FILL UNKNOWN {symbol} {side.upper()} {remaining:.5f} | position will be re-read")
+                filled += remaining
+                if price:
+                    priced += remaining
+                    cost += remaining * price
+                remaining = 0.0
+                break
+            done = order['filled']
+            self.state.on_order(symbol, side, done, price)
+            if price:
+                priced += done
+                cost += done * price
+            filled += done
+            remaining = round(remaining - done, 12)
+            if remaining <= 0 or done <= 0:
+                break
+        if remaining > 0 and not reduce_only:
+            print(f"PARTIAL FILL {symbol} {side.upper()} | {filled:.5f} of {amount:.5f}")
+        return Execution(symbol, side, amount, filled, cost / priced if priced else None, tuple(acks))
+
+    def _details(self, symbol, order):
+        # The order as the exchange has it now; the ack itself when it cannot be fetched
+        if order.get('id') is None or not hasattr(self.exchange, 'fetch_order'):
+            return order
+        try:
+            return self.exchange.fetch_order(order['id'], symbol)
+        except Exception as e:
+            print(f"ORDER FETCH FAILED {symbol} {order['id']}: {e}")
+            return order
+        finally:
+            self.state.spent('fetch_order')
+
+    def reverse(self, current_side, new_side, symbol, quantity):
+        """Move `symbol` to `quantity` on `new_side` ('buy' / 'sell'). Returns the Executions."""
+        held = self.state.confirmed_size(symbol)
+        if held is None:
+            return self._sequential(current_side, new_side, symbol, quantity)
+
+        target = quantity if new_side == 'buy' else -quantity
+        try:
+            if self.mode == 'concurrent' and held and (held > 0) != (target > 0):
+                legs = [('sell' if held > 0 else 'buy', abs(held)), (new_side, quantity)]
+                executions = list(self._pool.map(lambda leg: self.submit(symbol, *leg), legs))
+            else:
+                delta = round(target - held, 12)
+                if delta == 0:
+                    return []
+                executions = [self.submit(symbol, 'buy' if delta > 0 else 'sell', abs(delta))]
+        except Exception as e:
+            self.state.invalidate(symbol)   # outcome unknown: safe path until the next position sync
+            print(f"REVERSE FAILED {symbol}: {e}")
+            return []
+
+        for execution in executions:
+            print(f"REVERSE → {execution.side.upper()} {symbol} | {execution.filled:.5f} "
+                  f"@ {execution.average or 'unknown'} | ack {1e3 * sum(execution.acks):.0f} ms")
+        return executions
+
+    def _sequential(self, current_side, new_side, symbol, quantity):
+        executions = []
+        if current_side:
+            close_side = 'sell' if current_side == 'long' else 'buy'
+            try:
+                executions.append(self.submit(symbol, close_side, quantity, reduce_only=True))
+                print(f"CLOSE {current_side.upper()} {symbol} | {executions[-1].filled:.5f}")
+            except Exception as e:
+                print(f"CLOSE FAILED {symbol}: {e}")
+
+        try:
+            executions.append(self.submit(symbol, new_side, quantity))
+            print(f"REVERSE → OPEN {new_side.upper()} {symbol} | {quantity:.5f} "
+                  f"@ {executions[-1].average or 'unknown'}")
+        except Exception as e:
+            print(f"OPEN FAILED {symbol}: {e}")
+        return executions
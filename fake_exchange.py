@@ -0,0 +1,196 @@
+# fake_exchange.py
+"""
+Local stand-in for the subset of the ccxt exchange API the bot uses.
+
+Serves recorded or synthetic candles with a settable clock, so the store, feeds
+and runners can be exercised without the network:
+
+    ex = FakeExchange({('BTCUSDT', '1m'): synthetic_ohlcv(10_000)})
+    ex.now = ex.ohlcv[('BTCUSDT', '1m')][-1][0] + 30_000
+    ex.fetch_ohlcv('BTCUSDT', '1m', limit=200)
+    ex.create_order('BTCUSDT', 'market', 'buy', 0.007)   # fills at the current close
+
+    slow = FakeExchange(ohlcv, latency=0.05, max_fill=0.01)  # 50 ms per request, thin book
+"""
+import bisect
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from ohlcv_store import timeframe_to_ms
+
+
+def _synthetic_columns(n, timeframe, start, price, seed):
+    rng = np.random.default_rng(seed)
+    close = price * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open_ = np.r_[price, close[:-1]]
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.001, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.001, n)))
+    volume = rng.gamma(2, 50, n)
+    ts = start + np.arange(n, dtype=np.int64) * timeframe_to_ms(timeframe)
+    return ts, open_, high, low, close, volume
+
+
+def synthetic_ohlcv(n, timeframe='1m', start=1_577_836_800_000, price=30_000.0, seed=0):
+    """Random-walk OHLCV rows [ts, open, high, low, close, volume] (ts in ms)."""
+    ts, *columns = _synthetic_columns(n, timeframe, start, price, seed)
+    return [[int(t), o, h, l, c, v] for t, o, h, l, c, v in zip(ts, *(col.tolist() for col in columns))]
+
+
+def synthetic_frame(n, timeframe='1m', start=1_577_836_800_000, price=30_000.0, seed=0):
+    """The synthetic_ohlcv data as an OHLCV DataFrame indexed by bar open time (no per-row objects)."""
+    ts, *columns = _synthetic_columns(n, timeframe, start, price, seed)
+    index = pd.DatetimeIndex(ts.view('datetime64[ms]'), name='ts')
+    return pd.DataFrame(dict(zip(('open', 'high', 'low', 'close', 'volume'), columns)), index=index)
+
+
+class FakeExchange:
+    """
+    ccxt-compatible market data from in-memory candles.
+
+    * `ohlcv` maps (symbol, timeframe) to rows sorted by timestamp
+    * `now` (ms) is the exchange clock; bars opening after it are not served yet,
+      the bar containing it is served as the forming candle
+    * `missing` holds timestamps withheld from responses (to simulate gaps)
+    * `calls` counts requests per method, `max_in_flight` the most requests that were
+      inside their latency at the same time
+    * market orders fill immediately at the last price and net into one-way
+      positions; `orders` keeps every order response
+    * `latency` (seconds) is slept in every request with `sleep` (a simulated
+      clock's sleep in replays); `max_fill` caps the amount one market order
+      fills, the rest is cancelled (a partial fill)
+    * with `bare_acks` create_order answers like Bybit usually does for market
+      orders, with the order id only; fetch_order has the fill details
+    """
+
+    def __init__(self, ohlcv=None, now=None, page_limit=1000, balance=10_000.0, latency=0.0, max_fill=None,
+                 sleep=time.sleep, bare_acks=False):
+        self.ohlcv = {key: [list(r) for r in rows] for key, rows in (ohlcv or {}).items()}
+        self.now = now if now is not None else max(
+            (rows[-1][0] for rows in self.ohlcv.values() if rows), default=0)
+        self.page_limit = page_limit
+        self.missing = set()
+        self.calls = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.balance = balance
+        self.positions = {}      # symbol -> signed contracts
+        self.orders = []
+        self.leverage = {}
+        self.latency = latency
+        self.max_fill = max_fill
+        self.sleep = sleep
+        self.bare_acks = bare_acks
+        self._ts = {}                   # (symbol, timeframe) -> (row count, timestamps)
+        self._lock = threading.Lock()   # orders may arrive from several threads
+
+    def _count(self, method):
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                self.sleep(self.latency)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _timestamps(self, key):
+        rows = self.ohlcv.get(key, [])
+        cached = self._ts.get(key)
+        if cached is None or cached[0] != len(rows):
+            cached = self._ts[key] = (len(rows), [r[0] for r in rows])
+        return cached[1]
+
+    def milliseconds(self):
+        return int(self.now)
+
+    def parse_timeframe(self, timeframe):
+        return timeframe_to_ms(timeframe) // 1000
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        self._count('fetch_ohlcv')
+        rows = self.ohlcv.get((symbol, timeframe), [])
+        ts = self._timestamps((symbol, timeframe))
+        stop = bisect.bisect_right(ts, self.now)
+        limit = min(limit or self.page_limit, self.page_limit)
+        if since is None:
+            start = max(stop - limit, 0)
+        else:
+            start = bisect.bisect_left(ts, since)
+        out = [list(r) for r in rows[start:stop] if r[0] not in self.missing]
+        return out[:limit]
+
+    # ------------------------------------------------------------------
+    # Tickers / trading
+    # ------------------------------------------------------------------
+    def _last_price(self, symbol):
+        key = min((key for key, rows in self.ohlcv.items() if key[0] == symbol and rows),
+                  key=lambda key: timeframe_to_ms(key[1]), default=None)
+        if key is None:
+            raise KeyError(f"no data for {symbol}")
+        i = bisect.bisect_right(self._timestamps(key), self.now) - 1
+        return self.ohlcv[key][max(i, 0)][4]
+
+    def fetch_ticker(self, symbol, params=None):
+        self._count('fetch_ticker')
+        return {'symbol': symbol, 'timestamp': self.milliseconds(), 'last': self._last_price(symbol)}
+
+    def fetch_tickers(self, symbols=None, params=None):
+        self._count('fetch_tickers')
+        symbols = symbols or sorted({sym for sym, _ in self.ohlcv})
+        return {symbol: {'symbol': symbol, 'timestamp': self.milliseconds(), 'last': self._last_price(symbol)}
+                for symbol in symbols}
+
+    def set_leverage(self, leverage, symbol=None, params=None):
+        self._count('set_leverage')
+        self.leverage[symbol] = leverage
+
+    def fetch_balance(self, params=None):
+        self._count('fetch_balance')
+        return {'USDT': {'free': self.balance, 'total': self.balance}}
+
+    def fetch_positions(self, symbols=None, params=None):
+        self._count('fetch_positions')
+        out = []
+        for symbol in symbols or sorted(self.positions):
+            contracts = self.positions.get(symbol, 0.0)
+            out.append({'symbol': symbol, 'contracts': abs(contracts),
+                        'side': None if contracts == 0 else ('long' if contracts > 0 else 'short')})
+        return out
+
+    def create_order(self, symbol, type, side, amount, price=None, params=None):
+        self._count('create_order')
+        params = params or {}
+        signed = amount if side == 'buy' else -amount
+        fill = self._last_price(symbol)
+        with self._lock:
+            held = self.positions.get(symbol, 0.0)
+            if params.get('reduceOnly'):
+                # Never flips or grows the position
+                signed = max(min(signed, -held), 0.0) if held < 0 else min(max(signed, -held), 0.0)
+            if self.max_fill is not None:
+                signed = max(min(signed, self.max_fill), -self.max_fill)
+            self.positions[symbol] = round(held + signed, 12)
+            order = {
+                'id': str(len(self.orders) + 1), 'symbol': symbol, 'type': type, 'side': side,
+                'amount': amount, 'filled': abs(signed), 'remaining': round(amount - abs(signed), 12),
+                'average': fill, 'price': fill, 'status': 'closed' if abs(signed) >= amount else 'canceled',
+                'timestamp': self.milliseconds(),
+                'reduceOnly': bool(params.get('reduceOnly')),
+            }
+            self.orders.append(order)
+        if self.bare_acks:
+            # ccxt's unified structure with only the id parsed
+            return {**dict.fromkeys(order), 'id': order['id'], 'info': {'orderId': order['id']}}
+        return order
+
+    def fetch_order(self, id, symbol=None, params=None):
+        self._count('fetch_order')
+        for order in self.orders:
+            if order['id'] == id:
+                return dict(order)
+        raise KeyError(f"order {id} not found")
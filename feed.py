@@ -0,0 +1,222 @@
+# feed.py
+"""
+Asyncio market-data feed with pluggable sources.
+
+A source is anything with an async `updates()` generator of BarUpdate:
+
+* StreamSource  - push updates from a ccxt.pro exchange (watch_ohlcv)
+* PollingSource - async REST poller (ccxt.async_support, or a sync client in a thread)
+* TickerSource  - one REST poller for many markets, a single fetch_tickers call per poll
+* ReplaySource  - recorded bars, e.g. from the local OHLCV store
+
+Feed runs every source as its own task and hands each update to the subscribed
+coroutines as soon as it arrives:
+
+    feed = Feed()
+    feed.add_source(PollingSource(exchange, 'BTCUSDT', '1h', interval=10))
+    feed.subscribe(on_update)          # async def on_update(update): ...
+    await feed.run()
+"""
+import asyncio
+import inspect
+from typing import NamedTuple
+
+
+class BarUpdate(NamedTuple):
+    symbol: str
+    timeframe: str
+    ts: int            # bar open time (ms)
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    closed: bool       # True once the bar is final
+
+    @classmethod
+    def from_row(cls, symbol, timeframe, row, closed=False):
+        ts, o, h, l, c, v = row[:6]
+        return cls(symbol, timeframe, int(ts), o, h, l, c, v, closed)
+
+
+async def _call(func, *args, **kwargs):
+    """Await async exchange methods, run blocking ones in a worker thread."""
+    if inspect.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    return await asyncio.to_thread(func, *args, **kwargs)
+
+
+# ----------------------------------------------------------------------
+# Sources
+# ----------------------------------------------------------------------
+class PollingSource:
+    """
+    REST poller. Each poll fetches the last two candles: the forming one is emitted
+    every time, the previous one once as closed (with its final values) when a new
+    bar starts.
+    """
+
+    def __init__(self, exchange, symbol, timeframe, interval=10.0, error_delay=30.0):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.interval = interval
+        self.error_delay = error_delay
+
+    async def updates(self):
+        closed_through = None
+        while True:
+            try:
+                rows = await _call(self.exchange.fetch_ohlcv, self.symbol, self.timeframe, limit=2)
+            except Exception as e:
+                print(f"FEED ERROR {self.symbol} {self.timeframe}: {e}")
+                await asyncio.sleep(self.error_delay)
+                continue
+
+            for row in rows[:-1]:
+                if closed_through is None or row[0] > closed_through:
+                    closed_through = row[0]
+                    yield BarUpdate.from_row(self.symbol, self.timeframe, row, closed=True)
+            if rows:
+                yield BarUpdate.from_row(self.symbol, self.timeframe, rows[-1])
+            await asyncio.sleep(self.interval)
+
+
+class TickerSource:
+    """
+    REST poller for many (symbol, timeframe) markets at once.
+
+    Each poll is one fetch_tickers call for every symbol: the last price becomes the
+    forming bar's close (and extends its high/low). Candles are only fetched for a
+    market when its next bar is due, to emit the finished bar as closed with its
+    final values and open the new one. The forming bar's volume is as of that fetch.
+    """
+
+    def __init__(self, exchange, markets, interval=10.0, error_delay=30.0):
+        self.exchange = exchange
+        self.markets = list(markets)
+        self.interval = interval
+        self.error_delay = error_delay
+
+    def _ticker(self, tickers, symbol):
+        # ccxt keys tickers by unified symbol ('BTC/USDT:USDT') even when asked by id
+        if symbol in tickers:
+            return tickers[symbol]
+        market = getattr(self.exchange, 'market', None)
+        return tickers.get(market(symbol)['symbol']) if market else None
+
+    async def updates(self):
+        symbols = sorted({symbol for symbol, _ in self.markets})
+        bars = {}   # market -> forming [ts, open, high, low, close, volume]
+        while True:
+            try:
+                tickers = await _call(self.exchange.fetch_tickers, symbols)
+            except Exception as e:
+                print(f"FEED ERROR tickers: {e}")
+                await asyncio.sleep(self.error_delay)
+                continue
+
+            now = self.exchange.milliseconds()
+            for market in self.markets:
+                symbol, timeframe = market
+                bar = bars.get(market)
+                ticker = self._ticker(tickers, symbol)
+                tf_ms = self.exchange.parse_timeframe(timeframe) * 1000
+
+                if bar is None or ticker is None or now // tf_ms * tf_ms > bar[0]:
+                    try:
+                        rows = await _call(self.exchange.fetch_ohlcv, symbol, timeframe, limit=2)
+                    except Exception as e:
+                        print(f"FEED ERROR {symbol} {timeframe}: {e}")
+                        continue
+                    if not rows:
+                        continue
+                    for row in rows[:-1]:
+                        if bar is None or row[0] >= bar[0]:
+                            yield BarUpdate.from_row(symbol, timeframe, row, closed=True)
+                    bar = bars[market] = list(rows[-1])
+                else:
+                    last = ticker['last']
+                    bar[2] = max(bar[2], last)
+                    bar[3] = min(bar[3], last)
+                    bar[4] = last
+                yield BarUpdate.from_row(symbol, timeframe, bar)
+            await asyncio.sleep(self.interval)
+
+
+class StreamSource:
+    """Push source on top of a ccxt.pro exchange's watch_ohlcv."""
+
+    def __init__(self, exchange, symbol, timeframe, error_delay=5.0):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.error_delay = error_delay
+
+    async def updates(self):
+        current = None
+        while True:
+            try:
+                candles = await self.exchange.watch_ohlcv(self.symbol, self.timeframe)
+            except Exception as e:
+                print(f"STREAM ERROR {self.symbol} {self.timeframe}: {e}")
+                await asyncio.sleep(self.error_delay)
+                continue
+            if not candles:
+                continue
+
+            latest = candles[-1]
+            if current is not None and latest[0] > current[0]:
+                final = next((r for r in reversed(candles) if r[0] == current[0]), current)
+                yield BarUpdate.from_row(self.symbol, self.timeframe, final, closed=True)
+            current = list(latest)
+            yield BarUpdate.from_row(self.symbol, self.timeframe, latest)
+
+
+class ReplaySource:
+    """Recorded [ts, open, high, low, close, volume] rows emitted as closed bars."""
+
+    def __init__(self, rows, symbol, timeframe, interval=0.0):
+        self.rows = rows
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.interval = interval
+
+    @classmethod
+    def from_store(cls, store, symbol, timeframe, start=None, end=None, interval=0.0):
+        df = store.load(symbol, timeframe, start, end)
+        rows = zip(df.index.as_unit('ms').asi8.tolist(),
+                   *(df[col].tolist() for col in ('open', 'high', 'low', 'close', 'volume')))
+        return cls(list(rows), symbol, timeframe, interval)
+
+    async def updates(self):
+        for row in self.rows:
+            yield BarUpdate.from_row(self.symbol, self.timeframe, row, closed=True)
+            await asyncio.sleep(self.interval)   # 0 still yields to other tasks
+
+
+# ----------------------------------------------------------------------
+# Feed
+# ----------------------------------------------------------------------
+class Feed:
+    def __init__(self):
+        self.sources = []
+        self.handlers = []
+
+    def add_source(self, source):
+        self.sources.append(source)
+        return source
+
+    def subscribe(self, handler):
+        """`handler` is `async def handler(update)`; it should hand slow work to tasks."""
+        self.handlers.append(handler)
+        return handler
+
+    async def _pump(self, source):
+        async for update in source.updates():
+            for handler in self.handlers:
+                await handler(update)
+
+    async def run(self):
+        """Run until every source is exhausted (live sources never are)."""
+        await asyncio.gather(*(self._pump(source) for source in self.sources))
@@ -0,0 +1,264 @@
+# indicator_graph.py
+"""
+Declarative indicator graph with a shared, memoized evaluation cache.
+
+Strategies describe the series they need as nodes over the OHLCV columns
+instead of computing them eagerly:
+
+    close = col('close')
+    ema21 = ema(close, 21)
+    c = 100 * (close + 2 * stdev(close, 21) - ema21) / (4 * stdev(close, 21))
+    values = evaluate(df, {'c': c, 'ema21': ema21})
+
+A node is identified by its function, inputs and parameters, so the same
+expression built anywhere (another strategy, another call) is the same node.
+evaluate() fingerprints the OHLCV columns the nodes read once, then computes
+every node it needs at most once. Results stay in a bounded LRU keyed by
+(fingerprint, node): running several strategies on the same data costs the
+union of their nodes rather than the sum, and modified data never hits a stale
+entry.
+
+Cached values are shared between callers and must not be modified in place.
+"""
+import hashlib
+import operator
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import indicators
+
+
+# ----------------------------------------------------------------------
+# Nodes
+# ----------------------------------------------------------------------
+class Node:
+    """func(*args, **kwargs) where args may be other nodes; compared structurally."""
+
+    __slots__ = ('func', 'args', 'kwargs', '_hash')
+
+    def __init__(self, func, args=(), kwargs=()):
+        self.func = func
+        self.args = tuple(args)
+        self.kwargs = tuple(sorted(dict(kwargs).items()))
+        self._hash = hash((func, self.args, self.kwargs))
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        return (isinstance(other, Node) and self._hash == other._hash and self.func is other.func
+                and self.args == other.args and self.kwargs == other.kwargs)
+
+    def __repr__(self):
+        if self.func is _column:
+            return self.args[0]
+        args = [repr(a) for a in self.args] + [f"{k}={v!r}" for k, v in self.kwargs]
+        return f"{getattr(self.func, '__name__', self.func)}({', '.join(args)})"
+
+    # Arithmetic builds nodes, in the same evaluation order as the plain expression
+    def __add__(self, other):
+        return Node(operator.add, (self, other))
+
+    def __radd__(self, other):
+        return Node(operator.add, (other, self))
+
+    def __sub__(self, other):
+        return Node(operator.sub, (self, other))
+
+    def __rsub__(self, other):
+        return Node(operator.sub, (other, self))
+
+    def __mul__(self, other):
+        return Node(operator.mul, (self, other))
+
+    def __rmul__(self, other):
+        return Node(operator.mul, (other, self))
+
+    def __truediv__(self, other):
+        return Node(operator.truediv, (self, other))
+
+    def __rtruediv__(self, other):
+        return Node(operator.truediv, (other, self))
+
+    def __neg__(self):
+        return Node(operator.neg, (self,))
+
+
+def _column(name):
+    raise RuntimeError("column nodes are resolved by evaluate()")
+
+
+def col(name):
+    """A column of the evaluated DataFrame."""
+    return Node(_column, (name,))
+
+
+def node(func, *args, **kwargs):
+    """Generic node; `func` must be a module-level function so equal nodes share results."""
+    return Node(func, args, kwargs)
+
+
+def _builder(func):
+    def build(*args, **kwargs):
+        return Node(func, args, kwargs)
+    build.__name__ = func.__name__
+    build.__doc__ = f"Graph node for indicators.{func.__name__}."
+    return build
+
+
+ema = _builder(indicators.ema)
+rma = _builder(indicators.rma)
+wma = _builder(indicators.wma)
+hma = _builder(indicators.hma)
+rolling_max = _builder(indicators.rolling_max)
+rolling_min = _builder(indicators.rolling_min)
+rolling_sum = _builder(indicators.rolling_sum)
+rolling_mean = _builder(indicators.rolling_mean)
+rolling_std = _builder(indicators.rolling_std)
+is_rising = _builder(indicators.is_rising)
+is_falling = _builder(indicators.is_falling)
+true_range = _builder(indicators.true_range)
+atr = _builder(indicators.atr)
+supertrend = _builder(indicators.supertrend)
+
+
+def wpr(high, low, close, period):
+    """indicators.wpr built from shared rolling max / min nodes."""
+    highest_high = rolling_max(high, period)
+    lowest_low = rolling_min(low, period)
+    return -100 * (highest_high - close) / (highest_high - lowest_low)
+
+
+# ----------------------------------------------------------------------
+# Cache
+# ----------------------------------------------------------------------
+def _nbytes(value):
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return int(np.sum(value.memory_usage(index=False, deep=False)))
+    return getattr(value, 'nbytes', 64)
+
+
+class IndicatorCache:
+    """LRU of computed nodes keyed by (data fingerprint, node), bounded by entries and bytes."""
+
+    def __init__(self, maxsize=512, max_bytes=256 * 2**20):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, value):
+        size = _nbytes(value)
+        with self._lock:
+            if key in self.entries:
+                self.nbytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.nbytes += size
+            while self.entries and (len(self.entries) > self.maxsize or self.nbytes > self.max_bytes):
+                self.nbytes -= self.entries.popitem(last=False)[1][1]
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.nbytes = self.hits = self.misses = 0
+
+
+CACHE = IndicatorCache()
+
+
+def fingerprint(df, columns):
+    """Digest of the index and `columns` (names, dtypes and raw values)."""
+    h = hashlib.blake2b(digest_size=16)
+    index = np.asarray(df.index)
+    if index.dtype.kind in 'biufmM':
+        h.update(index.dtype.str.encode())
+        h.update(np.ascontiguousarray(index).tobytes())
+    else:
+        h.update(pd.util.hash_pandas_object(df.index, index=False).to_numpy().tobytes())
+    for name in sorted(columns):
+        values = np.ascontiguousarray(df[name].to_numpy())
+        h.update(f"{name}:{values.dtype.str}:{len(values)};".encode())
+        h.update(values.tobytes())
+    return h.hexdigest()
+
+
+def _columns(nodes):
+    seen, stack, names = set(), list(nodes), set()
+    while stack:
+        item = stack.pop()
+        if not isinstance(item, Node) or item in seen:
+            continue
+        seen.add(item)
+        if item.func is _column:
+            names.add(item.args[0])
+        else:
+            stack.extend(item.args)
+            stack.extend(v for _, v in item.kwargs)
+    return names
+
+
+def evaluate(df, nodes, cache=CACHE):
+    """
+    Compute `nodes` ({name: node}) on `df`; returns {name: value}.
+
+    Shared sub-expressions are computed once; with a cache (the module-level
+    CACHE by default, None to disable) they are also reused across calls on the
+    same data.
+    """
+    columns = _columns(nodes.values())
+    data = fingerprint(df, columns) if cache is not None else None
+    done = {}
+
+    def compute(item):
+        if not isinstance(item, Node):
+            return item
+        if item in done:
+            return done[item]
+        if item.func is _column:
+            value = df[item.args[0]]
+        else:
+            entry = cache.get((data, item)) if cache is not None else None
+            if entry is not None:
+                value = entry[0]
+            else:
+                value = item.func(*(compute(a) for a in item.args),
+                                  **{k: compute(v) for k, v in item.kwargs})
+                if cache is not None:
+                    cache.put((data, item), value)
+        done[item] = value
+        return value
+
+    return {name: compute(item) for name, item in nodes.items()}
+
+
+def evaluate_matrix(columns, nodes):
+    """
+    evaluate() for many series at once (e.g. a symbol universe).
+
+    `columns` maps the OHLCV names the nodes read to aligned (series x bars)
+    arrays. Every node is computed once on (bars x series) DataFrames, so each
+    indicator runs along the time axis for all series in one call; column j of a
+    result equals the value evaluate() gives on a DataFrame of row j. Returns
+    {name: (bars x series) value}. The cache is not used.
+    """
+    frames = {name: pd.DataFrame(np.asarray(columns[name], dtype=float).T) for name in _columns(nodes.values())}
+    return evaluate(frames, nodes, cache=None)
\ No newline at end of file
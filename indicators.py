@@ -0,0 +1,382 @@
+# indicators.py
+"""
+Vectorized indicator kernels shared by the strategy modules.
+
+Every function accepts a pandas Series, a DataFrame (one column per series) or a
+1D/2D NumPy array with time along axis 0, and returns the same kind of object.
+Warm-up rows are NaN exactly like the equivalent pandas ``rolling`` call
+(a window that contains a NaN is NaN as well).
+
+Nothing here calls back into Python per window:
+* WMA / HMA use np.correlate (one C-level pass per column), summing every window
+  in the same order as the np.dot per window they replace. That order is NumPy's
+  internals, not its API: it is checked on import (WMA_MATCHES_DOT), and the
+  values are bit-identical where it holds (NumPy 2.4 with OpenBLAS, tested),
+  within rounding otherwise. normalized=True instead reproduces
+  ta.trend.wma_indicator (weights scaled to sum 1, products summed per window)
+* rolling all-true / all-false use integer cumulative sums
+* EMA / RMA and rolling min / max use pandas' compiled ewm / window routines
+* rolling sum / mean / std reduce every window on its own (shifted-slice sums,
+  two-pass std, all columns at once), so a value does not depend on how far back
+  the series starts or on the other columns - pandas' running sums differ in the
+  last bits, which breaks chunked evaluation
+* ATR and Supertrend are true recursions; they run through numba when it is
+  installed and fall back to plain NumPy otherwise (identical results)
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:  # optional accelerator
+    njit = None
+
+
+# ----------------------------------------------------------------------
+# Internal helpers
+# ----------------------------------------------------------------------
+def _to_pandas(values):
+    if isinstance(values, (pd.Series, pd.DataFrame)):
+        return values
+    values = np.asarray(values, dtype=float)
+    return pd.Series(values) if values.ndim == 1 else pd.DataFrame(values)
+
+
+def _like(result, values):
+    """Return `result` (pandas object or ndarray) in the container type of `values`."""
+    if isinstance(values, pd.Series):
+        if isinstance(result, pd.Series):
+            return result
+        return pd.Series(result, index=values.index)
+    if isinstance(values, pd.DataFrame):
+        if isinstance(result, pd.DataFrame):
+            return result
+        return pd.DataFrame(result, index=values.index, columns=values.columns)
+    return np.asarray(result)
+
+
+# np.correlate (NumPy's _pyarray_correlate) hands every full window to the dtype's
+# dot function, the BLAS ddot that np.dot on two vectors uses as well, except for
+# kernels of up to 11 taps: those go through its small_correlate loop, which sums
+# in another order. Shorter kernels are padded to this many taps to stay on the
+# dot path. Both are implementation details (NumPy 2.4 here), hence the probe below.
+_MIN_TAPS = 12
+
+
+def _wma_1d(values, weights, out=None):
+    # np.correlate sums contiguous windows in a fixed order; strided input would take another path
+    values = np.ascontiguousarray(values)
+    out = np.empty(len(values)) if out is None else out
+    period = len(weights)
+    out[:period - 1] = np.nan
+    if len(values) < period:
+        out[:] = np.nan
+        return out
+    pad = _MIN_TAPS - period
+    if pad <= 0:
+        sums = np.correlate(values, weights, 'valid')
+    else:
+        # Trailing zero taps keep the dot order (x * 0 adds an exact +0) but would turn
+        # a NaN after a window into NaN: sum without NaNs, then mask their windows
+        nan = np.isnan(values)
+        has_nan = nan.any()
+        padded = np.zeros(len(values) + pad)
+        padded[:len(values)] = np.where(nan, 0.0, values) if has_nan else values
+        sums = np.correlate(padded, np.concatenate([weights, np.zeros(pad)]), 'valid')
+        if has_nan:
+            counts = np.concatenate([[0], np.cumsum(nan)])
+            sums[counts[period:] - counts[:-period] > 0] = np.nan
+    out[period - 1:] = sums / weights.sum()
+    return out
+
+
+def _wma_normalized_1d(values, weights, out=None, block=65_536):
+    # ta's order: every window's products with the scaled weights, summed pairwise by NumPy
+    values = np.ascontiguousarray(values)
+    out = np.empty(len(values)) if out is None else out
+    period = len(weights)
+    out[:period - 1] = np.nan
+    if len(values) < period:
+        out[:] = np.nan
+        return out
+    windows = np.lib.stride_tricks.sliding_window_view(values, period)
+    for start in range(0, len(windows), block):
+        out[period - 1 + start:period - 1 + start + block] = (windows[start:start + block] * weights).sum(axis=1)
+    return out
+
+
+# ----------------------------------------------------------------------
+# Moving averages
+# ----------------------------------------------------------------------
+def wma_weights(period):
+    return np.arange(1, period + 1, dtype=float)
+
+
+def _correlate_matches_dot():
+    # Whether this NumPy build sums padded and full-length kernels like np.dot: values
+    # spread over 16 orders of magnitude make any other summation order show
+    rng = np.random.default_rng(0)
+    values = rng.standard_normal(256) * 10.0 ** rng.integers(-8, 8, 256)
+    for period in (2, 3, 7, 11, 12, 25):
+        weights = wma_weights(period)
+        windows = np.lib.stride_tricks.sliding_window_view(values, period)
+        expected = np.array([np.dot(window, weights) for window in windows]) / weights.sum()
+        if not np.array_equal(_wma_1d(values, weights)[period - 1:], expected):
+            return False
+    return True
+
+
+def wma(values, period, normalized=False):
+    """
+    Linearly weighted moving average (weights 1..period, newest heaviest).
+
+    Default: sum(price * weight) / sum(weights) per window, as np.dot (strategy3);
+    bit-identical to it where WMA_MATCHES_DOT, within rounding otherwise.
+    normalized=True: sum(price * weight / sum(weights)), as ta.trend.wma_indicator
+    (strategy1's HMA). The two differ in the last bits.
+    """
+    arr = np.asarray(values, dtype=float)
+    weights = wma_weights(period)
+    kernel = _wma_1d
+    if normalized:
+        weights = weights * 2 / (period * (period + 1))
+        kernel = _wma_normalized_1d
+    if arr.ndim == 1:
+        return _like(kernel(arr, weights), values)
+    # One contiguous row per column, then hand back a (bars x columns) view
+    columns = np.ascontiguousarray(arr.T)
+    out = np.empty(columns.shape)
+    for col, col_out in zip(columns, out):
+        kernel(col, weights, col_out)
+    return _like(out.T, values)
+
+
+WMA_MATCHES_DOT = _correlate_matches_dot()
+
+
+def hma(values, period, normalized=False):
+    """Hull moving average: WMA(2 * WMA(x, period/2) - WMA(x, period), sqrt(period))."""
+    half_length = int(period / 2)
+    sqrt_length = int(np.sqrt(period))
+    arr = np.asarray(values, dtype=float)
+    diff_wma = 2 * wma(arr, half_length, normalized) - wma(arr, period, normalized)
+    return _like(wma(diff_wma, sqrt_length, normalized), values)
+
+
+def ema(values, period):
+    return _like(_to_pandas(values).ewm(span=period, adjust=False).mean(), values)
+
+
+def rma(values, period):
+    return _like(_to_pandas(values).ewm(alpha=1/period, adjust=False).mean(), values)
+
+
+# ----------------------------------------------------------------------
+# Rolling windows
+# ----------------------------------------------------------------------
+def rolling_max(values, period):
+    return _like(_to_pandas(values).rolling(window=period).max(), values)
+
+
+def rolling_min(values, period):
+    return _like(_to_pandas(values).rolling(window=period).min(), values)
+
+
+def _rolling(values, period, reduce):
+    # Time along axis 0 for one column or many: the kernels add shifted slices, so
+    # every column is summed in the same order as it would be on its own
+    arr = np.ascontiguousarray(values, dtype=float)
+    out = np.full(arr.shape, np.nan)
+    if 0 < period <= len(arr):
+        out[period - 1:] = reduce(arr, period)
+    return _like(out, values)
+
+
+def _window_sums(values, period):
+    # Oldest to newest, one shifted slice per offset
+    count = len(values) - period + 1
+    sums = values[:count].copy()
+    for offset in range(1, period):
+        sums += values[offset:offset + count]
+    return sums
+
+
+def _window_stds(values, period):
+    # Two passes per window (mean, then squared deviations)
+    count = len(values) - period + 1
+    if period < 2:
+        return np.full((count,) + values.shape[1:], np.nan)
+    means = _window_sums(values, period) / period
+    squares = np.zeros_like(means)
+    dev = np.empty_like(means)
+    for offset in range(period):
+        np.subtract(values[offset:offset + count], means, out=dev)
+        dev *= dev
+        squares += dev
+    return np.sqrt(squares / (period - 1))
+
+
+def rolling_sum(values, period):
+    """Sum of the last `period` values (NaN until a full window, as pandas rolling().sum())."""
+    return _rolling(values, period, _window_sums)
+
+
+def rolling_mean(values, period):
+    """Mean of the last `period` values (as pandas rolling().mean())."""
+    return _rolling(values, period, lambda v, p: _window_sums(v, p) / p)
+
+
+def rolling_std(values, period):
+    """Sample standard deviation (ddof=1) of the last `period` values (as pandas rolling().std())."""
+    return _rolling(values, period, _window_stds)
+
+
+def wpr(high, low, close, period):
+    """Williams %R."""
+    highest_high = rolling_max(high, period)
+    lowest_low = rolling_min(low, period)
+    return -100 * (highest_high - close) / (highest_high - lowest_low)
+
+
+def rolling_all(mask, period):
+    """True where the last `period` values of a boolean mask are all True (False during warm-up)."""
+    arr = np.asarray(mask, dtype=bool)
+    counts = np.cumsum(arr, axis=0, dtype=np.int64)
+    out = np.zeros(arr.shape, dtype=bool)
+    if len(arr) >= period:
+        window = counts[period - 1:].copy()
+        window[1:] -= counts[:len(arr) - period]
+        out[period - 1:] = window == period
+    return _like(out, mask)
+
+
+def _diff(arr):
+    out = np.full(arr.shape, np.nan)
+    out[1:] = arr[1:] - arr[:-1]
+    return out
+
+
+def is_rising(values, period):
+    """Strictly increasing for `period` consecutive bars (Pine's ta.rising)."""
+    return _like(rolling_all(_diff(np.asarray(values, dtype=float)) > 0, period), values)
+
+
+def is_falling(values, period):
+    """Strictly decreasing for `period` consecutive bars (Pine's ta.falling)."""
+    return _like(rolling_all(_diff(np.asarray(values, dtype=float)) < 0, period), values)
+
+
+# ----------------------------------------------------------------------
+# Recursive kernels (ATR, Supertrend)
+# ----------------------------------------------------------------------
+def true_range(high, low, close):
+    """max(high - low, |high - prev close|, |low - prev close|), NaNs skipped like DataFrame.max(axis=1)."""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    prev_close = np.full(close.shape, np.nan)
+    prev_close[1:] = close[:-1]
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+
+def _atr_loop(tr, period, out):
+    for i in range(period, len(tr)):
+        out[i] = (out[i - 1] * (period - 1) + tr[i]) / float(period)
+
+
+def _supertrend_loop(close, upper, lower, out):
+    # Same comparisons as max(lower, prev) / min(upper, prev) on Python floats
+    n, k = close.shape
+    for j in range(k):
+        prev = upper[0, j]
+        out[0, j] = prev
+        for i in range(1, n):
+            if close[i, j] > prev:
+                if not prev > lower[i, j]:
+                    prev = lower[i, j]
+            else:
+                if not prev < upper[i, j]:
+                    prev = upper[i, j]
+            out[i, j] = prev
+
+
+def _atr_python(tr, period, out):
+    values = out.tolist()
+    tr = tr.tolist()
+    for i in range(period, len(tr)):
+        values[i] = (values[i - 1] * (period - 1) + tr[i]) / float(period)
+    out[:] = values
+
+
+def _supertrend_numpy(close, upper, lower, out):
+    if close.shape[1] == 1:
+        # Single series: a scalar loop over Python floats beats per-row array calls
+        close, upper, lower = close[:, 0].tolist(), upper[:, 0].tolist(), lower[:, 0].tolist()
+        prev = upper[0]
+        values = [prev]
+        for i in range(1, len(close)):
+            if close[i] > prev:
+                prev = max(lower[i], prev)
+            else:
+                prev = min(upper[i], prev)
+            values.append(prev)
+        out[:, 0] = values
+        return
+    out[0] = upper[0]
+    for i in range(1, len(close)):
+        prev = out[i - 1]
+        out[i] = np.where(
+            close[i] > prev,
+            np.where(prev > lower[i], prev, lower[i]),
+            np.where(prev < upper[i], prev, upper[i]),
+        )
+
+
+if njit is not None:
+    _atr_kernel = njit(cache=True)(_atr_loop)
+    _supertrend_kernel = njit(cache=True)(_supertrend_loop)
+    BACKEND = 'numba'
+else:
+    _atr_kernel = _atr_python
+    _supertrend_kernel = _supertrend_numpy
+    BACKEND = 'numpy'
+
+
+def _atr_1d(tr, period):
+    out = np.zeros(len(tr))
+    if len(tr) >= period:
+        # Seed with the mean of the first window (NaNs skipped like Series.mean)
+        first = tr[:period]
+        valid = ~np.isnan(first)
+        out[period - 1] = np.where(valid, first, 0.0).sum() / valid.sum()
+        _atr_kernel(tr, period, out)
+    return out
+
+
+def atr(high, low, close, period):
+    """Wilder ATR, same values as ta.volatility.AverageTrueRange (zeros before the first full window)."""
+    tr = true_range(high, low, close)
+    if tr.ndim == 1:
+        return _like(_atr_1d(tr, period), close)
+    out = np.empty(tr.shape)
+    for j in range(tr.shape[1]):
+        out[:, j] = _atr_1d(np.ascontiguousarray(tr[:, j]), period)
+    return _like(out, close)
+
+
+def supertrend(close, upper_band, lower_band):
+    """
+    Supertrend band ratchet (Pine Script semantics).
+
+    Starts at the first upper band; then, while close is above the previous value the
+    line follows max(lower band, previous), otherwise min(upper band, previous).
+    Inputs are aligned 1D arrays or 2D (bars x combinations) matrices.
+    """
+    arr = np.asarray(close, dtype=float)
+    close2d = np.ascontiguousarray(arr.reshape(len(arr), -1))
+    upper2d = np.ascontiguousarray(np.asarray(upper_band, dtype=float).reshape(close2d.shape))
+    lower2d = np.ascontiguousarray(np.asarray(lower_band, dtype=float).reshape(close2d.shape))
+    out = np.empty(close2d.shape)
+    if len(out):
+        _supertrend_kernel(close2d, upper2d, lower2d, out)
+    return _like(out.reshape(arr.shape), close)
@@ -0,0 +1,239 @@
+# metrics.py
+"""
+Low-overhead latency / throughput metrics for the live loop.
+
+* Histogram: log-linear buckets (8 per power of two from 1 µs, ~9% resolution),
+  recording is a frexp and a list increment
+* Metrics: named histograms (stage timers) and counters; `enabled` can be flipped
+  at any time and disabled recording returns immediately
+* InstrumentedExchange: proxy that times and counts every fetch_/create_/cancel_/
+  set_/watch_ call of an exchange client and counts its errors
+* serve(): local HTTP endpoint with the JSON snapshot and an on/off switch
+
+    METRICS.observe('signal', seconds)
+    with METRICS.timer('store'):
+        ...
+    exchange = METRICS.instrument(exchange)
+    await serve(METRICS, port=9108)   # curl localhost:9108/metrics | /enable | /disable | /reset
+"""
+import asyncio
+import inspect
+import json
+import math
+import threading
+import time
+
+SUB_BUCKETS = 8
+MAX_EXPONENT = 32            # 2**32 µs (~71 min) and above share the last bucket
+N_BUCKETS = MAX_EXPONENT * SUB_BUCKETS + 1
+
+EXCHANGE_PREFIXES = ('fetch_', 'create_', 'cancel_', 'edit_', 'set_', 'watch_')
+
+
+class Histogram:
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds):
+        us = seconds * 1e6
+        if us < 1.0:
+            i = 0
+        else:
+            mantissa, exponent = math.frexp(us)    # us = mantissa * 2**exponent, mantissa in [0.5, 1)
+            i = min((exponent - 1) * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS) + 1, N_BUCKETS - 1)
+        self.counts[i] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @staticmethod
+    def upper_bound(i):
+        """Upper edge of bucket i in seconds."""
+        if i == 0:
+            return 1e-6
+        exponent, sub = divmod(i - 1, SUB_BUCKETS)
+        return (0.5 + (sub + 1) / (2 * SUB_BUCKETS)) * 2.0 ** (exponent + 1) * 1e-6
+
+    def quantile(self, q):
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return min(self.upper_bound(i), self.max)
+        return self.max
+
+    def summary(self):
+        """count, mean, p50/p90/p99 (bucket upper edges) and max, in milliseconds."""
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean_ms': round(1e3 * self.total / self.count, 4),
+            'p50_ms': round(1e3 * self.quantile(0.50), 4),
+            'p90_ms': round(1e3 * self.quantile(0.90), 4),
+            'p99_ms': round(1e3 * self.quantile(0.99), 4),
+            'max_ms': round(1e3 * self.max, 4),
+        }
+
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 'started')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+
+
+class Metrics:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.histograms = {}
+        self.counters = {}
+        self.since = time.time()
+        self._lock = threading.Lock()   # exchange calls are recorded from worker threads
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.record(seconds)
+
+    def incr(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def timer(self, name):
+        """Context manager recording the time spent in its block under `name`."""
+        return _Timer(self, name)
+
+    def instrument(self, exchange):
+        return InstrumentedExchange(exchange, self)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+            self.since = time.time()
+
+    def snapshot(self):
+        """JSON-ready dict: stage latencies, counters, per-second rates and exchange error rates."""
+        with self._lock:
+            window = max(time.time() - self.since, 1e-9)
+            counters = dict(self.counters)
+            latency = {name: hist.summary() for name, hist in sorted(self.histograms.items())}
+        errors = {}
+        for name, hist in latency.items():
+            if name.startswith('exchange.'):
+                failed = counters.get(f"{name}.errors", 0)
+                errors[name[len('exchange.'):]] = round(failed / hist['count'], 4) if hist['count'] else 0.0
+        return {
+            'enabled': self.enabled,
+            'window_s': round(window, 1),
+            'latency': latency,
+            'counters': counters,
+            'rates_per_s': {name: round(n / window, 4) for name, n in counters.items()},
+            'exchange_error_rate': errors,
+        }
+
+
+METRICS = Metrics()
+
+
+# ----------------------------------------------------------------------
+# Exchange proxy
+# ----------------------------------------------------------------------
+class InstrumentedExchange:
+    """Every fetch_/create_/cancel_/edit_/set_/watch_ call is timed as exchange.<method>."""
+
+    def __init__(self, exchange, metrics=METRICS):
+        self._exchange = exchange
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        attr = getattr(self._exchange, name)
+        if not callable(attr) or not name.startswith(EXCHANGE_PREFIXES):
+            return attr
+        metrics = self._metrics
+        key = f"exchange.{name}"
+
+        if inspect.iscoroutinefunction(attr):
+            async def call(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await attr(*args, **kwargs)
+                except Exception:
+                    metrics.incr(f"{key}.errors")
+                    raise
+                finally:
+                    metrics.observe(key, time.perf_counter() - started)
+        else:
+            def call(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return attr(*args, **kwargs)
+                except Exception:
+                    metrics.incr(f"{key}.errors")
+                    raise
+                finally:
+                    metrics.observe(key, time.perf_counter() - started)
+        return call
+
+
+# ----------------------------------------------------------------------
+# Local endpoint
+# ----------------------------------------------------------------------
+async def serve(metrics=METRICS, host='127.0.0.1', port=9108):
+    """
+    Minimal HTTP endpoint (runs until cancelled):
+    GET /metrics -> snapshot, /enable, /disable, /reset -> snapshot after the change.
+    """
+    async def handle(reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass  # skip headers
+            parts = request.decode('latin-1').split()
+            path = parts[1].split('?')[0] if len(parts) > 1 else '/'
+            status = '200 OK'
+            if path == '/enable':
+                metrics.enabled = True
+            elif path == '/disable':
+                metrics.enabled = False
+            elif path == '/reset':
+                metrics.reset()
+            elif path not in ('/', '/metrics'):
+                status = '404 Not Found'
+            body = json.dumps(metrics.snapshot()).encode()
+            writer.write(f"HTTP/1.0 {status}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
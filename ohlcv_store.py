@@ -0,0 +1,190 @@
+# ohlcv_store.py
+"""
+Local on-disk OHLCV store with incremental sync.
+
+Layout (one directory per market, one raw little-endian column file per field):
+
+    <root>/<SYMBOL>/<timeframe>/ts.i8  open.f8  high.f8  low.f8  close.f8  volume.f8
+
+Only closed candles are stored, sorted by timestamp without duplicates. Columns are
+appended in place and read back through np.memmap, so loading years of 1m bars
+is zero-copy and takes milliseconds.
+
+    store = OHLCVStore('data')
+    store.sync(exchange, 'BTCUSDT', '1m', since=...)   # fetch only bars after the last stored one
+    store.repair(exchange, 'BTCUSDT', '1m')            # re-fetch holes found by find_gaps()
+    df = store.load('BTCUSDT', '1m', limit=200)
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ('ts', 'open', 'high', 'low', 'close', 'volume')
+DTYPES = {'ts': np.dtype('<i8'), 'open': np.dtype('<f8'), 'high': np.dtype('<f8'),
+          'low': np.dtype('<f8'), 'close': np.dtype('<f8'), 'volume': np.dtype('<f8')}
+
+_UNIT_MS = {'s': 1_000, 'm': 60_000, 'h': 3_600_000, 'd': 86_400_000,
+            'w': 604_800_000, 'M': 2_592_000_000, 'y': 31_536_000_000}
+
+
+def timeframe_to_ms(timeframe):
+    """'1m' -> 60000, '4h' -> 14400000 (same units as ccxt's parse_timeframe)."""
+    return int(timeframe[:-1]) * _UNIT_MS[timeframe[-1]]
+
+
+def _now_ms(exchange):
+    return exchange.milliseconds() if hasattr(exchange, 'milliseconds') else int(time.time() * 1000)
+
+
+def _to_columns(rows):
+    """[[ts, o, h, l, c, v], ...] -> column arrays sorted by ts, duplicates dropped (last wins)."""
+    rows = sorted({int(r[0]): r for r in rows}.values(), key=lambda r: r[0])
+    data = np.array([r[1:6] for r in rows], dtype=float).reshape(len(rows), len(COLUMNS) - 1)
+    columns = {'ts': np.array([int(r[0]) for r in rows], dtype=DTYPES['ts'])}
+    columns.update({col: data[:, i].astype(DTYPES[col]) for i, col in enumerate(COLUMNS[1:])})
+    return columns
+
+
+class OHLCVStore:
+    def __init__(self, root='data'):
+        self.root = root
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+    def path(self, symbol, timeframe):
+        return os.path.join(self.root, symbol.replace('/', '_').replace(':', '_'), timeframe)
+
+    def _file(self, symbol, timeframe, col):
+        return os.path.join(self.path(symbol, timeframe), f"{col}.{DTYPES[col].kind}{DTYPES[col].itemsize}")
+
+    def count(self, symbol, timeframe):
+        """Number of complete rows (a torn append is ignored until the next write)."""
+        sizes = []
+        for col in COLUMNS:
+            f = self._file(symbol, timeframe, col)
+            sizes.append(os.path.getsize(f) // DTYPES[col].itemsize if os.path.exists(f) else 0)
+        return min(sizes)
+
+    def arrays(self, symbol, timeframe):
+        """Read-only memory-mapped column arrays {'ts': int64, 'open': float64, ...}."""
+        n = self.count(symbol, timeframe)
+        if n == 0:
+            return {col: np.empty(0, dtype=DTYPES[col]) for col in COLUMNS}
+        return {col: np.memmap(self._file(symbol, timeframe, col), dtype=DTYPES[col], mode='r', shape=(n,))
+                for col in COLUMNS}
+
+    def load(self, symbol, timeframe, start=None, end=None, limit=None):
+        """
+        DataFrame (open, high, low, close, volume indexed by bar open time) backed by
+        the memory maps. `start`/`end` are ms timestamps (end exclusive); `limit`
+        keeps the last rows of the selection.
+        """
+        cols = self.arrays(symbol, timeframe)
+        ts = cols['ts']
+        lo = 0 if start is None else int(np.searchsorted(ts, start, 'left'))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, end, 'left'))
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        index = pd.DatetimeIndex(np.asarray(ts[lo:hi]).astype('datetime64[ms]'), name='ts')
+        return pd.DataFrame({col: cols[col][lo:hi] for col in COLUMNS[1:]}, index=index, copy=False)
+
+    def last_timestamp(self, symbol, timeframe):
+        n = self.count(symbol, timeframe)
+        if n == 0:
+            return None
+        with open(self._file(symbol, timeframe, 'ts'), 'rb') as f:
+            f.seek((n - 1) * 8)
+            return int(np.frombuffer(f.read(8), dtype=DTYPES['ts'])[0])
+
+    def append(self, symbol, timeframe, rows):
+        """Append [ts, open, high, low, close, volume] rows newer than the last stored bar."""
+        last = self.last_timestamp(symbol, timeframe)
+        columns = _to_columns([r for r in rows if last is None or r[0] > last])
+        if not len(columns['ts']):
+            return 0
+        os.makedirs(self.path(symbol, timeframe), exist_ok=True)
+        self._truncate(symbol, timeframe)
+        for col in COLUMNS:
+            with open(self._file(symbol, timeframe, col), 'ab') as f:
+                f.write(columns[col].tobytes())
+        return len(columns['ts'])
+
+    def write(self, symbol, timeframe, rows):
+        """Replace the stored series with `rows` (sorted and de-duplicated by timestamp)."""
+        return self._write_columns(symbol, timeframe, _to_columns(rows))
+
+    def _write_columns(self, symbol, timeframe, columns):
+        os.makedirs(self.path(symbol, timeframe), exist_ok=True)
+        for col in COLUMNS:
+            target = self._file(symbol, timeframe, col)
+            with open(target + '.tmp', 'wb') as f:
+                f.write(np.ascontiguousarray(columns[col], dtype=DTYPES[col]).tobytes())
+            os.replace(target + '.tmp', target)
+        return len(columns['ts'])
+
+    def _truncate(self, symbol, timeframe):
+        # Drop a partially written row left behind by an interrupted append
+        n = self.count(symbol, timeframe)
+        for col in COLUMNS:
+            f = self._file(symbol, timeframe, col)
+            if os.path.exists(f) and os.path.getsize(f) != n * DTYPES[col].itemsize:
+                os.truncate(f, n * DTYPES[col].itemsize)
+
+    # ------------------------------------------------------------------
+    # Exchange sync
+    # ------------------------------------------------------------------
+    def sync(self, exchange, symbol, timeframe, since=None, limit=1000):
+        """
+        Fetch and append every closed bar after the last stored one.
+
+        `since` (ms) is only used when nothing is stored yet; by default the last
+        `limit` bars are fetched. Returns the number of bars appended.
+        """
+        tf_ms = timeframe_to_ms(timeframe)
+        last = self.last_timestamp(symbol, timeframe)
+        if last is not None:
+            since = last + tf_ms
+        elif since is None:
+            since = _now_ms(exchange) - limit * tf_ms
+        rows = self._fetch_range(exchange, symbol, timeframe, since, None, limit)
+        return self.append(symbol, timeframe, rows)
+
+    def find_gaps(self, symbol, timeframe):
+        """Missing ranges as [(first_missing_ts, next_present_ts), ...]."""
+        ts = self.arrays(symbol, timeframe)['ts']
+        tf_ms = timeframe_to_ms(timeframe)
+        holes = np.flatnonzero(np.diff(ts) != tf_ms)
+        return [(int(ts[i]) + tf_ms, int(ts[i + 1])) for i in holes]
+
+    def repair(self, exchange, symbol, timeframe, limit=1000):
+        """Re-fetch the bars inside every gap and merge them in. Returns bars added."""
+        gaps = self.find_gaps(symbol, timeframe)
+        fetched = []
+        for start, end in gaps:
+            fetched.extend(self._fetch_range(exchange, symbol, timeframe, start, end, limit))
+        if not fetched:
+            return 0
+        cols = self.arrays(symbol, timeframe)
+        new = _to_columns(fetched)
+        _, order = np.unique(np.concatenate([cols['ts'], new['ts']]), return_index=True)
+        merged = {col: np.concatenate([cols[col], new[col]])[order] for col in COLUMNS}
+        before = len(cols['ts'])
+        del cols  # release the memory maps before the files are replaced (required on Windows)
+        return self._write_columns(symbol, timeframe, merged) - before
+
+    def _fetch_range(self, exchange, symbol, timeframe, since, end, limit):
+        """Closed bars with since <= ts < end (end=None: up to the last closed bar)."""
+        tf_ms = timeframe_to_ms(timeframe)
+        closed_before = _now_ms(exchange) - tf_ms  # bars opening after this are still forming
+        rows = []
+        while end is None or since < end:
+            batch = exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+            batch = [r for r in batch if r[0] >= since and r[0] <= closed_before and (end is None or r[0] < end)]
+            if not batch:
+                break
+            rows.extend(batch)
+            since = batch[-1][0] + tf_ms
+        return rows
@@ -0,0 +1,279 @@
+# optimize.py
+"""
+Parameter sweep and walk-forward optimization for strategy1's Orion signal.
+
+* OHLCV is copied once into a shared-memory block; worker processes attach to it
+  by name, so grid points are never pickled together with the data.
+* Every finished evaluation is appended to a JSON-lines results file as soon as it
+  arrives and folded into a ranked table; re-running with the same file skips the
+  evaluations that are already there (resume). Rows record the backtest settings
+  (fees, slippage, fill mode, leverage) and a fingerprint of their window's OHLCV,
+  and are only reused under the same settings on the same data (a window that
+  only gained bars after it, e.g. a store sync, keeps its rows).
+* Walk-forward submits the train sweeps of all folds at once so every core stays busy,
+  then scores each fold's best parameters on its out-of-sample window.
+
+Example:
+    python optimize.py btc_1m.csv --ema-short 5 7 9 --ema-long 15 21 --hma 21 29 --results sweep.jsonl
+    python optimize.py btc_1m.csv --walk-forward --train 100000 --test 20000 --results wf.jsonl
+    python optimize.py --symbol BTCUSDT --timeframe 1m --results sweep.jsonl   # from the local store
+"""
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import indicator_graph as ig
+from backtest import run_backtest
+from ohlcv_store import OHLCVStore
+from strategy1 import calculate_orion_signal
+
+COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+PARAM_NAMES = ('ema_short_period', 'ema_long_period', 'hma_period')
+
+
+# ----------------------------------------------------------------------
+# Shared OHLCV
+# ----------------------------------------------------------------------
+class SharedOHLCV:
+    """The OHLCV columns and int64 index of a DataFrame in one shared-memory block."""
+
+    def __init__(self, df):
+        n = len(df)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(8 * n * (len(COLUMNS) + 1), 1))
+        block = np.ndarray((len(COLUMNS) + 1, n), dtype=np.float64, buffer=self.shm.buf)
+        for row, col in enumerate(COLUMNS):
+            block[row] = df[col].to_numpy(dtype=float)
+        block[-1].view(np.int64)[:] = df.index.asi8 if isinstance(df.index, pd.DatetimeIndex) else np.arange(n)
+        self.spec = (self.shm.name, n, isinstance(df.index, pd.DatetimeIndex))
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def attach_ohlcv(spec):
+    """Read-only DataFrame view on a SharedOHLCV block (no copy of the data)."""
+    name, n, datetime_index = spec
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13 has no `track`; pool workers share the parent's resource tracker
+        shm = shared_memory.SharedMemory(name=name)
+    block = np.ndarray((len(COLUMNS) + 1, n), dtype=np.float64, buffer=shm.buf)
+    block.flags.writeable = False
+    ts = block[-1].view(np.int64)
+    index = pd.DatetimeIndex(ts.view('datetime64[ns]')) if datetime_index else pd.RangeIndex(n)
+    df = pd.DataFrame({col: block[row] for row, col in enumerate(COLUMNS)}, index=index, copy=False)
+    return shm, df
+
+
+_worker_shm = None
+_worker_df = None
+
+
+def _init_worker(spec):
+    global _worker_shm, _worker_df
+    _worker_shm, _worker_df = attach_ohlcv(spec)
+
+
+def _evaluate(params, window, backtest_params):
+    start, stop = window
+    df = _worker_df.iloc[start:stop].copy(deep=False)
+    signals = calculate_orion_signal(df, **dict(zip(PARAM_NAMES, params)))
+    stats = run_backtest(signals, **backtest_params).stats
+    return {'params': list(params), 'window': [start, stop], 'backtest': backtest_params, **stats}
+
+
+# ----------------------------------------------------------------------
+# Results file (streaming + resume)
+# ----------------------------------------------------------------------
+def _key(params, window):
+    return tuple(params), tuple(window)
+
+
+def _settings(backtest_params):
+    # As they read back from the results file (tuples become lists)
+    return json.loads(json.dumps(backtest_params or {}))
+
+
+def window_fingerprints(df, windows):
+    """{window: fingerprint of the index and OHLCV columns it covers} for every distinct window."""
+    return {tuple(w): ig.fingerprint(df.iloc[w[0]:w[1]], COLUMNS) for w in dict.fromkeys(map(tuple, windows))}
+
+
+def load_results(path, backtest_params=None, data=None):
+    """
+    Results in `path` evaluated with `backtest_params`; rows under other settings are skipped.
+
+    With `data` ({window: fingerprint}, window_fingerprints) only rows of those
+    windows evaluated on the same data are kept.
+    """
+    settings = _settings(backtest_params)
+    results = {}
+    skipped = stale = 0
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    row = json.loads(line)
+                    if row.get('backtest') != settings:
+                        skipped += 1
+                        continue
+                    if data is not None and row.get('data') != data.get(tuple(row['window'])):
+                        stale += tuple(row['window']) in data
+                        continue
+                    results[_key(row['params'], row['window'])] = row
+    if skipped:
+        print(f"Ignoring {skipped} results in {path} evaluated with other backtest settings")
+    if stale:
+        print(f"Ignoring {stale} results in {path} evaluated on other data")
+    return results
+
+
+def ranked(results, metric='net_pnl', window=None):
+    """Results as a DataFrame, best `metric` first (optionally only one window)."""
+    rows = [r for r in results if window is None or tuple(r['window']) == tuple(window)]
+    if not rows:
+        return pd.DataFrame()
+    table = pd.DataFrame(rows).drop(columns=['backtest', 'data'], errors='ignore')
+    table[list(PARAM_NAMES)] = pd.DataFrame(table.pop('params').tolist(), index=table.index)
+    return table.sort_values(metric, ascending=False, na_position='last').reset_index(drop=True)
+
+
+def param_grid(ema_short=(5, 7, 9), ema_long=(15, 21, 26), hma=(21, 29, 35)):
+    """All (ema_short, ema_long, hma) combinations with ema_short < ema_long."""
+    return [p for p in itertools.product(ema_short, ema_long, hma) if p[0] < p[1]]
+
+
+def run_tasks(df, tasks, results_path=None, workers=None, backtest_params=None, progress=True):
+    """
+    Evaluate (params, window) tasks across a process pool.
+
+    Results already present in `results_path` (same settings, same data in the
+    window) are reused; new ones are appended to it as they complete. Returns
+    {(params, window): result}.
+    """
+    backtest_params = _settings(backtest_params)
+    data = window_fingerprints(df, [w for _, w in tasks])
+    results = load_results(results_path, backtest_params, data)
+    pending = [(tuple(p), tuple(w)) for p, w in tasks if _key(p, w) not in results]
+    if progress and results:
+        print(f"Resuming: {len(tasks) - len(pending)}/{len(tasks)} evaluations already done")
+    if not pending:
+        return results
+
+    shared = SharedOHLCV(df)
+    out = open(results_path, 'a') if results_path else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared.spec,)) as pool:
+            futures = [pool.submit(_evaluate, p, w, backtest_params) for p, w in pending]
+            for done, future in enumerate(as_completed(futures), 1):
+                row = future.result()
+                row['data'] = data[tuple(row['window'])]
+                results[_key(row['params'], row['window'])] = row
+                if out:
+                    out.write(json.dumps(row) + '\n')
+                    out.flush()
+                if progress and (done % 50 == 0 or done == len(pending)):
+                    print(f"{done}/{len(pending)} evaluations | last {row['params']} net_pnl {row['net_pnl']:,.2f}")
+    finally:
+        if out:
+            out.close()
+        shared.close()
+    return results
+
+
+# ----------------------------------------------------------------------
+# Entry points
+# ----------------------------------------------------------------------
+def sweep(df, grid=None, metric='net_pnl', results_path=None, workers=None, backtest_params=None):
+    """Evaluate every grid point on the full history; returns the ranked table."""
+    grid = grid or param_grid()
+    window = (0, len(df))
+    results = run_tasks(df, [(p, window) for p in grid], results_path, workers, backtest_params)
+    return ranked(results.values(), metric, window)
+
+
+def walk_forward_windows(n, train, test, step=None):
+    """(train_window, test_window) pairs rolling forward by `step` bars (default: test)."""
+    step = step or test
+    return [((start, start + train), (start + train, min(start + train + test, n)))
+            for start in range(0, n - train, step)]
+
+
+def walk_forward(df, train, test, grid=None, metric='net_pnl', step=None,
+                 results_path=None, workers=None, backtest_params=None):
+    """
+    Walk-forward optimization: pick the best grid point on each train window and
+    score it on the following test window. Returns one row per fold.
+    """
+    grid = grid or param_grid()
+    folds = walk_forward_windows(len(df), train, test, step)
+
+    train_tasks = [(p, train_w) for train_w, _ in folds for p in grid]
+    results = run_tasks(df, train_tasks, results_path, workers, backtest_params)
+
+    best = {}
+    for train_w, test_w in folds:
+        table = ranked(results.values(), metric, train_w)
+        best[test_w] = tuple(int(v) for v in table.loc[0, list(PARAM_NAMES)])
+
+    results.update(run_tasks(df, [(p, w) for w, p in best.items()], results_path, workers, backtest_params))
+
+    rows = []
+    for train_w, test_w in folds:
+        row = results[_key(best[test_w], test_w)]
+        rows.append({
+            'train_start': df.index[train_w[0]], 'test_start': df.index[test_w[0]],
+            'test_end': df.index[test_w[1] - 1], **dict(zip(PARAM_NAMES, best[test_w])),
+            f'train_{metric}': results[_key(best[test_w], train_w)][metric], metric: row[metric],
+            'trades': row['trades'],
+        })
+    return pd.DataFrame(rows)
+
+
+def load_csv(path):
+    df = pd.read_csv(path)
+    ts = df.pop(df.columns[0])
+    df.index = pd.to_datetime(ts, unit='ms') if np.issubdtype(ts.dtype, np.number) else pd.to_datetime(ts)
+    return df[list(COLUMNS)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Orion parameter sweep / walk-forward')
+    parser.add_argument('csv', nargs='?', help='OHLCV csv: ts,open,high,low,close,volume')
+    parser.add_argument('--symbol', help='read from the local OHLCV store instead of a csv')
+    parser.add_argument('--timeframe', default='1m')
+    parser.add_argument('--store', default='data')
+    parser.add_argument('--ema-short', type=int, nargs='+', default=[5, 7, 9])
+    parser.add_argument('--ema-long', type=int, nargs='+', default=[15, 21, 26])
+    parser.add_argument('--hma', type=int, nargs='+', default=[21, 29, 35])
+    parser.add_argument('--metric', default='net_pnl')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--results', default=None, help='JSON-lines file to stream results into / resume from')
+    parser.add_argument('--walk-forward', action='store_true')
+    parser.add_argument('--train', type=int, default=100_000)
+    parser.add_argument('--test', type=int, default=20_000)
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.symbol:
+        data = OHLCVStore(args.store).load(args.symbol, args.timeframe)
+    elif args.csv:
+        data = load_csv(args.csv)
+    else:
+        parser.error('give a csv path or --symbol')
+    grid = param_grid(args.ema_short, args.ema_long, args.hma)
+
+    if args.walk_forward:
+        table = walk_forward(data, args.train, args.test, grid, args.metric,
+                             results_path=args.results, workers=args.workers)
+    else:
+        table = sweep(data, grid, args.metric, results_path=args.results, workers=args.workers)
+    print(table.head(args.top).to_string())
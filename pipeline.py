@@ -0,0 +1,177 @@
+# pipeline.py
+"""
+Out-of-core chunked signal pipeline.
+
+Runs a calculate_*_signal function over history that does not fit in memory:
+the input arrives as a stream of DataFrame chunks (from the local OHLCV store
+or a csv), every chunk is evaluated together with the bars before it as
+warm-up, and only the chunk's own rows are emitted and appended to disk. Peak
+memory is about chunk + max_warmup bars, whatever the length of the history.
+
+Exactness is checked, not proven: the strategies carry state further back than
+their nominal lookback (EMA / ATR recursions, the supertrend ratchet, strategy3's
+persistent trend and trend lengths). Each chunk therefore recomputes the last
+`verify` output rows of the previous chunk inside its warm-up; if they are not
+identical to what was already emitted, the warm-up is doubled and the chunk
+recomputed. Rows that agree there come from a state that has converged, which in
+practice gives the same output as a single full-history run (tests/test_pipeline.py
+compares the two), but a difference in state that does not show in those rows
+would go unnoticed. The earlier warm-up rows are not compared: they are the ones
+still converging. Raise `verify` for strategies whose state can stay hidden for
+long, e.g. strategy3 with a large `samples`.
+
+pandas' rolling sum / mean / std keep running sums whose last bits depend on
+where the series starts, so no warm-up reproduces them. strategy1 is therefore
+run with window_local=True (CHUNK_PARAMS): every window reduced on its own. The
+stitched output equals a full-history run with the same setting, and differs
+from the live signal (pandas windows) only in the last bits.
+
+    python pipeline.py --symbol BTCUSDT --timeframe 1m --strategy strategy3 --out s3.csv
+    python pipeline.py --csv btc_1m.csv --strategy strategy1 --out s1.csv --chunk 200000
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from ohlcv_store import OHLCVStore
+from strategy1 import calculate_orion_signal
+from strategy2 import calculate_ema_super_signal
+from strategy3 import calculate_trend_forecast_signal
+
+STRATEGIES = {
+    'strategy1': calculate_orion_signal,
+    'strategy2': calculate_ema_super_signal,
+    'strategy3': calculate_trend_forecast_signal,
+}
+
+# Starting warm-up per strategy (bars); doubled per chunk until the overlap matches
+WARMUP = {
+    calculate_orion_signal: 1_000,
+    calculate_ema_super_signal: 1_000,
+    calculate_trend_forecast_signal: 2_000,
+}
+
+# Parameters every chunk is evaluated with (start-independent rolling windows)
+CHUNK_PARAMS = {
+    calculate_orion_signal: {'window_local': True},
+}
+
+
+# ----------------------------------------------------------------------
+# Sources
+# ----------------------------------------------------------------------
+def store_chunks(store, symbol, timeframe, chunk_size=100_000, start=None, end=None):
+    """Consecutive chunks of the stored history; only one chunk is read at a time."""
+    ts = store.arrays(symbol, timeframe)['ts']
+    lo = 0 if start is None else int(np.searchsorted(ts, start, 'left'))
+    hi = len(ts) if end is None else int(np.searchsorted(ts, end, 'left'))
+    for i in range(lo, hi, chunk_size):
+        stop = min(i + chunk_size, hi)
+        yield store.load(symbol, timeframe, int(ts[i]), int(ts[stop - 1]) + 1)
+
+
+def csv_chunks(path, chunk_size=100_000):
+    """Chunks of an OHLCV csv (first column: ms timestamps or datetimes)."""
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        ts = chunk.pop(chunk.columns[0])
+        chunk.index = pd.to_datetime(ts, unit='ms') if np.issubdtype(ts.dtype, np.number) else pd.to_datetime(ts)
+        yield chunk[['open', 'high', 'low', 'close', 'volume']]
+
+
+# ----------------------------------------------------------------------
+# Pipeline
+# ----------------------------------------------------------------------
+def run_chunked(signal_func, chunks, signal_params=None, warmup=None, verify=500, max_warmup=200_000):
+    """
+    Yield signal_func's output over the concatenated `chunks`, one DataFrame per chunk.
+
+    A heuristic for a full-history run: each chunk's warm-up is grown until it
+    reproduces the last `verify` emitted rows exactly (see the module docstring).
+
+    Parameters
+    ----------
+    signal_func : callable
+        One of the calculate_*_signal functions
+    chunks : iterable of pd.DataFrame
+        Consecutive OHLCV chunks
+    signal_params : dict
+        Keyword arguments for signal_func (on top of CHUNK_PARAMS[signal_func])
+    warmup : int
+        Bars evaluated before each chunk to start with (default: WARMUP[signal_func])
+    verify : int
+        Output rows of the previous chunk that must be reproduced exactly; the
+        only rows compared, so the check is as strong as they are long (0: none)
+    max_warmup : int
+        Input bars kept from earlier chunks, the upper bound for the warm-up
+
+    Raises
+    ------
+    RuntimeError
+        If the overlap still differs with max_warmup bars of warm-up
+    """
+    params = {**CHUNK_PARAMS.get(signal_func, {}), **(signal_params or {})}
+    warmup = max(warmup or WARMUP.get(signal_func, 2_000), verify)
+    tail = None      # last max_warmup input bars
+    emitted = None   # last `verify` output rows already yielded
+
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        frame = chunk if tail is None else pd.concat([tail, chunk])
+        start = len(frame) - len(chunk)
+
+        warm = warmup
+        while True:
+            lo = max(start - warm, 0)
+            out = signal_func(frame.iloc[lo:].copy(), **params)
+            if emitted is None or out.iloc[start - lo - len(emitted):start - lo].equals(emitted):
+                break
+            if lo == 0:
+                raise RuntimeError(
+                    f"chunk at {chunk.index[0]} does not reproduce the previous output with "
+                    f"{start} bars of warm-up; raise max_warmup")
+            warm *= 2
+
+        result = out.iloc[start - lo:]
+        yield result
+
+        if verify:
+            emitted = (result if emitted is None else pd.concat([emitted, result])).iloc[-verify:].copy()
+        tail = frame.iloc[-max_warmup:].copy()
+
+
+def write_csv(outputs, path):
+    """Append every output chunk to `path` as it arrives (header once). Returns rows written."""
+    rows = 0
+    with open(path, 'w', newline='') as f:
+        for out in outputs:
+            out.to_csv(f, header=rows == 0)
+            rows += len(out)
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Chunked out-of-core signal run')
+    parser.add_argument('--strategy', default='strategy3', choices=sorted(STRATEGIES))
+    parser.add_argument('--csv', help='OHLCV csv: ts,open,high,low,close,volume')
+    parser.add_argument('--symbol', help='read from the local OHLCV store instead of a csv')
+    parser.add_argument('--timeframe', default='1m')
+    parser.add_argument('--store', default='data')
+    parser.add_argument('--out', required=True, help='output csv')
+    parser.add_argument('--chunk', type=int, default=100_000)
+    parser.add_argument('--warmup', type=int, default=None)
+    parser.add_argument('--verify', type=int, default=500)
+    parser.add_argument('--max-warmup', type=int, default=200_000)
+    args = parser.parse_args()
+
+    if args.symbol:
+        source = store_chunks(OHLCVStore(args.store), args.symbol, args.timeframe, args.chunk)
+    elif args.csv:
+        source = csv_chunks(args.csv, args.chunk)
+    else:
+        parser.error('give --csv or --symbol')
+
+    outputs = run_chunked(STRATEGIES[args.strategy], source, warmup=args.warmup,
+                          verify=args.verify, max_warmup=args.max_warmup)
+    print(f"{write_csv(outputs, args.out):,} rows written to {args.out}")
@@ -0,0 +1,261 @@
+# replay.py
+"""
+Faster-than-real-time replay of the live decision loop.
+
+Intrabar updates go through the live code path: Instrument.on_update (signal
+state, the acted_this_bar latch, acting on unclosed candles) and the Executor
+against a FakeExchange. The updates are either recorded finer candles from the
+local store or a synthesized path inside every bar. Nothing waits: a SimClock
+moves time forward, including the FakeExchange's order latency, so fills land
+at the price `latency` after the signal.
+
+Each replay runs twice, with intrabar evaluation and with closed bars only (one
+evaluation at the end of each bar). The report counts for both:
+
+* reversals  - orders placed
+* whipsaws   - reversals undone within `whipsaw_bars` bars
+* flickers   - bars where a signal appeared intrabar but is gone at the close
+* vanished   - reversals made on such a signal
+* pnl        - marked to the last price, without fees
+
+strategy3 (the streaming engine) replays a month of 10 s updates in seconds;
+strategy1/2 re-run their DataFrame function on every update, so give them
+coarser steps.
+
+    python replay.py --synthetic 720 --timeframe 1h --step 10s     # a month of 10 s updates
+    python replay.py --symbol BTCUSDT --timeframe 1h --intrabar 1m  # recorded 1m candles from the store
+"""
+import argparse
+import contextlib
+import functools
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from execution import Executor
+from fake_exchange import FakeExchange, synthetic_ohlcv
+from feed import BarUpdate
+from metrics import Metrics
+from ohlcv_store import OHLCVStore, timeframe_to_ms
+from runner import STRATEGIES, Instrument, _history_frame
+
+FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class SimClock:
+    """Simulated time in ms driving a FakeExchange; sleep() moves it forward instead of waiting."""
+
+    def __init__(self, exchange, now=0):
+        self.exchange = exchange
+        self.slept = 0.0
+        exchange.sleep = self.sleep
+        self.set(now)
+
+    def set(self, now):
+        self.now = self.exchange.now = int(now)
+
+    def sleep(self, seconds):
+        self.slept += seconds
+        self.set(self.now + round(seconds * 1000))
+
+
+@dataclass
+class ReplayResult:
+    events: pd.DataFrame    # one row per reversal
+    stats: dict
+
+
+# ----------------------------------------------------------------------
+# Intrabar updates
+# ----------------------------------------------------------------------
+def synthetic_intrabar(bars, timeframe, step='10s', seed=0):
+    """
+    Finer candles every `step` whose aggregate is exactly `bars`: a random path from
+    the open through the high and the low (random order and times) to the close.
+    """
+    n = timeframe_to_ms(timeframe) // timeframe_to_ms(step)
+    if n < 4:
+        raise ValueError(f"need at least 4 steps of {step} per {timeframe} bar, got {n}")
+    rng = np.random.default_rng(seed)
+    m = len(bars)
+    o, h, l, c = (bars[col].to_numpy(dtype=float)[:, None] for col in FIELDS[:4])
+
+    # Anchors: open at 0, close at n-1, high and low at distinct inner steps
+    k_h = rng.integers(1, n - 1, m)
+    k_l = rng.integers(1, n - 2, m)
+    k_l += k_l >= k_h
+    pos = np.column_stack([np.zeros(m), k_h, k_l, np.full(m, n - 1)]).astype(float)
+    val = np.column_stack([o[:, 0], h[:, 0], l[:, 0], c[:, 0]])
+    order = np.argsort(pos, axis=1)
+    pos = np.take_along_axis(pos, order, 1)
+    val = np.take_along_axis(val, order, 1)
+
+    def through_anchors(values):
+        # Piecewise-linear interpolation of `values` (m x 4) at steps 0..n-1
+        j = np.arange(n, dtype=float)[None, :]
+        seg = np.clip((j >= pos[:, 1:2]).astype(int) + (j >= pos[:, 2:3]), 0, 2)
+        x0, x1 = np.take_along_axis(pos, seg, 1), np.take_along_axis(pos, seg + 1, 1)
+        y0, y1 = np.take_along_axis(values, seg, 1), np.take_along_axis(values, seg + 1, 1)
+        w = np.divide(j - x0, x1 - x0, out=np.zeros_like(x0), where=x1 > x0)
+        return y0 + w * (y1 - y0)
+
+    # Random walk minus its own interpolation: zero at the anchors
+    walk = np.cumsum(rng.normal(size=(m, n)), axis=1)
+    bridge = walk - through_anchors(np.take_along_axis(walk, pos.astype(int), 1))
+    scale = (h - l) / (4 * np.sqrt(n))
+    path = np.clip(through_anchors(val) + bridge * scale, l, h)
+
+    ts = bars.index.as_unit('ms').asi8[:, None] + np.arange(n) * timeframe_to_ms(step)
+    volume = np.repeat(bars['volume'].to_numpy(dtype=float) / n, n)
+    flat = path.ravel()
+    index = pd.DatetimeIndex(ts.ravel().view('datetime64[ms]'), name='ts')
+    return pd.DataFrame({'open': flat, 'high': flat, 'low': flat, 'close': flat, 'volume': volume}, index=index)
+
+
+def intrabar_updates(fine, fine_timeframe, timeframe):
+    """
+    State of the forming `timeframe` candle after every finer candle, as column lists:
+    bar ts, open, high, low, close, volume, closed, arrival ms (the finer candle's last ms).
+    Only the last update of a complete bar is closed.
+    """
+    ts = fine.index.as_unit('ms').asi8
+    tf_ms, fine_ms = timeframe_to_ms(timeframe), timeframe_to_ms(fine_timeframe)
+    bar = ts // tf_ms * tf_ms
+    starts = np.r_[True, bar[1:] != bar[:-1]]
+    group = np.cumsum(starts) - 1
+    grouped = fine.groupby(group)
+    last = np.r_[starts[1:], True]
+    complete = ts + fine_ms == bar + tf_ms
+    return {
+        'ts': bar.tolist(),
+        'open': fine['open'].to_numpy()[np.flatnonzero(starts)][group].tolist(),
+        'high': grouped['high'].cummax().tolist(),
+        'low': grouped['low'].cummin().tolist(),
+        'close': fine['close'].tolist(),
+        'volume': grouped['volume'].cumsum().tolist(),
+        'closed': (last & complete).tolist(),
+        'at': (ts + fine_ms - 1).tolist(),
+    }
+
+
+# ----------------------------------------------------------------------
+# Replay
+# ----------------------------------------------------------------------
+def replay(instrument, bars, fine, fine_timeframe, closed_only=False, latency=0.0, whipsaw_bars=3, quiet=True):
+    """
+    Run `instrument` over `bars` (closed OHLCV of its timeframe; the first
+    instrument.lookback bars seed it) with the intrabar updates from `fine`.
+
+    closed_only evaluates only the final update of each bar, like a closed-bar bot.
+    """
+    history = bars.iloc[:instrument.lookback]
+    start = history.index[-1] + pd.Timedelta(milliseconds=timeframe_to_ms(instrument.timeframe))
+    fine = fine[fine.index >= start]
+    if not len(fine):
+        raise ValueError("no intrabar data after the seed bars")
+    u = intrabar_updates(fine, fine_timeframe, instrument.timeframe)
+    rows = zip(u['ts'], u['open'], u['high'], u['low'], u['close'], u['volume'], u['closed'], u['at'])
+    if closed_only:
+        rows = (row for row in rows if row[6])
+
+    fine_rows = [[t, *values] for t, values in zip(fine.index.as_unit('ms').asi8.tolist(),
+                                                     fine[FIELDS].to_numpy().tolist())]
+    exchange = FakeExchange({(instrument.symbol, fine_timeframe): fine_rows}, latency=latency)
+    clock = SimClock(exchange, u['at'][0])
+    executor = Executor(exchange, metrics=Metrics(enabled=False))
+    symbol, timeframe = instrument.symbol, instrument.timeframe
+
+    events = []
+    seen, closed_signals = set(), {}    # (bar, side) signalled at any update / sides signalled at the close
+    updates = 0
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(None) if quiet else contextlib.nullcontext():
+        executor.sync([symbol])
+        instrument.start(history, [u[col][0] for col in ('ts', 'open', 'high', 'low', 'close', 'volume')])
+        for ts, o, h, l, c, v, closed, at in rows:
+            if at > clock.now:
+                clock.set(at)
+            decision = instrument.on_update(BarUpdate(symbol, timeframe, ts, o, h, l, c, v, closed))
+            updates += 1
+            row = instrument.signal_row
+            if row['plFound'] or row['phFound']:
+                seen.add((ts, 'long' if row['plFound'] else 'short'))
+            if closed:
+                closed_signals[ts] = {side for side, flag in (('long', row['plFound']), ('short', row['phFound']))
+                                      if flag}
+            if decision:
+                current, new_side = decision
+                signalled = clock.now
+                executions = executor.reverse(current, new_side, symbol, instrument.quantity)
+                events.append({'time': signalled, 'bar': ts, 'side': instrument.position,
+                               'price': executions[-1].average if executions else np.nan,
+                               'filled_at': clock.now})
+    wall = time.perf_counter() - started
+
+    tf_ms = timeframe_to_ms(timeframe)
+    events = pd.DataFrame(events, columns=['time', 'bar', 'side', 'price', 'filled_at'])
+    bar_no = events['bar'].to_numpy() // tf_ms
+    whipsaws = int(np.sum(np.diff(bar_no) < whipsaw_bars)) if len(events) > 1 else 0
+    flickers = sum(1 for ts, side in seen if ts in closed_signals and side not in closed_signals[ts])
+    vanished = sum(1 for ts, side in zip(events['bar'], events['side'])
+                   if ts in closed_signals and side not in closed_signals[ts])
+
+    cash = sum((-1 if o['side'] == 'buy' else 1) * o['filled'] * o['average'] for o in exchange.orders)
+    pnl = cash + exchange.positions.get(symbol, 0.0) * fine_rows[-1][4]
+    span = (u['at'][-1] - u['at'][0]) / 1000
+    for col in ('time', 'bar', 'filled_at'):
+        events[col] = pd.to_datetime(events[col], unit='ms')
+    return ReplayResult(events, {
+        'mode': 'closed' if closed_only else 'intrabar',
+        'updates': updates,
+        'bars': len(closed_signals),
+        'reversals': len(events),
+        'whipsaws': whipsaws,
+        'flickers': flickers,
+        'vanished': vanished,
+        'pnl': pnl,
+        'simulated_days': span / 86_400,
+        'wall_s': wall,
+        'speedup': span / wall if wall else np.inf,
+    })
+
+
+def compare(make_instrument, bars, fine, fine_timeframe, **kwargs):
+    """Replay fresh instruments with intrabar and with closed-bar evaluation; one report row each."""
+    results = [replay(make_instrument(), bars, fine, fine_timeframe, closed_only=closed_only, **kwargs)
+               for closed_only in (False, True)]
+    return pd.DataFrame([r.stats for r in results]).set_index('mode'), results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay intrabar updates through the live decision loop')
+    parser.add_argument('--symbol', default='BTCUSDT')
+    parser.add_argument('--timeframe', default='1h')
+    parser.add_argument('--strategy', default='strategy3', choices=sorted(STRATEGIES))
+    parser.add_argument('--lookback', type=int, default=200)
+    parser.add_argument('--quantity', type=float, default=0.007)
+    parser.add_argument('--intrabar', help='finer timeframe to read from the local store (e.g. 1m)')
+    parser.add_argument('--store', default='data')
+    parser.add_argument('--synthetic', type=int, metavar='BARS', help='replay BARS synthetic bars instead')
+    parser.add_argument('--step', default='10s', help='update spacing of the synthetic path')
+    parser.add_argument('--latency', type=float, default=0.0, help='simulated order latency in seconds')
+    parser.add_argument('--whipsaw-bars', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        rows = synthetic_ohlcv(args.lookback + args.synthetic, args.timeframe)
+        bars = _history_frame(rows)
+        fine, fine_timeframe = synthetic_intrabar(bars.iloc[args.lookback:], args.timeframe, args.step), args.step
+    elif args.intrabar:
+        store = OHLCVStore(args.store)
+        bars = store.load(args.symbol, args.timeframe)
+        fine, fine_timeframe = store.load(args.symbol, args.intrabar), args.intrabar
+    else:
+        parser.error('give --synthetic or --intrabar')
+
+    make = functools.partial(Instrument, args.symbol, args.timeframe, args.strategy, args.quantity,
+                             lookback=args.lookback)
+    report, _ = compare(make, bars, fine, fine_timeframe, latency=args.latency, whipsaw_bars=args.whipsaw_bars)
+    print(report.to_string(float_format=lambda x: f"{x:,.2f}"))
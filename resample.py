@@ -0,0 +1,152 @@
+# resample.py
+"""
+Incremental multi-timeframe resampling of one base candle stream.
+
+A Resampler turns the BarUpdates of one symbol's base timeframe (e.g. 1m from a
+feed source, or ReplaySource over the local store) into BarUpdates of every
+configured higher timeframe, forming bars included:
+
+* each timeframe keeps the aggregate of its current bar's closed base bars (open,
+  high, low, last close, summed volume); the forming base bar is joined on top
+  when emitting, so an update costs O(1) per timeframe however many base bars a
+  bar spans
+* a bar is emitted as closed as soon as its last base bar closes (or, when that
+  base bar never arrives, once a base bar of the next bar does); a base bar
+  replaced by a newer one without a closed update counts with its last values
+* bars are aligned to multiples of the timeframe since the epoch (UTC), like the
+  exchange's minute, hour and day candles; weeks and months are not supported
+
+With Runner(base_timeframe='1m') the feed carries one base market per symbol
+instead of one market per timeframe, and every instrument gets its timeframe's
+bars from the symbol's Resampler. A symbol's timeframes beyond the one that
+trades run as signal-only instruments. With --feed poll or stream that is one
+candle poller / subscription per symbol instead of one per timeframe; the batch
+ticker feed only fetches candles at bar boundaries, so there the base should be
+the symbol's shortest instrument timeframe (a finer one adds a request per base bar).
+
+    resampler = Resampler('BTCUSDT', '1m', ['15m', '1h', '4h'])
+    resampler.seed(rows)                   # base rows from resampler.since(now) on
+    for bar in resampler.update(update):   # 1m BarUpdate in, 15m / 1h / 4h BarUpdates out
+        ...
+"""
+import pandas as pd
+
+from feed import BarUpdate
+from ohlcv_store import timeframe_to_ms
+
+
+class Resampler:
+    def __init__(self, symbol, base, timeframes):
+        self.symbol = symbol
+        self.base = base
+        self.base_ms = timeframe_to_ms(base)
+        self.timeframes = list(dict.fromkeys(timeframes))
+        self._ms = {}
+        for timeframe in self.timeframes:
+            tf_ms = timeframe_to_ms(timeframe)
+            if timeframe[-1] in 'wMy' or tf_ms % self.base_ms:
+                raise ValueError(f"cannot build {timeframe} bars from {base} bars")
+            self._ms[timeframe] = tf_ms
+        self._bars = dict.fromkeys(self.timeframes)   # timeframe -> [ts, o, h, l, c, v] of its closed base bars
+        self._forming = None    # latest base BarUpdate not closed yet
+        self._last = None       # ts of the newest closed base bar
+
+    def since(self, now):
+        """Open time (ms) of the oldest bar forming at `now`: seed() needs the base bars from there."""
+        return min(now - now % tf_ms for tf_ms in self._ms.values())
+
+    def seed(self, rows):
+        """Apply base rows [ts, open, high, low, close, volume], all closed except the last."""
+        for i, row in enumerate(rows):
+            self.update(BarUpdate.from_row(self.symbol, self.base, row, closed=i < len(rows) - 1))
+
+    def forming(self, timeframe):
+        """Row [ts, open, high, low, close, volume] of the current `timeframe` bar (None before any data)."""
+        update = self._current(timeframe)
+        return None if update is None else list(update[2:8])
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    def update(self, update):
+        """Apply one base BarUpdate; returns the BarUpdates of every timeframe (closed bars first)."""
+        forming = self._forming
+        if (update.timeframe != self.base or (self._last is not None and update.ts <= self._last)
+                or (forming is not None and update.ts < forming.ts and not update.closed)):
+            return []   # another market, or older than what was already applied
+
+        out = []
+        if forming is not None and update.ts > forming.ts:
+            self._forming = None
+            self._commit(forming, out)      # superseded without a closed update
+        if update.closed:
+            if self._forming is not None and self._forming.ts == update.ts:
+                self._forming = None
+            self._commit(update, out)
+        else:
+            self._forming = update
+
+        for timeframe in self.timeframes:
+            current = self._current(timeframe, out)
+            if current is not None:
+                out.append(current)
+        return out
+
+    def _start(self, timeframe, ts):
+        return ts - ts % self._ms[timeframe]
+
+    def _close(self, timeframe, out):
+        bar = self._bars[timeframe]
+        self._bars[timeframe] = None
+        out.append(BarUpdate(self.symbol, timeframe, *bar, True))
+
+    def _commit(self, update, out):
+        # A final base bar joins its bar of every timeframe; the last one closes it
+        self._last = update.ts
+        for timeframe in self.timeframes:
+            start = self._start(timeframe, update.ts)
+            bar = self._bars[timeframe]
+            if bar is not None and bar[0] != start:
+                self._close(timeframe, out)
+                bar = None
+            if bar is None:
+                self._bars[timeframe] = [start, update.open, update.high, update.low, update.close, update.volume]
+            else:
+                bar[2] = max(bar[2], update.high)
+                bar[3] = min(bar[3], update.low)
+                bar[4] = update.close
+                bar[5] += update.volume
+            if update.ts + self.base_ms == start + self._ms[timeframe]:
+                self._close(timeframe, out)
+
+    def _current(self, timeframe, out=None):
+        # Forming bar: closed base bars so far plus the forming base bar
+        bar = self._bars[timeframe]
+        base = self._forming
+        if base is None:
+            return None if bar is None else BarUpdate(self.symbol, timeframe, *bar, False)
+        start = self._start(timeframe, base.ts)
+        if bar is not None and bar[0] != start:
+            if out is None:
+                bar = None
+            else:
+                self._close(timeframe, out)   # its last base bars never arrived
+                bar = None
+        if bar is None:
+            return BarUpdate(self.symbol, timeframe, start, base.open, base.high, base.low, base.close,
+                             base.volume, False)
+        return BarUpdate(self.symbol, timeframe, start, bar[1], max(bar[2], base.high), min(bar[3], base.low),
+                         base.close, bar[5] + base.volume, False)
+
+
+def resample_frame(df, timeframe):
+    """
+    Batch counterpart for closed base bars (e.g. store.load(symbol, '1m')): OHLCV
+    DataFrame of `timeframe` bars, the last one incomplete when the data ends inside it.
+    """
+    tf_ms = timeframe_to_ms(timeframe)
+    ts = df.index.as_unit('ms').asi8
+    grouped = df.groupby(ts - ts % tf_ms)
+    out = grouped.agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'})
+    out.index = pd.DatetimeIndex(out.index.to_numpy().astype('datetime64[ms]'), name='ts')
+    return out
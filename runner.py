@@ -0,0 +1,673 @@
+# runner.py
+"""
+Multi-symbol, multi-timeframe live runner in one process.
+
+Instruments come from a JSON config, one entry per symbol and timeframe:
+
+    {"instruments": [
+        {"symbol": "BTCUSDT", "timeframe": "1h",  "strategy": "strategy3", "quantity": 0.007},
+        {"symbol": "ETHUSDT", "timeframe": "15m", "strategy": "strategy1", "quantity": 0.1,
+         "params": {"hma_period": 29}},
+        {"symbol": "ETHUSDT", "timeframe": "4h",  "strategy": "strategy3", "trade": false}
+    ]}
+
+* one exchange client (one HTTP session, rate limiter and market load) for everything
+* market data: --feed batch polls all symbols with a single fetch_tickers call and only
+  fetches candles at bar boundaries; --feed stream multiplexes every watch_ohlcv
+  subscription over one ccxt.pro client
+* each instrument keeps its own signal state, position and once-per-bar latch
+* the account is one-way, so one instrument per symbol trades; more timeframes of
+  a symbol run next to it with "trade": false (signals only, a paper position)
+* closed bars from the feed are appended to the local store without extra requests
+* with --base-timeframe (e.g. 1m) the feed carries one base market per symbol and
+  every instrument's bars, forming ones included, are resampled from it (resample.py):
+  one candle poller or subscription per symbol instead of one per timeframe
+* with --snapshot the signal state, latch and position of every instrument are saved on
+  each heartbeat, reversal and shutdown; a restart resumes from them after fetching only
+  the bars closed since (snapshot.py), so strategy3's trend-duration samples survive
+* reversals go through execution.Executor: one order of held + quantity (or concurrent
+  legs with --execution concurrent), fill prices from the order responses
+* balance and positions come from exchange_state (TTL cache, shared requests, order acks);
+  every heartbeat re-syncs instrument positions with the exchange
+* cost per instrument is tracked: signal time per update, and with --measure the
+  memory retained by its seeded signal state (tracemalloc)
+* hot-path metrics (metrics.py): stage timers (update, signal, store, order), signal to
+  order latency and every exchange call's latency / error count; logged as one JSON line
+  per heartbeat and served on localhost with --metrics-port (GET /metrics, /enable, /disable)
+
+    python runner.py --config instruments.json --mode demo --metrics-port 9108
+    python runner.py --config instruments.json --fake 2000 --measure   # end to end on FakeExchange
+    python runner.py --config instruments.json --feed stream --base-timeframe 1m
+    python runner.py --config instruments.json --snapshot data/runner_snapshot.json
+"""
+import argparse
+import asyncio
+import functools
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+import snapshot
+from fake_exchange import FakeExchange, synthetic_ohlcv
+from bar_buffer import BarBuffer
+from exchange_state import ExchangeState
+from execution import MODES, Executor
+from feed import BarUpdate, Feed, PollingSource, StreamSource, TickerSource
+from metrics import METRICS, serve
+from ohlcv_store import COLUMNS, OHLCVStore, timeframe_to_ms
+from resample import Resampler, resample_frame
+from strategy1 import calculate_orion_signal
+from strategy2 import calculate_ema_super_signal
+from strategy3 import TrendForecastEngine
+
+FIELDS = list(COLUMNS[1:])   # open, high, low, close, volume
+
+# Same defaults as live_bot.py (not imported: live_bot is the bot script and pulls in ccxt)
+QUANTITY = 0.007
+LOOKBACK = 200
+DATA_DIR = 'data'
+POLL_INTERVAL = 10
+HEARTBEAT_INTERVAL = 300
+
+# Malaysia timezone (UTC+8 Kuala Lumpur)
+MYT = timezone(timedelta(hours=8))
+
+
+def heartbeat(balance, metrics=None):
+    # One structured line per interval: balance plus the latency / call metrics
+    line = {'event': 'heartbeat', 'time': datetime.now(MYT).isoformat(timespec='seconds'),
+            'balance': None if balance is None else round(balance, 2)}
+    if metrics is not None:
+        line.update(metrics.snapshot())
+    print(json.dumps(line))
+
+
+# ----------------------------------------------------------------------
+# Signals
+# ----------------------------------------------------------------------
+class EngineSignal:
+    """strategy3 through the streaming TrendForecastEngine (O(1) per update)."""
+
+    def __init__(self, lookback=LOOKBACK, **params):
+        self.engine = TrendForecastEngine(**params)
+
+    def seed(self, history):
+        self.engine.seed(history['close'])
+
+    def push(self, bar):
+        self.engine.push(bar.close)
+
+    def evaluate(self, bar):
+        return self.engine.update(bar.close)
+
+    def get_state(self):
+        return {'engine': self.engine.get_state()}
+
+    def set_state(self, state):
+        self.engine = TrendForecastEngine.from_state(state['engine'])
+
+
+class FrameSignal:
+    """A calculate_*_signal function re-run on the last `lookback` closed bars plus the forming one."""
+
+    def __init__(self, func, lookback=LOOKBACK, **params):
+        self.func = func
+        self.params = params
+        self.bars = BarBuffer(lookback + 1)
+        self._last = None   # (forming bar, signal row) of the last evaluate since a commit
+
+    def seed(self, history):
+        self.bars.clear()
+        self.bars.extend_frame(history.iloc[-(self.bars.capacity - 1):])
+        self._last = None
+
+    def push(self, bar):
+        self.bars.update(*bar[2:8])
+        self._last = None
+
+    def evaluate(self, bar):
+        # The frame differs on almost every call, so the shared indicator cache is
+        # bypassed; an unchanged forming bar (e.g. the same last price) reuses its row
+        values = tuple(bar[2:8])
+        if self._last is not None and self._last[0] == values:
+            return self._last[1]
+        self.bars.update(*values)
+        row = self.func(self.bars.frame(), cache=None, **self.params).iloc[-1]
+        self._last = (values, row)
+        return row
+
+    def get_state(self):
+        return {'bars': [[ts, *values] for ts, values in zip(self.bars.ts.tolist(), self.bars.values.T.tolist())]}
+
+    def set_state(self, state):
+        self.bars.clear()
+        self.bars.extend(state['bars'])
+        self._last = None
+
+
+def _history_frame(rows):
+    index = pd.DatetimeIndex(np.array([r[0] for r in rows], dtype='datetime64[ms]'), name='ts')
+    return pd.DataFrame([r[1:6] for r in rows], columns=FIELDS, index=index, dtype=float)
+
+
+STRATEGIES = {
+    'strategy1': functools.partial(FrameSignal, calculate_orion_signal),
+    'strategy2': functools.partial(FrameSignal, calculate_ema_super_signal),
+    'strategy3': EngineSignal,
+}
+
+
+# ----------------------------------------------------------------------
+# Instrument
+# ----------------------------------------------------------------------
+class Instrument:
+    """
+    One symbol/timeframe/strategy/quantity with its own signal state and position.
+    With trade=False it only follows its signals: the position is a paper one and
+    no order is sent.
+    """
+
+    def __init__(self, symbol, timeframe, strategy='strategy3', quantity=QUANTITY, params=None, lookback=LOOKBACK,
+                 trade=True):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown strategy {strategy!r}, expected one of {sorted(STRATEGIES)}")
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.strategy = strategy
+        self.quantity = quantity
+        self.lookback = lookback
+        self.params = dict(params or {})
+        self.trade = trade
+        self.signal = STRATEGIES[strategy](lookback=lookback, **self.params)
+
+        self.position = None
+        self.bar = None               # latest BarUpdate of the forming candle
+        self.committed = None         # last bar pushed into the signal, [ts, open, high, low, close, volume]
+        self.acted_this_bar = False
+        self.updates = 0
+        self.signal_seconds = 0.0
+        self.signal_row = None        # latest evaluated signal row (plFound / phFound / ...)
+        self.memory = None            # bytes retained by start() (Runner(measure=True))
+
+    @property
+    def market(self):
+        return self.symbol, self.timeframe
+
+    @property
+    def label(self):
+        return f"{self.symbol} {self.timeframe}"
+
+    def start(self, history, live_row, position=None):
+        """Seed with closed history, the forming candle row and the current exchange position."""
+        self.signal.seed(history)
+        if len(history):
+            self.committed = [int(history.index.as_unit('ms').asi8[-1]), *history[FIELDS].iloc[-1].tolist()]
+        self.bar = BarUpdate.from_row(self.symbol, self.timeframe, live_row)
+        self.position = position
+
+    def get_state(self):
+        """Everything a warm restart needs (snapshot.py), JSON-serializable."""
+        return {
+            'strategy': self.strategy,
+            'params': self.params,
+            'lookback': self.lookback,
+            'committed': self.committed,
+            'bar': list(self.bar[2:8]),
+            'acted_this_bar': self.acted_this_bar,
+            'position': self.position,
+            'signal': self.signal.get_state(),
+        }
+
+    def accepts(self, state, first_row=None):
+        """Whether `state` is from this configuration (and its last committed bar equals `first_row`)."""
+        if (state.get('strategy'), state.get('params'), state.get('lookback')) != (
+                self.strategy, self.params, self.lookback) or state.get('committed') is None:
+            return False
+        return first_row is None or list(first_row[:5]) == state['committed'][:5]
+
+    def resume(self, state, rows, live_row, position=None):
+        """
+        Continue from a snapshot state accepted with rows[0]: the later closed `rows`
+        are committed on top, `live_row` is the forming candle.
+        """
+        self.signal.set_state(state['signal'])
+        for row in rows[1:]:
+            self.signal.push(BarUpdate.from_row(self.symbol, self.timeframe, row, closed=True))
+        self.committed = list(rows[-1][:6])
+        self.bar = BarUpdate.from_row(self.symbol, self.timeframe, live_row)
+        # The latch only holds within the bar it was set in; the exchange has the last word on positions
+        self.acted_this_bar = state['acted_this_bar'] and self.bar.ts == state['bar'][0]
+        if position != state['position']:
+            print(f"{self.label} POSITION CHANGED SINCE SNAPSHOT | {state['position'] or 'FLAT'} → {position or 'FLAT'}")
+        self.position = position
+
+    def on_update(self, update):
+        """
+        Evaluate one BarUpdate of this market. Returns (current_position, new_side)
+        when the position should be reversed, None otherwise.
+        """
+        if update.ts < self.bar.ts:
+            return None
+
+        # New candle started?
+        if update.ts > self.bar.ts:
+            self.signal.push(self.bar)  # commit the finished bar
+            self.committed = list(self.bar[2:8])
+            self.acted_this_bar = False
+            myt_time = datetime.fromtimestamp(update.ts / 1000, MYT).strftime("%Y-%m-%d %H:%M")
+            print(f"{self.symbol} NEW {self.timeframe.upper()} CANDLE STARTED | {myt_time} MYT")
+
+        # Re-evaluate the ongoing bar on top of the committed history
+        self.bar = update
+        started = time.perf_counter()
+        cur = self.signal_row = self.signal.evaluate(update)
+        self.signal_seconds += time.perf_counter() - started
+        self.updates += 1
+
+        long_signal  = cur['plFound']
+        short_signal = cur['phFound']
+
+        # Instant signal detection
+        if (long_signal or short_signal) and not self.acted_this_bar:
+            new_position = 'long' if long_signal else 'short'
+            new_side = 'buy' if long_signal else 'sell'
+
+            if self.position != new_position:
+                if self.trade:
+                    print(f"{self.symbol} {new_position.upper()} SIGNAL → INSTANT REVERSE!")
+                else:
+                    print(f"{self.label} {new_position.upper()} SIGNAL (signal only)")
+                current, self.position = self.position, new_position
+                self.acted_this_bar = True
+                return current, new_side
+        return None
+
+
+def load_instruments(path):
+    with open(path) as f:
+        cfg = json.load(f)
+    return [Instrument(**entry) for entry in cfg['instruments']]
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+class Runner:
+    def __init__(self, exchange, instruments, store=None, heartbeat_interval=HEARTBEAT_INTERVAL, measure=False,
+                 metrics=METRICS, metrics_port=None, execution='single', base_timeframe=None, snapshot_path=None):
+        markets = [inst.market for inst in instruments]
+        if len(set(markets)) != len(markets):
+            raise ValueError(f"one instrument per symbol and timeframe, got {markets}")
+        traders = [inst.symbol for inst in instruments if inst.trade]
+        if len(set(traders)) != len(traders):
+            # The account is one-way: two trading instruments on a symbol would fight over one position
+            raise ValueError(f"one trading instrument per symbol (the others need trade=False), got {traders}")
+        symbols = self.symbols = list(dict.fromkeys(inst.symbol for inst in instruments))
+        self.metrics = metrics
+        self.metrics_port = metrics_port
+        self.exchange = metrics.instrument(exchange)   # every exchange call is timed and counted
+        self.state = ExchangeState(self.exchange, symbols, metrics=metrics)
+        self.executor = Executor(self.exchange, execution, metrics, state=self.state)
+        self.pending = set()    # symbols with a reversal in flight
+        self.instruments = list(instruments)
+        self.store = store
+        self.heartbeat_interval = heartbeat_interval
+        self.measure = measure
+        self.snapshot_path = snapshot_path
+        self.by_market = {inst.market: inst for inst in self.instruments}
+        self.background = set()
+        self.resamplers = {}    # symbol -> Resampler of its instruments' timeframes (base_timeframe set)
+        if base_timeframe:
+            for symbol in symbols:
+                timeframes = [inst.timeframe for inst in self.instruments if inst.symbol == symbol]
+                self.resamplers[symbol] = Resampler(symbol, base_timeframe, timeframes)
+
+    @property
+    def markets(self):
+        return list(self.by_market)
+
+    @property
+    def feed_markets(self):
+        """Markets the feed has to carry: the instruments' own, or one base market per symbol."""
+        if not self.resamplers:
+            return self.markets
+        return [(symbol, resampler.base) for symbol, resampler in self.resamplers.items()]
+
+    def spawn(self, func, *func_args):
+        # Blocking exchange / disk calls run in a thread so the next update is never held up
+        task = asyncio.create_task(asyncio.to_thread(func, *func_args))
+        self.background.add(task)
+        task.add_done_callback(self.background.discard)
+
+    async def drain(self):
+        """Wait for in-flight orders and store writes."""
+        while self.background:
+            await asyncio.gather(*self.background, return_exceptions=True)
+
+    def _history(self, inst):
+        # Closed history (from the local store when there is one) and the forming candle
+        if self.store is not None:
+            self.store.sync(self.exchange, inst.symbol, inst.timeframe, limit=inst.lookback)
+            history = self.store.load(inst.symbol, inst.timeframe, limit=inst.lookback)
+            live = self.exchange.fetch_ohlcv(inst.symbol, inst.timeframe, limit=1)[-1]
+        else:
+            rows = self.exchange.fetch_ohlcv(inst.symbol, inst.timeframe, limit=inst.lookback + 1)
+            history, live = _history_frame(rows[:-1]), rows[-1]
+        return history, live
+
+    def _seed(self, resampler):
+        # Base bars of every forming bar, so the first resampled updates are complete
+        since = resampler.since(self.exchange.milliseconds())
+        rows = []
+        while True:
+            batch = self.exchange.fetch_ohlcv(resampler.symbol, resampler.base, since=since, limit=1000)
+            batch = [r for r in batch if r[0] >= since]
+            rows.extend(batch)
+            if len(batch) < 1000:
+                break
+            since = batch[-1][0] + resampler.base_ms
+        resampler.seed(rows)
+
+    def _load(self, inst, state):
+        # (state, closed rows since its last committed bar, forming row) to resume, else (None, history, live)
+        if state is not None and inst.accepts(state):
+            rows = snapshot.fetch_since(self.exchange, inst.symbol, inst.timeframe, state['committed'][0])
+            if rows and inst.accepts(state, rows[0]):
+                return state, rows[:-1], rows[-1]
+            print(f"{inst.label} SNAPSHOT {'TOO OLD' if rows is None else 'DOES NOT MATCH THE EXCHANGE'}, "
+                  f"starting cold")
+        return (None, *self._history(inst))
+
+    async def start(self):
+        started = time.perf_counter()
+        states = snapshot.load(self.snapshot_path) if self.snapshot_path else {}
+        loaded, _ = await asyncio.gather(
+            asyncio.gather(*(asyncio.to_thread(self._load, inst, states.get(inst.label))
+                             for inst in self.instruments)),
+            asyncio.gather(*(asyncio.to_thread(self._seed, r) for r in self.resamplers.values())),
+        )
+        positions = await asyncio.to_thread(self.executor.sync, self.symbols)
+
+        if self.measure:
+            tracemalloc.start()
+        for inst, (state, history, live) in zip(self.instruments, loaded):
+            resampler = self.resamplers.get(inst.symbol)
+            if resampler is not None:
+                live = resampler.forming(inst.timeframe) or live   # the bar its updates will continue
+            before = tracemalloc.get_traced_memory()[0] if self.measure else 0
+            # A signal-only instrument keeps its paper position
+            position = positions[inst.symbol] if inst.trade else state and state['position']
+            if state is not None:
+                inst.resume(state, history, live, position)
+            else:
+                inst.start(history, live, position)
+            if self.measure:
+                inst.memory = tracemalloc.get_traced_memory()[0] - before
+        if self.measure:
+            tracemalloc.stop()
+
+        balance = await asyncio.to_thread(self.balance)
+        resumed = sum(state is not None for state, _, _ in loaded)
+        print(f"Starting balance: {'unknown' if balance is None else f'{balance:,.2f}'} USDT "
+              f"| {len(self.instruments)} instruments | {resumed} resumed from snapshot "
+              f"| ready in {time.perf_counter() - started:.2f}s")
+        for inst in self.instruments:
+            print(f"  {inst.label} | {inst.strategy} | {inst.quantity if inst.trade else 'signal only'} "
+                  f"| Position: {inst.position or 'FLAT'}")
+
+    def _record(self, update):
+        # Closed bar straight from the feed; fall back to a sync when the store is behind
+        with self.metrics.timer('store'):
+            self._store_bar(update)
+
+    def _store_bar(self, update):
+        try:
+            last = self.store.last_timestamp(update.symbol, update.timeframe)
+            if last is not None and update.ts == last + timeframe_to_ms(update.timeframe):
+                self.store.append(update.symbol, update.timeframe, [update[2:8]])
+            elif last is None or update.ts > last:
+                self.store.sync(self.exchange, update.symbol, update.timeframe)
+        except Exception as e:
+            print(f"STORE SYNC FAILED {update.symbol} {update.timeframe}: {e}")
+
+    async def on_update(self, update):
+        resampler = self.resamplers.get(update.symbol)
+        if resampler is not None and update.timeframe == resampler.base:
+            for bar in resampler.update(update):
+                await self._on_bar(bar)
+            return
+        await self._on_bar(update)
+
+    async def _on_bar(self, update):
+        inst = self.by_market.get((update.symbol, update.timeframe))
+        if inst is None:
+            return
+        metrics = self.metrics
+        started = time.perf_counter()
+        self.state.observe_price(update.symbol, update.close)
+        updates, signal_seconds = inst.updates, inst.signal_seconds
+        try:
+            decision = inst.on_update(update)
+        except Exception as e:
+            metrics.incr('errors.update')
+            print(f"ERROR {inst.label}: {e}")
+            return
+        if update.closed and self.store is not None:
+            self.spawn(self._record, update)
+        if decision and inst.trade:
+            current, new_side = decision
+            metrics.incr('signals')
+            self.pending.add(inst.symbol)
+            self.spawn(self._reverse, inst, current, new_side, started)
+            self.save_snapshot()
+        elif decision:
+            metrics.incr('signals.paper')
+            self.save_snapshot()
+        metrics.incr('updates')
+        if inst.updates != updates:
+            metrics.observe('signal', inst.signal_seconds - signal_seconds)
+        metrics.observe('update', time.perf_counter() - started)
+
+    def _reverse(self, inst, current, new_side, signalled):
+        # signal_to_order: update received -> orders placed (queueing for a worker thread included)
+        started = time.perf_counter()
+        try:
+            self.executor.reverse(current, new_side, inst.symbol, inst.quantity)
+        finally:
+            self.pending.discard(inst.symbol)
+        done = time.perf_counter()
+        self.metrics.observe('order', done - started)
+        self.metrics.observe('signal_to_order', done - signalled)
+
+    def report(self):
+        """Per-instrument cost: updates seen, mean/total signal time, retained memory."""
+        return pd.DataFrame([{
+            'instrument': inst.label,
+            'strategy': inst.strategy,
+            'updates': inst.updates,
+            'signal_us': 1e6 * inst.signal_seconds / inst.updates if inst.updates else np.nan,
+            'signal_total_s': inst.signal_seconds,
+            'memory_kb': inst.memory / 1024 if inst.memory is not None else np.nan,
+            'position': inst.position or 'FLAT',
+        } for inst in self.instruments])
+
+    def balance(self):
+        try:
+            return self.state.balance()
+        except Exception as e:
+            print(f"BALANCE FAILED: {e}")
+            return None
+
+    async def resync(self):
+        """Adopt the exchange's position where an instrument disagrees (no reversal in flight)."""
+        try:
+            sizes = await asyncio.to_thread(self.state.positions)
+        except Exception as e:
+            print(f"POSITION SYNC FAILED: {e}")
+            return
+        for inst in self.instruments:
+            size = sizes.get(inst.symbol)
+            if size is None or inst.symbol in self.pending or not inst.trade:
+                continue
+            actual = None if not size else ('long' if size > 0 else 'short')
+            if actual != inst.position:
+                print(f"{inst.symbol} POSITION RESYNC | bot {inst.position or 'FLAT'} → exchange {actual or 'FLAT'}")
+                inst.position = actual
+
+    def states(self):
+        return {inst.label: inst.get_state() for inst in self.instruments}
+
+    def save_snapshot(self, wait=False):
+        """Write the instruments' state to snapshot_path (taken now, written in a thread unless `wait`)."""
+        if not self.snapshot_path:
+            return
+        if wait:
+            snapshot.save(self.snapshot_path, self.states())
+        else:
+            self.spawn(snapshot.save, self.snapshot_path, self.states())
+
+    async def heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            heartbeat(await asyncio.to_thread(self.balance), self.metrics)
+            await self.resync()
+            self.save_snapshot()
+            if self.measure:
+                print(self.report().to_string(index=False))
+
+    async def run(self, sources):
+        feed = Feed()
+        for source in sources:
+            feed.add_source(source)
+        feed.subscribe(self.on_update)
+        tasks = [feed.run(), self.heartbeat_loop()]
+        if self.metrics_port:
+            tasks.append(serve(self.metrics, port=self.metrics_port))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            self.save_snapshot(wait=True)
+
+
+def make_sources(kind, exchange, markets, config=None, mode='demo', interval=POLL_INTERVAL, metrics=None):
+    """'batch': one ticker poller for all markets, 'poll': a candle poller per market, 'stream': ccxt.pro."""
+    if kind == 'stream':
+        import ccxt.pro
+        pro = ccxt.pro.bybit(config)
+        pro.enable_demo_trading(mode == 'demo')
+        if metrics is not None:
+            pro = metrics.instrument(pro)
+        return [StreamSource(pro, symbol, timeframe) for symbol, timeframe in markets]
+    if kind == 'poll':
+        return [PollingSource(exchange, symbol, timeframe, interval=interval) for symbol, timeframe in markets]
+    if kind == 'batch':
+        return [TickerSource(exchange, markets, interval=interval)]
+    raise ValueError(f"unknown feed {kind!r}")
+
+
+# ----------------------------------------------------------------------
+# Fake exchange run
+# ----------------------------------------------------------------------
+async def simulate(instruments, bars=2_000, polls_per_bar=4, measure=True, execution='single',
+                   base_timeframe=None):
+    """
+    Run the complete loop against a FakeExchange with synthetic candles for every market.
+
+    Each fetch_tickers poll advances the exchange clock by 1/polls_per_bar of the
+    shortest timeframe, until `bars` bars of that timeframe have passed. With
+    `base_timeframe` every symbol gets one synthetic base series, the instruments'
+    candles are aggregated from it and the feed polls the base market
+    (polls_per_bar then counts per base bar). Returns the Runner; orders and
+    positions are on runner.exchange.
+    """
+    end = 1_577_836_800_000 + 1_000 * 86_400_000
+    shortest = min(timeframe_to_ms(inst.timeframe) for inst in instruments)
+    ohlcv = {}
+    base_counts = {}    # symbol -> base bars its longest instrument needs
+    for n, inst in enumerate(instruments):
+        tf_ms = timeframe_to_ms(inst.timeframe)
+        count = inst.lookback + bars * shortest // tf_ms + 1
+        if base_timeframe:
+            base_ms = timeframe_to_ms(base_timeframe)
+            base_counts[inst.symbol] = max(base_counts.get(inst.symbol, 0), -(-count * tf_ms // base_ms))
+        else:
+            ohlcv[inst.market] = synthetic_ohlcv(count, inst.timeframe, start=end - count * tf_ms, seed=n)
+    for n, (symbol, count) in enumerate(base_counts.items()):
+        rows = ohlcv[symbol, base_timeframe] = synthetic_ohlcv(count, base_timeframe, start=end - count * base_ms,
+                                                                seed=n)
+        base = _history_frame(rows)
+        for inst in instruments:
+            if inst.symbol == symbol:
+                frame = resample_frame(base, inst.timeframe)
+                rows = zip(frame.index.as_unit('ms').asi8.tolist(), *(frame[col].tolist() for col in FIELDS))
+                ohlcv[inst.market] = [list(row) for row in rows]
+
+    exchange = FakeExchange(ohlcv, now=max(ohlcv[inst.market][inst.lookback][0] for inst in instruments))
+    step = (timeframe_to_ms(base_timeframe) if base_timeframe else shortest) // polls_per_bar
+
+    fetch_tickers = exchange.fetch_tickers
+
+    def advancing_fetch_tickers(symbols=None, params=None):
+        exchange.now += step
+        return fetch_tickers(symbols, params)
+
+    exchange.fetch_tickers = advancing_fetch_tickers
+
+    runner = Runner(exchange, instruments, heartbeat_interval=3_600, measure=measure, execution=execution,
+                    base_timeframe=base_timeframe)
+    await runner.start()
+    task = asyncio.create_task(runner.run([TickerSource(runner.exchange, runner.feed_markets, interval=0)]))
+    while exchange.now < end - step and not task.done():
+        await asyncio.sleep(0.01)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await runner.drain()
+    return runner
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Multi-instrument live runner')
+    parser.add_argument('--config', required=True, help='JSON file with an "instruments" list')
+    parser.add_argument('--mode', default='demo', choices=['demo','live'])
+    parser.add_argument('--feed', default='batch', choices=['batch','poll','stream'],
+                        help='batch: one ticker request per poll, poll: candles per market, stream: websocket (ccxt.pro)')
+    parser.add_argument('--execution', default='single', choices=MODES,
+                        help='single: one order of held + quantity per reversal, concurrent: close and open legs at once')
+    parser.add_argument('--measure', action='store_true', help='track memory per instrument, print costs on heartbeat')
+    parser.add_argument('--fake', type=int, metavar='BARS', help='run BARS bars against FakeExchange instead')
+    parser.add_argument('--metrics-port', type=int, help='serve metrics on this localhost port')
+    parser.add_argument('--no-metrics', action='store_true', help='start with metrics recording off')
+    parser.add_argument('--snapshot', metavar='PATH', help='save instrument state here and resume from it on start')
+    parser.add_argument('--base-timeframe', help='feed one market per symbol at this timeframe (e.g. 1m) '
+                                                 'and resample every instrument timeframe from it')
+    args = parser.parse_args()
+
+    instruments = load_instruments(args.config)
+    METRICS.enabled = not args.no_metrics
+
+    async def main():
+        if args.fake:
+            runner = await simulate(instruments, args.fake, measure=args.measure, execution=args.execution,
+                                    base_timeframe=args.base_timeframe)
+            print(runner.report().to_string(index=False))
+            print(f"Orders: {len(runner.exchange.orders)} | Requests: {runner.exchange.calls}")
+            print(json.dumps(runner.metrics.snapshot(), indent=2))
+            return
+        from live_bot import load_config, setup_exchange
+        config = load_config(args.mode)
+        exchange = setup_exchange(config, args.mode, [inst.symbol for inst in instruments])
+        runner = Runner(exchange, instruments, store=OHLCVStore(DATA_DIR), measure=args.measure,
+                        metrics_port=args.metrics_port, execution=args.execution,
+                        base_timeframe=args.base_timeframe, snapshot_path=args.snapshot)
+        await runner.start()
+        await runner.run(make_sources(args.feed, runner.exchange, runner.feed_markets, config, args.mode,
+                                      metrics=runner.metrics))
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nRunner stopped by user")
@@ -0,0 +1,77 @@
+# snapshot.py
+"""
+Warm-restart snapshots of the live runner.
+
+A snapshot is one small JSON file. For every instrument it holds:
+
+* the committed signal state: the streaming engine's windows, trend and
+  bullish/bearish duration samples, or a FrameSignal's bar buffer
+* the last committed bar and the forming bar
+* the once-per-bar latch and the position
+
+On startup each instrument is checked against the exchange:
+
+* its candles are fetched from the snapshot's last committed bar on
+* that bar has to come back unchanged
+* the bars closed since then are pushed through the restored signal
+* the position always comes from the exchange
+
+An instrument whose snapshot is missing, does not match its configuration,
+fails that check or is more than one candle request (PAGE bars) behind starts
+cold, from the full lookback.
+
+    save('data/snapshot.json', states)          # written to a .tmp file, then renamed
+    states = load('data/snapshot.json')         # {label: state}, {} when missing or unreadable
+    rows = fetch_since(exchange, 'BTCUSDT', '1h', states['BTCUSDT 1h']['committed'][0])
+"""
+import json
+import os
+import threading
+import time
+
+VERSION = 1
+PAGE = 1_000        # candles per request; a snapshot further behind starts cold
+
+_write_lock = threading.Lock()     # saves run in background threads and share the .tmp file
+
+
+def save(path, states):
+    """Write {label: Instrument.get_state()} atomically."""
+    data = {'version': VERSION, 'saved': int(time.time() * 1000), 'instruments': states}
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with _write_lock:
+        with open(path + '.tmp', 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+
+
+def load(path):
+    """{label: state} from `path`; {} when there is no usable snapshot."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"SNAPSHOT UNREADABLE {path}: {e}")
+        return {}
+    if data.get('version') != VERSION:
+        print(f"SNAPSHOT VERSION {data.get('version')} != {VERSION}, starting cold")
+        return {}
+    return data['instruments']
+
+
+def fetch_since(exchange, symbol, timeframe, since):
+    """
+    Candles from `since` (ms, inclusive) to the forming one, or None when they do
+    not fit in one request of PAGE bars (or `since` is not among them).
+    """
+    rows = [r for r in exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=PAGE) if r[0] >= since]
+    if not rows or rows[0][0] != since:
+        return None
+    tf_ms = exchange.parse_timeframe(timeframe) * 1000
+    if rows[-1][0] + tf_ms <= exchange.milliseconds():
+        return None     # the page ended before the forming bar
+    return rows
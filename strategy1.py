@@ -1,40 +1,43 @@
 # strategy1.py
 import pandas as pd
 import numpy as np
-import ta
+import indicator_graph as ig
+import indicators
+from indicators import ema, hma, rolling_mean, rolling_std
 
 
 # ----------------------------------------------------------------------
-# Helper Functions (unchanged)
+# Helper Functions (built on the indicators kernels)
 # ----------------------------------------------------------------------
-def ema(series, period):
-    return series.ewm(span=period, adjust=False).mean()
-
-
-def wpr(high, low, close, period):
-    highest_high = high.rolling(window=period).max()
-    lowest_low = low.rolling(window=period).min()
-    return -100 * (highest_high - close) / (highest_high - lowest_low)
-
-
-def rsi(series, period):
+# Rolling windows are pandas' by default. window_local=True reduces every window on
+# its own (indicators.rolling_*) instead, so a value does not depend on where the
+# series starts: what the chunked pipeline needs. pandas' running sums differ from
+# that in the last bits: output_signal by up to ~1e-6 over a million bars, with the
+# same entries on test data (tests/test_pipeline.py).
+def rsi(series, period, window_local=False):
     delta = series.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    gain = sma(delta.where(delta > 0, 0), period, window_local)
+    loss = sma(-delta.where(delta < 0, 0), period, window_local)
     rs = gain / loss
     return 100 - (100 / (1 + rs))
 
 
-def sma(series, period):
+def sma(series, period, window_local=False):
+    if window_local:
+        return rolling_mean(series, period)
     return series.rolling(window=period).mean()
 
 
-def stdev(series, period):
+def stdev(series, period, window_local=False):
+    if window_local:
+        return rolling_std(series, period)
     return series.rolling(window=period).std()
 
 
-def rma(series, period):
-    return series.ewm(alpha=1/period, adjust=False).mean()
+def rolling_sum(series, period, window_local=False):
+    if window_local:
+        return indicators.rolling_sum(series, period)
+    return series.rolling(period).sum()
 
 
 def fixnan(series):
@@ -45,134 +48,160 @@ def change(series):
     return series.diff()
 
 
-def tr(high, low, close):
-    return pd.Series(
-        np.maximum(high - low,
-                   np.abs(high - close.shift()),
-                   np.abs(low - close.shift())),
-        index=high.index,
-    )
-
+def directional_move(move, other):
+    """move where it beats `other` and is positive, else 0 (DMI +DM / -DM)."""
+    return move.where((move > other) & (move > 0), 0)
 
-def hma(series, period):
-    half_length = int(period / 2)
-    sqrt_length = int(np.sqrt(period))
-    wma_half = ta.trend.wma_indicator(series, window=half_length)
-    wma_full = ta.trend.wma_indicator(series, window=period)
-    return ta.trend.wma_indicator(2 * wma_half - wma_full, window=sqrt_length)
 
+def tr(high, low, close):
+    # Originally np.maximum(high - low, |high - prev close|, |low - prev close|): NumPy
+    # takes a third positional argument as the output array, so only the first two
+    # terms were ever compared. The signal is tuned on these values; kept as they are.
+    return np.maximum(high - low, np.abs(high - close.shift()))
 
-# ----------------------------------------------------------------------
-# MAIN SIGNAL FUNCTION – **tunable defaults**
-# ----------------------------------------------------------------------
-def calculate_orion_signal(
-    df,
-    ema_short_period: int = 7,   # <-- change this
-    ema_long_period: int = 15,  # <-- change this
-    hma_period: int = 29,       # <-- change this
-):
-    """
-    Orion composite signal.
 
-    Parameters
-    ----------
-    df : pd.DataFrame
-        Must contain columns: open, high, low, close, volume
-    ema_short_period : int
-        Short EMA length (default 7)
-    ema_long_period : int
-        Long EMA length (default 15)
-    hma_period : int
-        Hull Moving Average smoothing length (default 29)
-
-    Returns
-    -------
-    pd.DataFrame
-        Original df with three new columns:
-        * output_signal
-        * plFound  (long entry)
-        * phFound  (short entry)
-    """
-    close = df["close"]
-    high = df["high"]
-    low = df["low"]
-    volume = df["volume"]
-
-    # ------------------------------------------------------------------
-    # Component a – EMA-difference momentum
-    # ------------------------------------------------------------------
-    ema_short = ema(close, ema_short_period)
-    ema_long = ema(close, ema_long_period)
-    ema_diff = ema_short - ema_long
-    ema_ema_diff = ema(ema_diff, 8)
-    a = (ema_diff - ema_ema_diff) / 10
+def _orion_component_nodes(window_local=False):
+    """Graph nodes of components b-g of the Orion signal (none depend on the tunable periods)."""
+    close = ig.col("close")
+    high = ig.col("high")
+    low = ig.col("low")
+    volume = ig.col("volume")
 
     # ------------------------------------------------------------------
     # Component b – Williams %R
     # ------------------------------------------------------------------
-    b = wpr(high, low, close, 14)
+    b = ig.wpr(high, low, close, 14)
 
     # ------------------------------------------------------------------
     # Component c – Bollinger-like deviation
     # ------------------------------------------------------------------
-    ema21 = ema(close, 21)
-    stdev21 = stdev(close, 21)
+    ema21 = ig.ema(close, 21)
+    stdev21 = ig.node(stdev, close, 21, window_local=window_local)
     c = 100 * (close + 2 * stdev21 - ema21) / (4 * stdev21)
 
     # ------------------------------------------------------------------
     # Component d – RSI of price vs EMA21
     # ------------------------------------------------------------------
-    rsi_d = rsi(close - ema21, 14)
+    rsi_d = ig.node(rsi, close - ema21, 14, window_local=window_local)
     d = (rsi_d * 2) - 100
 
     # ------------------------------------------------------------------
     # Component e – Trend strength (True-Range based)
     # ------------------------------------------------------------------
-    tr_series = tr(high, low, close)
-    change_high = change(high)
-    change_low = change(low)
-
-    cond1 = (change_high > change_low) & (change_high > 0)
-    cond2 = (change_low > change_high) & (change_low > 0)
+    tr_series = ig.node(tr, high, low, close)
+    change_high = ig.node(change, high)
+    change_low = ig.node(change, low)
 
-    cond1_series = pd.Series(np.where(cond1, change_high, 0), index=high.index)
-    cond2_series = pd.Series(np.where(cond2, change_low, 0), index=high.index)
+    cond1_series = ig.node(directional_move, change_high, change_low)
+    cond2_series = ig.node(directional_move, change_low, change_high)
 
-    rma1 = rma(cond1_series, 1)
-    rma2 = rma(cond2_series, 1)
-    rma_tr = rma(tr_series, 1)
+    rma1 = ig.rma(cond1_series, 1)
+    rma2 = ig.rma(cond2_series, 1)
+    rma_tr = ig.rma(tr_series, 1)
 
-    e_series = fixnan(100 * rma1 / rma_tr) - fixnan(100 * rma2 / rma_tr)
-    rsi_e = rsi(e_series, 14)
+    e_series = ig.node(fixnan, 100 * rma1 / rma_tr) - ig.node(fixnan, 100 * rma2 / rma_tr)
+    rsi_e = ig.node(rsi, e_series, 14, window_local=window_local)
     e = (rsi_e * 2) - 100
 
     # ------------------------------------------------------------------
     # Component f – Volume-weighted price momentum
     # ------------------------------------------------------------------
-    sum_vol20 = volume.rolling(20).sum()
+    sum_vol20 = ig.node(rolling_sum, volume, 20, window_local=window_local)
     term1 = (sum_vol20 - volume) / sum_vol20
     term2 = (volume * close) / sum_vol20
     numerator = close - term1 + term2
     denominator = (close + term1 + term2) / 2
     f_series = (numerator / denominator) * 100
-    rsi_f = rsi(f_series, 14)
+    rsi_f = ig.node(rsi, f_series, 14, window_local=window_local)
     f = rsi_f - 100
 
     # ------------------------------------------------------------------
     # Component g – Normalized price position
     # ------------------------------------------------------------------
-    lowest_low14 = low.rolling(14).min()
-    highest_high14 = high.rolling(14).max()
+    lowest_low14 = ig.rolling_min(low, 14)
+    highest_high14 = ig.rolling_max(high, 14)
     g_series = (close - lowest_low14) / (highest_high14 - lowest_low14) - 0.5
-    sma_g = sma(g_series, 2)
-    rsi_g = rsi(sma_g, 14)
+    sma_g = ig.node(sma, g_series, 2, window_local=window_local)
+    rsi_g = ig.node(rsi, sma_g, 14, window_local=window_local)
     g = (rsi_g * 2) - 100
 
+    return b, c, d, e, f, g
+
+
+def _orion_components(df):
+    """Components b-g of the Orion signal evaluated on df (shared indicator cache)."""
+    values = ig.evaluate(df, dict(zip("bcdefg", _orion_component_nodes())))
+    return tuple(values[name] for name in "bcdefg")
+
+
+def orion_nodes(ema_short_period=7, ema_long_period=15, hma_period=29, window_local=False):
+    """Graph node of the Orion output_signal for one parameter set."""
+    close = ig.col("close")
+
+    # ------------------------------------------------------------------
+    # Component a – EMA-difference momentum
+    # ------------------------------------------------------------------
+    ema_short = ig.ema(close, ema_short_period)
+    ema_long = ig.ema(close, ema_long_period)
+    ema_diff = ema_short - ema_long
+    ema_ema_diff = ig.ema(ema_diff, 8)
+    a = (ema_diff - ema_ema_diff) / 10
+
+    # ------------------------------------------------------------------
+    # Components b-g – independent of the tunable periods
+    # ------------------------------------------------------------------
+    b, c, d, e, f, g = _orion_component_nodes(window_local)
+
     # ------------------------------------------------------------------
     # Combine & smooth with HMA
     # ------------------------------------------------------------------
     x = (a + b + c + d + e + f + g) / 7 * 2
-    output_signal = hma(x, hma_period)
+    return {"output_signal": ig.hma(x, hma_period, normalized=True)}
+
+
+# ----------------------------------------------------------------------
+# MAIN SIGNAL FUNCTION – **tunable defaults**
+# ----------------------------------------------------------------------
+def calculate_orion_signal(
+    df,
+    ema_short_period: int = 7,   # <-- change this
+    ema_long_period: int = 15,  # <-- change this
+    hma_period: int = 29,       # <-- change this
+    window_local: bool = False,
+    cache=ig.CACHE,
+):
+    """
+    Orion composite signal.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Must contain columns: open, high, low, close, volume
+    ema_short_period : int
+        Short EMA length (default 7)
+    ema_long_period : int
+        Long EMA length (default 15)
+    hma_period : int
+        Hull Moving Average smoothing length (default 29)
+    window_local : bool
+        Reduce every rolling window on its own instead of pandas' running sums,
+        so the output does not depend on where df starts (chunked evaluation);
+        differs from the default in the last bits
+    cache : indicator_graph.IndicatorCache or None
+        Where indicator values are reused across calls on the same data; None
+        for frames that change on every call (the live loop)
+
+    Returns
+    -------
+    pd.DataFrame
+        Original df with three new columns:
+        * output_signal
+        * plFound  (long entry)
+        * phFound  (short entry)
+    """
+    # Indicator graph: nodes shared with other strategies / calls on the same data are reused
+    nodes = orion_nodes(ema_short_period, ema_long_period, hma_period, window_local)
+    output_signal = ig.evaluate(df, nodes, cache=cache)["output_signal"]
 
     # ------------------------------------------------------------------
     # Divergence detection (entry signals)
@@ -185,4 +214,115 @@ def calculate_orion_signal(
         output_signal.shift(1) > output_signal.shift(2)
     )
 
-    return df
\ No newline at end of file
+    return df
+
+
+def _turns(output):
+    """plFound / phFound of a (bars x columns) output_signal array: local minima / maxima one bar back."""
+    prev1 = np.full(output.shape, np.nan)
+    prev2 = np.full(output.shape, np.nan)
+    prev1[1:] = output[:-1]
+    prev2[2:] = output[:-2]
+    return (output > prev1) & (prev1 < prev2), (output < prev1) & (prev1 > prev2)
+
+
+# ----------------------------------------------------------------------
+# BATCH EVALUATION – many parameter sets in one pass
+# ----------------------------------------------------------------------
+def calculate_orion_signal_batch(df, params):
+    """
+    Orion signal for many (ema_short_period, ema_long_period, hma_period) tuples.
+
+    Components b-g are computed once, component a once per distinct EMA pair and
+    the final HMA once per distinct hma_period over all matching columns at once.
+    Column k equals calculate_orion_signal(df, *params[k]) exactly.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Must contain columns: open, high, low, close, volume
+    params : list of (int, int, int)
+        (ema_short_period, ema_long_period, hma_period) tuples
+
+    Returns
+    -------
+    (pd.DataFrame, pd.DataFrame, pd.DataFrame)
+        output_signal, plFound and phFound, one column per parameter tuple
+        (bars x parameters, so memory grows with len(df) * len(params))
+    """
+    params = [tuple(int(v) for v in p) for p in params]
+    columns = pd.MultiIndex.from_tuples(
+        params, names=["ema_short_period", "ema_long_period", "hma_period"]
+    )
+    close = df["close"]
+    b, c, d, e, f, g = (s.to_numpy()[:, None] for s in _orion_components(df))
+
+    # Component a per distinct (short, long) pair; ewm runs column-wise on the frame
+    pairs = list(dict.fromkeys((short, long) for short, long, _ in params))
+    emas = {period: ema(close, period) for period in {p for pair in pairs for p in pair}}
+    ema_diff = pd.DataFrame({i: emas[short] - emas[long] for i, (short, long) in enumerate(pairs)})
+    ema_ema_diff = ema(ema_diff, 8)
+    a = ((ema_diff - ema_ema_diff) / 10).to_numpy()
+
+    # Same summation order as the single-parameter version
+    x = (a + b + c + d + e + f + g) / 7 * 2
+
+    # Final HMA grouped by period, vectorized over the pair columns that use it
+    pair_col = {pair: i for i, pair in enumerate(pairs)}
+    output = np.empty((len(df), len(params)))
+    for hma_period in dict.fromkeys(p[2] for p in params):
+        cols = [k for k, p in enumerate(params) if p[2] == hma_period]
+        output[:, cols] = hma(x[:, [pair_col[params[k][:2]] for k in cols]], hma_period, normalized=True)
+
+    pl_found, ph_found = _turns(output)
+
+    return (
+        pd.DataFrame(output, index=df.index, columns=columns),
+        pd.DataFrame(pl_found, index=df.index, columns=columns),
+        pd.DataFrame(ph_found, index=df.index, columns=columns),
+    )
+
+
+# ----------------------------------------------------------------------
+# CROSS-SECTIONAL EVALUATION – many symbols in one pass
+# ----------------------------------------------------------------------
+def calculate_orion_signal_matrix(
+    ohlcv,
+    ema_short_period: int = 7,
+    ema_long_period: int = 15,
+    hma_period: int = 29,
+):
+    """
+    Orion signal for a whole symbol universe at once.
+
+    Every indicator runs along the time axis for all symbols in one call instead
+    of once per symbol DataFrame. Rolling windows use the window-local kernels,
+    which take every symbol in one NumPy pass: row i equals
+    calculate_orion_signal(..., window_local=True) on a DataFrame built from
+    row i of the inputs (NaN padding included), and the default path within
+    its last-bit drift.
+
+    This removes the per-call overhead the loop pays once per symbol, not the
+    per-element work. Against the default per-symbol loop, 300 symbols on one
+    core: ~18x at 500 bars, ~7.5x at 2,000, ~3.5x at 5,000, so short of 10x on
+    long histories. What is left is mostly the normalized HMA (ta's
+    per-window products, compute-bound), pandas' ewm and rolling min / max,
+    and the DataFrame arithmetic between nodes.
+
+    Parameters
+    ----------
+    ohlcv : mapping
+        Column name (high, low, close, volume; open is accepted) to aligned
+        (symbols x bars) arrays
+    ema_short_period, ema_long_period, hma_period : int
+        As in calculate_orion_signal
+
+    Returns
+    -------
+    (np.ndarray, np.ndarray, np.ndarray)
+        output_signal, plFound and phFound, each (symbols x bars)
+    """
+    nodes = orion_nodes(ema_short_period, ema_long_period, hma_period, window_local=True)
+    output = ig.evaluate_matrix(ohlcv, nodes)["output_signal"].to_numpy()
+    pl_found, ph_found = _turns(output)
+    return output.T, pl_found.T, ph_found.T
\ No newline at end of file
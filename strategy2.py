@@ -1,6 +1,45 @@
 import pandas as pd
 import numpy as np
-from ta.volatility import AverageTrueRange
+import indicators
+import indicator_graph as ig
+
+def ema_super_nodes(ema_fast_period=9, ema_slow_period=21, atr_period=10, factor=4.0):
+    """Graph nodes of the EMA fast / slow lines and the Supertrend for one parameter set."""
+    high = ig.col("high")
+    low = ig.col("low")
+
+    # Indicator graph nodes (EMAs / ATR are shared with other strategies on the same data)
+    # EMA 9 & 21
+    ema_fast = ig.ema(ig.col("close"), ema_fast_period)
+    ema_slow = ig.ema(ig.col("close"), ema_slow_period)
+
+    # Supertrend (exact match Pine Script)
+    atr = ig.atr(high, low, ig.col("close"), atr_period)
+
+    upper_band = (high + low) / 2 + factor * atr
+    lower_band = (high + low) / 2 - factor * atr
+
+    # Band ratchet runs on plain arrays (numba when available), see indicators.supertrend
+    return {
+        "ema_fast": ema_fast,
+        "ema_slow": ema_slow,
+        "supertrend": ig.supertrend(ig.col("close"), upper_band, lower_band),
+    }
+
+
+def _entries(close, ema_fast, ema_slow, supertrend):
+    """plFound / phFound from Series (one symbol) or bars x symbols DataFrames."""
+    supertrend_direction = (close > supertrend).astype(int)   # 1 = uptrend, 0 = downtrend
+
+    # Crossover / Crossunder detection
+    crossover = (ema_fast > ema_slow) & (ema_fast.shift(1) <= ema_slow.shift(1))
+    crossunder = (ema_fast < ema_slow) & (ema_fast.shift(1) >= ema_slow.shift(1))
+
+    # plFound = long entry, phFound = short entry
+    pl_found = crossover & (supertrend_direction == 1)
+    ph_found = crossunder & (supertrend_direction == 0)   # downtrend
+    return pl_found, ph_found
+
 
 def calculate_ema_super_signal(
     df,
@@ -10,47 +49,78 @@ def calculate_ema_super_signal(
     atr_period: int = 10,
     factor: float = 4.0,   # exactly as your TradingView script
     use_filter: bool = True,  # set False if you want to test without filter (but I recommend True)
+    cache=ig.CACHE,           # None for frames that change on every call (the live loop)
 ):
     df = df.copy()
 
     close = df["close"]
-    high = df["high"]
-    low = df["low"]
 
-    # EMA 9 & 21
-    ema_fast = close.ewm(span=ema_fast_period, adjust=False).mean()
-    ema_slow = ema_fast_period = close.ewm(span=ema_slow_period, adjust=False).mean()
+    values = ig.evaluate(df, ema_super_nodes(ema_fast_period, ema_slow_period, atr_period, factor), cache=cache)
+    ema_fast = values["ema_fast"]
+    ema_slow = values["ema_slow"]
+    supertrend = values["supertrend"]
 
-    # Supertrend (exact match Pine Script)
-    atr = AverageTrueRange(high=high, low=low, close=close, window=atr_period).average_true_range()
+    df["supertrend"] = supertrend
 
-    upper_band = (high + low) / 2 + factor * atr
-    lower_band = (high + low) / 2 - factor * atr
+    df["plFound"], df["phFound"] = _entries(close, ema_fast, ema_slow, supertrend)
 
-    supertrend = pd.Series(0.0, index=df.index)
-    supertrend.iloc[0] = upper_band.iloc[0]   # initial
+    # 0 if you want only long, set plFound = crossover, phFound = False
 
-    for i in range(1, len(df)):
-        if close.iloc[i] > supertrend.iloc[i-1]:
-            supertrend.iloc[i] = max(lower_band.iloc[i], supertrend.iloc[i-1])
-        else:
-            supertrend.iloc[i] = min(upper_band.iloc[i], supertrend.iloc[i-1])
+    # optional output_signal for plotting if you want
+    df["output_signal"] = np.where(ema_fast > ema_slow, 100, -100)
 
-    df["supertrend"] = supertrend
+    return df
 
-    supertrend_direction = (close > supertrend).astype(int)   # 1 = uptrend, 0 = downtrend
 
-    # Crossover / Crossunder detection
-    crossover = (ema_fast > ema_slow) & (ema_fast.shift(1) <= ema_slow.shift(1))
-    crossunder = (ema_fast < ema_slow) & (ema_fast.shift(1) >= ema_slow.shift(1))
+def calculate_ema_super_signal_matrix(
+    ohlcv,
+    ema_fast_period=9,
+    ema_slow_period=21,
+    atr_period: int = 10,
+    factor: float = 4.0,
+):
+    """
+    EMA / Supertrend signal for a whole symbol universe at once.
 
-    # plFound = long entry, phFound = short entry
-    df["plFound"] = crossover & (supertrend_direction == 1)
-    df["phFound"] = crossunder & (supertrend_direction == 0)   # downtrend
+    `ohlcv` maps high, low and close to aligned (symbols x bars) arrays. The EMAs,
+    ATR and Supertrend run along the time axis for all symbols in one call; row i
+    equals calculate_ema_super_signal on a DataFrame built from row i.
 
-    # 0 if you want only long, set plFound = crossover, phFound = False
+    Returns (output_signal, plFound, phFound, supertrend), each (symbols x bars).
+    """
+    values = ig.evaluate_matrix(ohlcv, ema_super_nodes(ema_fast_period, ema_slow_period, atr_period, factor))
+    ema_fast = values["ema_fast"]
+    ema_slow = values["ema_slow"]
+    supertrend = values["supertrend"]
+    close = pd.DataFrame(np.asarray(ohlcv["close"], dtype=float).T)
 
-    # optional output_signal for plotting if you want
-    df["output_signal"] = np.where(ema_fast > ema_slow, 100, -100)
+    pl_found, ph_found = _entries(close, ema_fast, ema_slow, supertrend)
+    output_signal = np.where(ema_fast > ema_slow, 100, -100)
+    return output_signal.T, pl_found.to_numpy().T, ph_found.to_numpy().T, supertrend.to_numpy().T
+
+
+def calculate_supertrend_grid(df, atr_periods=(10,), factors=(4.0,)):
+    """
+    Supertrend for every (atr_period, factor) combination in a single kernel call.
+
+    Each column matches df["supertrend"] from calculate_ema_super_signal with the
+    same atr_period/factor. Returns a DataFrame with (atr_period, factor) columns.
+    """
+    close = df["close"]
+    high = df["high"]
+    low = df["low"]
+
+    combos = [(atr_period, factor) for atr_period in atr_periods for factor in factors]
+    atrs = ig.evaluate(df, {p: ig.atr(ig.col("high"), ig.col("low"), ig.col("close"), p) for p in atr_periods})
+    atrs = {atr_period: atr.to_numpy() for atr_period, atr in atrs.items()}
+    mid = ((high + low) / 2).to_numpy()
+
+    upper_band = np.column_stack([mid + factor * atrs[atr_period] for atr_period, factor in combos])
+    lower_band = np.column_stack([mid - factor * atrs[atr_period] for atr_period, factor in combos])
+    closes = np.repeat(close.to_numpy()[:, None], len(combos), axis=1)
 
-    return df
\ No newline at end of file
+    return pd.DataFrame(
+        indicators.supertrend(closes, upper_band, lower_band),
+        index=df.index,
+        columns=pd.MultiIndex.from_tuples(combos, names=["atr_period", "factor"]),
+    )
\ No newline at end of file
@@ -1,7 +1,31 @@
 import pandas as pd
 import numpy as np
+from collections import deque
+import indicator_graph as ig
+from indicators import wma_weights
 
-def calculate_trend_forecast_signal(df: pd.DataFrame, length: int = 50, trend_length: int = 3, samples: int = 10) -> pd.DataFrame:
+def _average_lengths(at, lengths, samples, counted):
+    """
+    Per bar: mean of the last `samples` trend lengths recorded at bars <= it
+    (`at` ascending), nan before the first one and where `counted` is False.
+    """
+    out = np.full(len(counted), np.nan)
+    if samples < 1 or not len(lengths):
+        return out
+    # Integer cumulative sums keep every window sum exact, as np.mean over the list
+    total = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)])
+    k = np.arange(1, len(lengths) + 1)
+    first = np.maximum(k - samples, 0)
+    means = (total[k] - total[first]) / (k - first)
+
+    latest = np.searchsorted(at, np.arange(len(counted)), side='right') - 1
+    ok = counted & (latest >= 0)
+    out[ok] = means[latest[ok]]
+    return out
+
+
+def calculate_trend_forecast_signal(df: pd.DataFrame, length: int = 50, trend_length: int = 3, samples: int = 10,
+                                    cache=ig.CACHE) -> pd.DataFrame:
     """
     Calculates the Trend Duration Forecast signals (HMA trend detection).
 
@@ -9,6 +33,7 @@ def calculate_trend_forecast_signal(df: pd.DataFrame, length: int = 50, trend_le
     :param length: Smoothing Length for HMA (Pine Script's 'length').
     :param trend_length: Trend Detection Sensitivity (Pine Script's 'trendLength').
     :param samples: Trend Sample Size (Pine Script's 'samples', used for average trend length).
+    :param cache: indicator_graph cache shared across calls on the same data (None: not used).
     :return: DataFrame with HMA, trend status, and probable trend length columns.
     """
 
@@ -16,19 +41,22 @@ def calculate_trend_forecast_signal(df: pd.DataFrame, length: int = 50, trend_le
     # The HMA calculation involves three weighted moving averages (WMA):
     # HMA = WMA(2 * WMA(C, L/2) - WMA(C, L), sqrt(L))
 
-    # WMA helper function
-    def wma(series, period):
-        weights = np.arange(1, period + 1)
-        return series.rolling(period).apply(lambda prices: np.dot(prices, weights) / weights.sum(), raw=True)
-
+    # (indicator graph nodes, evaluated below together with the rising/falling checks)
+    close = ig.col('close')
     # 1. WMA(C, L/2)
-    wma1 = wma(df['close'], int(length / 2))
+    wma1 = ig.wma(close, int(length / 2))
     # 2. WMA(C, L)
-    wma2 = wma(df['close'], length)
+    wma2 = ig.wma(close, length)
     # 3. 2 * WMA(C, L/2) - WMA(C, L)
     diff_wma = 2 * wma1 - wma2
     # 4. HMA
-    df['hma'] = wma(diff_wma, int(np.sqrt(length)))
+    hma = ig.wma(diff_wma, int(np.sqrt(length)))
+    values = ig.evaluate(df, {
+        'hma': hma,
+        'trend_up_signal': ig.is_rising(hma, trend_length),
+        'trend_dn_signal': ig.is_falling(hma, trend_length),
+    }, cache=cache)
+    df['hma'] = values['hma']
     
     # --- 2. Trend Detection ---
     # Trend is detected by checking if the HMA is 'rising' or 'falling' for 'trend_length' bars.
@@ -44,86 +72,49 @@ def calculate_trend_forecast_signal(df: pd.DataFrame, length: int = 50, trend_le
       # A general implementation requires a rolling application or a loop, but for small trendLength (like 3), 
       # checking the difference is simpler.
 
-    # Let's use a simpler, more robust method for a general `trend_length`:
-    def is_rising(series, period):
-        """Checks if the series is strictly increasing for 'period' bars."""
-        # Check if the value is greater than the value 'n' bars ago
-        # And all intermediate differences are positive
-        rising = (series.diff(1) > 0).rolling(period).apply(lambda x: x.all(), raw=True)
-        return rising.fillna(False).astype(bool)
-
-    def is_falling(series, period):
-        """Checks if the series is strictly decreasing for 'period' bars."""
-        falling = (series.diff(1) < 0).rolling(period).apply(lambda x: x.all(), raw=True)
-        return falling.fillna(False).astype(bool)
-
-    df['trend_up_signal'] = is_rising(df['hma'], trend_length)
-    df['trend_dn_signal'] = is_falling(df['hma'], trend_length)
+    # General `trend_length`: the last 'trend_length' HMA differences must all be
+    # positive (rising) or all negative (falling) - see indicators.is_rising/is_falling.
+    df['trend_up_signal'] = values['trend_up_signal']
+    df['trend_dn_signal'] = values['trend_dn_signal']
     
     # The actual 'trend' variable in Pine Script is a persistent state.
-    # It only changes when a trend signal is confirmed.
+    # It only changes when a trend signal is confirmed, i.e. it is the last signal
+    # forward-filled: 1 = up, 0 = down, -1 = na (no signal yet).
+    state = np.where(df['trend_up_signal'].to_numpy(dtype=bool), 1,
+                     np.where(df['trend_dn_signal'].to_numpy(dtype=bool), 0, -1)).astype(np.int8)
+    last_signal = np.where(state >= 0, np.arange(len(state)), -1)
+    np.maximum.accumulate(last_signal, out=last_signal)
+    state = np.where(last_signal >= 0, state[np.maximum(last_signal, 0)], -1).astype(np.int8)
 
-    # Initialize a Series for the current trend status (True for up, False for down)
-    trend_series = pd.Series(dtype=bool)
-    current_trend = np.nan
-    
-    # A loop is necessary to maintain the persistent state logic (var trend = bool(na))
-    for i in range(len(df)):
-        if df['trend_up_signal'].iloc[i]:
-            current_trend = True
-        elif df['trend_dn_signal'].iloc[i]:
-            current_trend = False
-        
-        trend_series.at[df.index[i]] = current_trend
-
-    df['trend'] = trend_series
+    # Same values as Pine's `var trend = bool(na)`: True / False / nan objects. A
+    # trend that is set from the first bar on (or an empty frame) has no na and
+    # stays a plain bool column.
+    starts_na = len(df) > 0 and state[0] < 0
+    df['trend'] = np.array([False, True, np.nan], dtype=object)[state] if starts_na else state.astype(bool)
     
     # --- 3. Trend Duration Tracking ---
     # This logic is key for calculating the average probable length.
-    
-    # Initialize variables to hold the counts (equivalent to Pine Script's arrays)
-    bullish_counts = []
-    bearish_counts = []
-    current_trend_count = 0
-    
-    # Initialize Series for the results
-    df['probable_long_length'] = np.nan
-    df['probable_short_length'] = np.nan
-    
-    for i in range(1, len(df)):
-        current_trend = df['trend'].iloc[i]
-        prev_trend = df['trend'].iloc[i-1]
-        
-        if pd.notna(current_trend):
-            # Increment the counter for the current trend
-            current_trend_count += 1
-            
-            # Check for a trend switch (trend != trend[1])
-            if current_trend != prev_trend:
-                # Store the length of the just-finished trend
-                finished_trend_length = current_trend_count - 1
-                
-                if prev_trend is True: # The finished trend was Bullish (now switching to Bearish)
-                    bullish_counts.append(finished_trend_length)
-                    # Keep only the last 'samples' counts
-                    if len(bullish_counts) > samples:
-                        bullish_counts.pop(0)
-                        
-                elif prev_trend is False: # The finished trend was Bearish (now switching to Bullish)
-                    bearish_counts.append(finished_trend_length)
-                    # Keep only the last 'samples' counts
-                    if len(bearish_counts) > samples:
-                        bearish_counts.pop(0)
-
-                # Reset counter
-                current_trend_count = 1
-                
-            # Calculate and store the average probable length *before* the switch
-            avg_bullish = np.mean(bullish_counts) if bullish_counts else np.nan
-            avg_bearish = np.mean(bearish_counts) if bearish_counts else np.nan
-            
-            df.loc[df.index[i], 'probable_long_length'] = avg_bullish
-            df.loc[df.index[i], 'probable_short_length'] = avg_bearish
+
+    # Run-length encoding of the trend: a switch is a bar (from the second one on)
+    # whose trend is set and differs from the previous bar's. The trend that just
+    # finished lasted from the previous switch up to this one (the count starts on
+    # the second bar).
+    bars = np.arange(1, len(df))
+    switches = bars[(state[1:] >= 0) & (state[1:] != state[:-1])]
+    lengths = np.diff(switches, prepend=1)
+    finished = state[switches - 1]      # trend of the segment that ended (-1: na, not stored)
+    if not starts_na:
+        # Lengths are stored on `prev_trend is True / False`, which never matches
+        # the numpy bools of a bool column
+        finished = np.full_like(finished, -1)
+
+    # Bars with a trend get the average of the last 'samples' finished lengths so far
+    counted = np.zeros(len(df), dtype=bool)
+    counted[1:] = state[1:] >= 0
+    bullish = finished == 1
+    bearish = finished == 0
+    df['probable_long_length'] = _average_lengths(switches[bullish], lengths[bullish], samples, counted)
+    df['probable_short_length'] = _average_lengths(switches[bearish], lengths[bearish], samples, counted)
             
             
     # --- 4. Trading Signals (Based on the new trend detection) ---
@@ -132,4 +123,193 @@ def calculate_trend_forecast_signal(df: pd.DataFrame, length: int = 50, trend_le
     df['plFound'] = (df['trend'] == True) & (df['trend'].shift(1) == False)
     df['phFound'] = (df['trend'] == False) & (df['trend'].shift(1) == True)
     
-    return df
\ No newline at end of file
+    return df
+
+
+class TrendForecastEngine:
+    """
+    Streaming version of calculate_trend_forecast_signal.
+
+    Holds the WMA/HMA windows, the persistent trend state and the bullish/bearish
+    duration samples, so every bar costs a fixed amount of work (a few dot products
+    over at most `length` values) instead of a full recomputation of the DataFrame.
+
+    * push(close)   - commit a closed bar and return its signal row
+    * update(close) - evaluate the forming bar on top of the committed bars,
+                      without changing any state (safe to call every tick)
+    * get_state() / from_state(state) - plain-data copy of everything committed
+                      (windows, trend, duration samples) for warm restarts
+
+    The returned dict uses the same keys as the batch output columns and matches
+    calculate_trend_forecast_signal bar for bar over the same history (its WMAs
+    are np.dot per window, the batch's np.correlate: see indicators.WMA_MATCHES_DOT).
+    """
+
+    def __init__(self, length: int = 50, trend_length: int = 3, samples: int = 10):
+        self.length = length
+        self.trend_length = trend_length
+        self.samples = samples
+
+        self._half_length = int(length / 2)
+        self._sqrt_length = int(np.sqrt(length))
+        self._weights = {
+            period: wma_weights(period)
+            for period in (self._half_length, length, self._sqrt_length)
+        }
+        self._weight_sums = {period: weights.sum() for period, weights in self._weights.items()}
+        self._means = {}    # duration samples -> mean (they only change when a trend ends)
+
+        # Rolling windows behind the three WMAs
+        self._closes = deque(maxlen=length)
+        self._diffs = deque(maxlen=self._sqrt_length)
+        self._hma = np.nan
+
+        # Last `trend_length` "HMA went up / down" flags (ta.rising / ta.falling)
+        self._ups = deque(maxlen=trend_length)
+        self._dns = deque(maxlen=trend_length)
+
+        # Persistent trend (None == Pine's na) and duration tracking
+        self._trend = None
+        self._trend_count = 0
+        self._bullish_counts = deque(maxlen=samples)
+        self._bearish_counts = deque(maxlen=samples)
+        self._bars = 0
+
+    def get_state(self):
+        """Committed state as lists, floats, bools and ints (JSON-serializable)."""
+        return {
+            'length': self.length,
+            'trend_length': self.trend_length,
+            'samples': self.samples,
+            'closes': list(self._closes),
+            'diffs': [float(d) for d in self._diffs],
+            'hma': float(self._hma),
+            'ups': list(self._ups),
+            'dns': list(self._dns),
+            'trend': self._trend,
+            'trend_count': self._trend_count,
+            'bullish_counts': list(self._bullish_counts),
+            'bearish_counts': list(self._bearish_counts),
+            'bars': self._bars,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Engine that continues exactly where the one that produced get_state() stopped."""
+        engine = cls(state['length'], state['trend_length'], state['samples'])
+        engine._closes.extend(state['closes'])
+        engine._diffs.extend(state['diffs'])
+        engine._hma = state['hma']
+        engine._ups.extend(state['ups'])
+        engine._dns.extend(state['dns'])
+        engine._trend = state['trend']
+        engine._trend_count = state['trend_count']
+        engine._bullish_counts.extend(state['bullish_counts'])
+        engine._bearish_counts.extend(state['bearish_counts'])
+        engine._bars = state['bars']
+        return engine
+
+    def seed(self, closes):
+        """Commit a history of closed bars (e.g. the startup lookback)."""
+        row = None
+        for close in closes:
+            row = self.push(close)
+        return row
+
+    def push(self, close):
+        """Commit a closed bar and return its signal row."""
+        return self._step(float(close), commit=True)
+
+    def update(self, close):
+        """Evaluate the still-forming bar without committing it."""
+        return self._step(float(close), commit=False)
+
+    def _wma(self, values, period):
+        if len(values) < period:
+            return np.nan
+        # Same summation order as indicators.wma, so the last value matches the batch output exactly
+        weights = self._weights[period]
+        prices = np.array(values[-period:], dtype=float)
+        return np.dot(prices, weights) / self._weight_sums[period]
+
+    def _mean(self, counts):
+        key = tuple(counts)
+        mean = self._means.get(key)
+        if mean is None:
+            if len(self._means) >= 64:
+                self._means.clear()
+            mean = self._means[key] = np.mean(key) if key else np.nan
+        return mean
+
+    def _step(self, close, commit):
+        # --- 1. HMA ---
+        closes = (list(self._closes) + [close])[-self.length:]
+        wma1 = self._wma(closes, self._half_length)
+        wma2 = self._wma(closes, self.length)
+        diff_wma = 2 * wma1 - wma2
+        diffs = (list(self._diffs) + [diff_wma])[-self._sqrt_length:]
+        hma = self._wma(diffs, self._sqrt_length)
+
+        # --- 2. Trend detection ---
+        up = bool(hma > self._hma)
+        dn = bool(hma < self._hma)
+        ups = (list(self._ups) + [up])[-self.trend_length:]
+        dns = (list(self._dns) + [dn])[-self.trend_length:]
+        trend_up_signal = len(ups) == self.trend_length and all(ups)
+        trend_dn_signal = len(dns) == self.trend_length and all(dns)
+
+        prev_trend = self._trend
+        if trend_up_signal:
+            trend = True
+        elif trend_dn_signal:
+            trend = False
+        else:
+            trend = prev_trend
+
+        # --- 3. Trend duration tracking ---
+        trend_count = self._trend_count
+        bullish_counts = self._bullish_counts
+        bearish_counts = self._bearish_counts
+        probable_long_length = np.nan
+        probable_short_length = np.nan
+
+        if self._bars > 0 and trend is not None:
+            trend_count += 1
+            if trend != prev_trend:
+                finished_trend_length = trend_count - 1
+                if prev_trend is True:
+                    bullish_counts = self._appended(bullish_counts, finished_trend_length, commit)
+                elif prev_trend is False:
+                    bearish_counts = self._appended(bearish_counts, finished_trend_length, commit)
+                trend_count = 1
+
+            probable_long_length = self._mean(bullish_counts)
+            probable_short_length = self._mean(bearish_counts)
+
+        if commit:
+            self._closes.append(close)
+            self._diffs.append(diff_wma)
+            self._hma = hma
+            self._ups.append(up)
+            self._dns.append(dn)
+            self._trend = trend
+            self._trend_count = trend_count
+            self._bars += 1
+
+        # --- 4. Trading signals ---
+        return {
+            'hma': hma,
+            'trend_up_signal': trend_up_signal,
+            'trend_dn_signal': trend_dn_signal,
+            'trend': np.nan if trend is None else trend,
+            'probable_long_length': probable_long_length,
+            'probable_short_length': probable_short_length,
+            'plFound': trend is True and prev_trend is False,
+            'phFound': trend is False and prev_trend is True,
+        }
+
+    def _appended(self, counts, value, commit):
+        if commit:
+            counts.append(value)
+            return counts
+        return (list(counts) + [value])[-self.samples:]
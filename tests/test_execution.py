@@ -0,0 +1,134 @@
+# tests/test_execution.py
+import threading
+
+import pytest
+
+from exchange_state import ExchangeState
+from execution import Executor
+from fake_exchange import FakeExchange, synthetic_ohlcv
+from metrics import Metrics
+
+LATENCY = 0.01
+
+
+def make(latency=LATENCY, max_fill=None, mode='single', bare_acks=False, held=0.0, ttl=None):
+    exchange = FakeExchange({('BTCUSDT', '1m'): synthetic_ohlcv(10)}, latency=latency, max_fill=max_fill,
+                            bare_acks=bare_acks)
+    exchange.positions['BTCUSDT'] = held
+    metrics = Metrics()
+    executor = Executor(exchange, mode=mode, metrics=metrics,
+                        state=ExchangeState(exchange, ttl=ttl, metrics=metrics))
+    executor.sync(['BTCUSDT'])
+    return exchange, executor
+
+
+def failing(*args, **kwargs):
+    raise ConnectionError('timeout')
+
+
+def test_single_order_reversal_with_fill_price_from_ack():
+    exchange, executor = make(held=0.007)
+    [execution] = executor.reverse('long', 'sell', 'BTCUSDT', 0.007)
+
+    assert [(o['side'], o['amount'], o['reduceOnly']) for o in exchange.orders] == [('sell', 0.014, False)]
+    assert exchange.positions['BTCUSDT'] == pytest.approx(-0.007)
+    assert executor.sizes['BTCUSDT'] == pytest.approx(-0.007)
+    assert execution.filled == pytest.approx(0.014)
+    assert execution.average == exchange.ohlcv[('BTCUSDT', '1m')][-1][4]
+    assert len(execution.acks) == 1
+    # One round trip: the size read by sync is fresh, the price comes with the ack
+    assert exchange.calls == {'fetch_positions': 1, 'create_order': 1}
+
+
+def test_concurrent_legs_overlap():
+    exchange, executor = make(mode='concurrent', held=0.007)
+    # Each leg waits inside its request until the other one is in flight too
+    both = threading.Barrier(2, timeout=10)
+    exchange.sleep = lambda seconds: both.wait()
+    executions = executor.reverse('long', 'sell', 'BTCUSDT', 0.007)
+
+    assert sorted(o['amount'] for o in exchange.orders) == [0.007, 0.007]
+    assert {e.side for e in executions} == {'sell'}
+    assert exchange.positions['BTCUSDT'] == pytest.approx(-0.007)
+    assert exchange.max_in_flight == 2
+
+
+def test_sequential_fallback_when_size_unknown():
+    exchange, executor = make(held=0.007)
+    executor.state.invalidate('BTCUSDT')
+    exchange.fetch_positions = failing
+    executions = executor.reverse('long', 'sell', 'BTCUSDT', 0.007)
+
+    assert [(o['side'], o['amount'], o['reduceOnly']) for o in exchange.orders] == [
+        ('sell', 0.007, True), ('sell', 0.007, False)]
+    assert [e.filled for e in executions] == pytest.approx([0.007, 0.007])
+    assert exchange.positions['BTCUSDT'] == pytest.approx(-0.007)
+    assert exchange.max_in_flight == 1               # one leg after the other
+
+
+def test_position_closed_behind_the_executor_is_read_before_reversing():
+    # Liquidated / TP / closed by hand after the last read: a stale size would sell 0.014
+    exchange, executor = make(held=0.007, ttl={'positions': 0.0})
+    exchange.positions['BTCUSDT'] = 0.0
+    [execution] = executor.reverse('long', 'sell', 'BTCUSDT', 0.007)
+
+    assert exchange.calls['fetch_positions'] == 2
+    assert [(o['side'], o['amount']) for o in exchange.orders] == [('sell', 0.007)]
+    assert exchange.positions['BTCUSDT'] == pytest.approx(-0.007)
+
+
+@pytest.mark.parametrize('mode', ['single', 'concurrent'])
+def test_unconfirmed_size_falls_back_to_reduce_only_close(mode):
+    exchange, executor = make(mode=mode, held=0.007, ttl={'positions': 0.0})
+    exchange.positions['BTCUSDT'] = 0.0
+    exchange.fetch_positions = failing
+    executor.reverse('long', 'sell', 'BTCUSDT', 0.007)
+
+    assert [(o['amount'], o['reduceOnly'], o['filled']) for o in exchange.orders] == [
+        (0.007, True, 0.0), (0.007, False, 0.007)]
+    assert exchange.positions['BTCUSDT'] == pytest.approx(-0.007)
+
+
+def test_partial_fills_are_resubmitted():
+    exchange, executor = make(max_fill=0.005, held=0.007)
+    [execution] = executor.reverse('long', 'sell', 'BTCUSDT', 0.007)
+
+    assert [o['amount'] for o in exchange.orders] == pytest.approx([0.014, 0.009, 0.004])
+    assert [o['status'] for o in exchange.orders] == ['canceled', 'canceled', 'closed']
+    assert execution.filled == pytest.approx(0.014)
+    assert len(execution.acks) == 3
+    assert executor.sizes['BTCUSDT'] == pytest.approx(exchange.positions['BTCUSDT']) == pytest.approx(-0.007)
+
+
+def test_partial_fill_stops_after_max_attempts():
+    exchange, executor = make(max_fill=0.003, held=0.007)
+    [execution] = executor.reverse('long', 'sell', 'BTCUSDT', 0.007)
+
+    assert len(exchange.orders) == executor.max_attempts
+    assert execution.filled == pytest.approx(0.009)
+    assert executor.sizes['BTCUSDT'] == pytest.approx(exchange.positions['BTCUSDT']) == pytest.approx(-0.002)
+
+
+def test_bare_acks_are_completed_with_fetch_order():
+    exchange, executor = make(max_fill=0.01, bare_acks=True, held=0.007)
+    [execution] = executor.reverse('long', 'sell', 'BTCUSDT', 0.007)
+
+    assert exchange.calls['fetch_order'] == 2
+    assert [o['amount'] for o in exchange.orders] == pytest.approx([0.014, 0.004])
+    assert execution.filled == pytest.approx(0.014)
+    assert execution.average == exchange.ohlcv[('BTCUSDT', '1m')][-1][4]
+    assert executor.sizes['BTCUSDT'] == pytest.approx(exchange.positions['BTCUSDT'])
+
+
+def test_unknown_fill_forces_the_position_to_be_read_again():
+    exchange, executor = make(max_fill=0.01, bare_acks=True, held=0.007)
+    exchange.fetch_order = failing
+    executor.reverse('long', 'sell', 'BTCUSDT', 0.007)
+    assert len(exchange.orders) == 1                 # no blind re-submit
+    assert executor.sizes['BTCUSDT'] is None
+
+    # The next reversal reads the real (partially filled) size instead of trusting the ack
+    executor.reverse('short', 'buy', 'BTCUSDT', 0.007)
+    assert exchange.calls['fetch_positions'] == 2
+    assert exchange.orders[-1]['amount'] == pytest.approx(0.01)
+    assert exchange.positions['BTCUSDT'] == pytest.approx(0.007)
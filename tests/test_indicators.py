@@ -0,0 +1,179 @@
+# tests/test_indicators.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicator_graph as ig
+import indicators
+import strategy1
+import strategy2
+import strategy3
+from fake_exchange import synthetic_frame
+
+
+def dot_wma(series, period):
+    # strategy3's original WMA
+    weights = np.arange(1, period + 1)
+    return series.rolling(period).apply(lambda prices: np.dot(prices, weights) / weights.sum(), raw=True)
+
+
+def assert_matches_dot(actual, expected):
+    # Bit-identical where this NumPy's np.correlate sums like np.dot, within rounding elsewhere
+    if indicators.WMA_MATCHES_DOT:
+        np.testing.assert_array_equal(actual, expected)
+    else:
+        np.testing.assert_allclose(actual, expected, rtol=1e-12)
+
+
+@pytest.fixture(scope='module')
+def close():
+    return synthetic_frame(3_000)['close']
+
+
+@pytest.mark.parametrize('period', [1, 2, 3, 5, 7, 11, 12, 14, 25, 50])
+def test_wma_matches_per_window_dot(close, period):
+    assert_matches_dot(indicators.wma(close, period).to_numpy(), dot_wma(close, period).to_numpy())
+
+
+@pytest.mark.parametrize('period', [3, 7, 20])
+def test_wma_nan_windows(close, period):
+    values = close.copy()
+    values.iloc[[0, 1, 500, 1_200]] = np.nan
+    assert_matches_dot(indicators.wma(values, period).to_numpy(), dot_wma(values, period).to_numpy())
+
+
+def test_wma_columns_match_series(close):
+    frame = pd.DataFrame({'a': close, 'b': close[::-1].to_numpy()})
+    out = indicators.wma(frame, 7)
+    for name in frame:
+        np.testing.assert_array_equal(out[name].to_numpy(), indicators.wma(frame[name], 7).to_numpy())
+
+
+@pytest.mark.parametrize('period', [2, 7, 14, 29])
+def test_normalized_wma_matches_ta(close, period):
+    ta = pytest.importorskip('ta')
+    np.testing.assert_array_equal(indicators.wma(close, period, normalized=True).to_numpy(),
+                                  ta.trend.wma_indicator(close, window=period).to_numpy())
+
+
+def test_trend_forecast_hma_matches_original(close):
+    # Original: WMA(2 * WMA(C, L/2) - WMA(C, L), sqrt(L)) through per-window np.dot
+    hma = dot_wma(2 * dot_wma(close, 25) - dot_wma(close, 50), 7)
+    out = strategy3.calculate_trend_forecast_signal(pd.DataFrame({'close': close}))
+    assert_matches_dot(out['hma'].to_numpy(), hma.to_numpy())
+
+
+def test_engine_matches_batch(close):
+    batch = strategy3.calculate_trend_forecast_signal(pd.DataFrame({'close': close}))
+    engine = strategy3.TrendForecastEngine()
+    hma = [engine.push(c)['hma'] for c in close]
+    assert_matches_dot(np.array(hma), batch['hma'].to_numpy())
+
+
+def test_is_rising_matches_rolling_apply(close):
+    hma = indicators.hma(close, 50)
+    rising = (hma.diff(1) > 0).rolling(3).apply(lambda x: x.all(), raw=True).fillna(False).astype(bool)
+    np.testing.assert_array_equal(indicators.is_rising(hma, 3).to_numpy(), rising.to_numpy())
+
+
+@pytest.mark.parametrize('name', ['rolling_sum', 'rolling_mean', 'rolling_std'])
+def test_rolling_columns_match_series(close, name):
+    kernel = getattr(indicators, name)
+    values = close.copy()
+    values.iloc[[3, 900]] = np.nan
+    frame = pd.DataFrame({'a': values, 'b': close[::-1].to_numpy()})
+    out = kernel(frame, 21)
+    for column in frame:
+        np.testing.assert_array_equal(out[column].to_numpy(), kernel(frame[column], 21).to_numpy())
+    np.testing.assert_allclose(out.to_numpy(), getattr(frame.rolling(21), name.split('_')[1])().to_numpy(), rtol=1e-9)
+
+
+@pytest.fixture(scope='module')
+def universe():
+    # Five symbols on one bar grid; two listed later (leading NaN rows)
+    frames = [synthetic_frame(600, seed=seed) for seed in range(5)]
+    for frame, listed in zip(frames[3:], (150, 400)):
+        frame.iloc[:listed] = np.nan
+    ohlcv = {name: np.stack([frame[name].to_numpy() for frame in frames]) for name in frames[0]}
+    return frames, ohlcv
+
+
+def test_orion_matrix_rows_match_per_symbol(universe):
+    frames, ohlcv = universe
+    output, pl_found, ph_found = strategy1.calculate_orion_signal_matrix(ohlcv)
+    for i, frame in enumerate(frames):
+        row = strategy1.calculate_orion_signal(frame.copy(), window_local=True, cache=None)
+        np.testing.assert_array_equal(output[i], row['output_signal'].to_numpy())
+        np.testing.assert_array_equal(pl_found[i], row['plFound'].to_numpy())
+        np.testing.assert_array_equal(ph_found[i], row['phFound'].to_numpy())
+
+
+def test_ema_super_matrix_rows_match_per_symbol(universe):
+    frames, ohlcv = universe
+    output, pl_found, ph_found, supertrend = strategy2.calculate_ema_super_signal_matrix(ohlcv)
+    for i, frame in enumerate(frames):
+        row = strategy2.calculate_ema_super_signal(frame, cache=None)
+        np.testing.assert_array_equal(output[i], row['output_signal'].to_numpy())
+        np.testing.assert_array_equal(pl_found[i], row['plFound'].to_numpy())
+        np.testing.assert_array_equal(ph_found[i], row['phFound'].to_numpy())
+        np.testing.assert_array_equal(supertrend[i], row['supertrend'].to_numpy())
+
+
+@pytest.fixture(params=['numba', 'numpy'])
+def backend(request, monkeypatch):
+    # The ATR / Supertrend kernels of one backend; the other one is what the import picked
+    if request.param == 'numba':
+        if indicators.BACKEND != 'numba':
+            pytest.skip('numba is not installed')
+    else:
+        monkeypatch.setattr(indicators, '_atr_kernel', indicators._atr_python)
+        monkeypatch.setattr(indicators, '_supertrend_kernel', indicators._supertrend_numpy)
+        monkeypatch.setattr(indicators, 'BACKEND', 'numpy')
+    ig.CACHE.clear()    # ATR values of the other backend
+    yield request.param
+    ig.CACHE.clear()
+
+
+def loop_supertrend(df, atr_period, factor):
+    # strategy2's original: ta's ATR bands and the per-bar ratchet over Series.iloc
+    ta = pytest.importorskip('ta')
+    close, high, low = df['close'], df['high'], df['low']
+    atr = ta.volatility.AverageTrueRange(high=high, low=low, close=close, window=atr_period).average_true_range()
+    upper_band = (high + low) / 2 + factor * atr
+    lower_band = (high + low) / 2 - factor * atr
+    supertrend = pd.Series(0.0, index=df.index)
+    supertrend.iloc[0] = upper_band.iloc[0]
+    for i in range(1, len(df)):
+        if close.iloc[i] > supertrend.iloc[i-1]:
+            supertrend.iloc[i] = max(lower_band.iloc[i], supertrend.iloc[i-1])
+        else:
+            supertrend.iloc[i] = min(upper_band.iloc[i], supertrend.iloc[i-1])
+    return supertrend, upper_band, lower_band
+
+
+@pytest.fixture(scope='module')
+def bars():
+    return synthetic_frame(2_000, seed=11)
+
+
+def test_supertrend_matches_loop(bars, backend):
+    expected, upper_band, lower_band = loop_supertrend(bars, 10, 4.0)
+    out = indicators.supertrend(bars['close'], upper_band, lower_band)
+    assert out.to_numpy().tobytes() == expected.to_numpy().tobytes()
+    # One column or several go through different NumPy paths
+    columns = indicators.supertrend(np.column_stack([bars['close']] * 2), np.column_stack([upper_band] * 2),
+                                    np.column_stack([lower_band] * 2))
+    assert columns[:, 1].tobytes() == expected.to_numpy().tobytes()
+
+
+def test_ema_super_signal_supertrend_matches_loop(bars, backend):
+    expected, _, _ = loop_supertrend(bars, 10, 4.0)
+    out = strategy2.calculate_ema_super_signal(bars, cache=None)
+    assert out['supertrend'].to_numpy().tobytes() == expected.to_numpy().tobytes()
+
+
+def test_supertrend_grid_matches_loop(bars, backend):
+    grid = strategy2.calculate_supertrend_grid(bars, atr_periods=(7, 10, 14), factors=(2.0, 3.5))
+    for atr_period, factor in grid:
+        expected, _, _ = loop_supertrend(bars, atr_period, factor)
+        assert grid[atr_period, factor].to_numpy().tobytes() == expected.to_numpy().tobytes(), (atr_period, factor)
@@ -0,0 +1,97 @@
+# tests/test_ohlcv_store.py
+import os
+
+import numpy as np
+import pytest
+
+from fake_exchange import FakeExchange, synthetic_ohlcv
+from ohlcv_store import OHLCVStore
+
+MINUTE = 60_000
+
+
+@pytest.fixture
+def rows():
+    return synthetic_ohlcv(3_000)
+
+
+@pytest.fixture
+def exchange(rows):
+    # Clock inside the last bar: it is still forming and must not be stored
+    return FakeExchange({('BTCUSDT', '1m'): rows}, now=rows[-1][0] + 30_000)
+
+
+def stored(store):
+    df = store.load('BTCUSDT', '1m')
+    ts = df.index.as_unit('ms').asi8
+    return [[int(t), *values] for t, values in zip(ts.tolist(), df.to_numpy().tolist())]
+
+
+def test_initial_sync_pages_from_since(tmp_path, exchange, rows):
+    store = OHLCVStore(str(tmp_path))
+    assert store.sync(exchange, 'BTCUSDT', '1m', since=rows[0][0]) == len(rows) - 1
+    assert stored(store) == rows[:-1]
+    assert exchange.calls['fetch_ohlcv'] == 4      # three full pages and an empty one
+    assert store.find_gaps('BTCUSDT', '1m') == []
+
+
+def test_initial_sync_defaults_to_last_limit_bars(tmp_path, exchange, rows):
+    store = OHLCVStore(str(tmp_path))
+    store.sync(exchange, 'BTCUSDT', '1m', limit=200)
+    assert stored(store) == rows[-200:-1]       # the last 200 bars but the forming one
+
+
+def test_incremental_sync_fetches_only_new_bars(tmp_path, exchange, rows):
+    store = OHLCVStore(str(tmp_path))
+    exchange.now = rows[1_999][0] + 30_000
+    store.sync(exchange, 'BTCUSDT', '1m', since=rows[0][0])
+    assert store.last_timestamp('BTCUSDT', '1m') == rows[1_998][0]
+
+    requested = []
+    fetch_ohlcv = exchange.fetch_ohlcv
+
+    def recording_fetch(symbol, timeframe='1m', since=None, limit=None, params=None):
+        requested.append(since)
+        return fetch_ohlcv(symbol, timeframe, since, limit, params)
+
+    exchange.fetch_ohlcv = recording_fetch
+    exchange.now = rows[-1][0] + 30_000
+    assert store.sync(exchange, 'BTCUSDT', '1m') == len(rows) - 2_000
+    assert requested[0] == rows[1_999][0]
+    assert stored(store) == rows[:-1]
+
+    # Nothing new: nothing appended
+    assert store.sync(exchange, 'BTCUSDT', '1m') == 0
+    assert len(store.load('BTCUSDT', '1m')) == len(rows) - 1
+
+
+def test_gaps_are_found_and_repaired(tmp_path, exchange, rows):
+    store = OHLCVStore(str(tmp_path))
+    exchange.missing = {rows[10][0], rows[11][0], rows[1_500][0]}
+    store.sync(exchange, 'BTCUSDT', '1m', since=rows[0][0])
+    assert store.find_gaps('BTCUSDT', '1m') == [(rows[10][0], rows[12][0]), (rows[1_500][0], rows[1_501][0])]
+
+    exchange.missing = set()
+    assert store.repair(exchange, 'BTCUSDT', '1m') == 3
+    assert store.find_gaps('BTCUSDT', '1m') == []
+    assert stored(store) == rows[:-1]
+
+
+def test_torn_append_is_ignored_and_truncated(tmp_path, exchange, rows):
+    store = OHLCVStore(str(tmp_path))
+    exchange.now = rows[99][0] + 30_000
+    store.sync(exchange, 'BTCUSDT', '1m', since=rows[0][0])
+
+    # An append interrupted after the first columns: one full row in ts/open, half a row in high
+    for col, nbytes in (('ts', 8), ('open', 8), ('high', 4)):
+        with open(store._file('BTCUSDT', '1m', col), 'ab') as f:
+            f.write(np.full(1, 7, dtype='<i8').tobytes()[:nbytes])
+    assert store.count('BTCUSDT', '1m') == 99
+    assert store.last_timestamp('BTCUSDT', '1m') == rows[98][0]
+    assert stored(store) == rows[:99]
+
+    exchange.now = rows[-1][0] + 30_000
+    store.sync(exchange, 'BTCUSDT', '1m')
+    assert stored(store) == rows[:-1]
+    sizes = {os.path.getsize(store._file('BTCUSDT', '1m', col)) for col in ('ts', 'open', 'high', 'volume')}
+    assert sizes == {8 * (len(rows) - 1)}
@@ -0,0 +1,61 @@
+# tests/test_optimize.py
+import json
+
+import optimize
+from fake_exchange import synthetic_frame
+
+
+def test_resume_only_reuses_results_with_the_same_backtest_settings(tmp_path):
+    df = synthetic_frame(1_500)
+    path = str(tmp_path / 'sweep.jsonl')
+    grid = [(5, 15, 21), (7, 21, 29)]
+
+    first = optimize.sweep(df, grid, results_path=path, workers=2)
+    assert len(first) == 2
+
+    # Same settings: nothing is evaluated again
+    again = optimize.run_tasks(df, [(p, (0, len(df))) for p in grid], path, progress=False)
+    assert len(again) == 2
+    with open(path) as f:
+        assert len(f.readlines()) == 2
+
+    # Other costs: stale rows are not reused, new ones are appended next to them
+    costly = optimize.sweep(df, grid, results_path=path, workers=2, backtest_params={'fee_rate': 0.01})
+    with open(path) as f:
+        rows = [json.loads(line) for line in f]
+    assert len(rows) == 4
+    assert [row['backtest'] for row in rows].count({'fee_rate': 0.01}) == 2
+    assert list(costly.columns) == list(first.columns)
+    both = first.merge(costly, on=list(optimize.PARAM_NAMES), suffixes=('', '_costly'))
+    assert (both['net_pnl_costly'] < both['net_pnl']).all()
+
+
+def test_rows_without_settings_are_not_reused(tmp_path):
+    path = tmp_path / 'old.jsonl'
+    path.write_text(json.dumps({'params': [5, 15, 21], 'window': [0, 100], 'net_pnl': 1.0}) + '\n')
+    assert optimize.load_results(str(path)) == {}
+
+
+def test_resume_only_reuses_results_on_the_same_data(tmp_path, capsys):
+    longer = synthetic_frame(2_000)
+    df = longer.iloc[:1_500]
+    path = str(tmp_path / 'sweep.jsonl')
+    tasks = [((5, 15, 21), (0, 1_000)), ((7, 21, 29), (0, 1_000))]
+    first = optimize.run_tasks(df, tasks, path, workers=2, progress=False)
+
+    # More bars after the window (a store sync): the window's rows still hold
+    assert optimize.run_tasks(longer, tasks, path, workers=2, progress=False) == first
+    with open(path) as f:
+        assert len(f.readlines()) == 2
+
+    # Other candles inside the window: evaluated again, the stale rows are left alone
+    revised = df.copy()
+    revised.iloc[500, revised.columns.get_loc('close')] *= 1.01
+    capsys.readouterr()
+    again = optimize.run_tasks(revised, tasks, path, workers=2, progress=False)
+    assert 'Ignoring 2 results' in capsys.readouterr().out
+    with open(path) as f:
+        rows = [json.loads(line) for line in f]
+    assert len(rows) == 4
+    assert {row['data'] for row in rows[2:]} == {optimize.window_fingerprints(revised, [(0, 1_000)])[0, 1_000]}
+    assert all(again[key]['data'] != first[key]['data'] for key in first)
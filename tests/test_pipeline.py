@@ -0,0 +1,31 @@
+# tests/test_pipeline.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import pipeline
+from fake_exchange import synthetic_frame
+from strategy1 import calculate_orion_signal
+
+
+@pytest.fixture(scope='module')
+def ohlcv():
+    return synthetic_frame(12_000, seed=3)
+
+
+@pytest.mark.parametrize('strategy', sorted(pipeline.STRATEGIES))
+def test_chunked_output_equals_full_run(ohlcv, strategy):
+    func = pipeline.STRATEGIES[strategy]
+    chunks = (ohlcv.iloc[i:i + 2_500] for i in range(0, len(ohlcv), 2_500))
+    stitched = pd.concat(pipeline.run_chunked(func, chunks, warmup=600, verify=200))
+    full = func(ohlcv.copy(), **pipeline.CHUNK_PARAMS.get(func, {}))
+    assert stitched.equals(full)
+
+
+def test_window_local_orion_stays_within_tolerance_of_live_signal(ohlcv):
+    # The pipeline's start-independent windows against pandas' running sums (the live path)
+    live = calculate_orion_signal(ohlcv.copy())
+    local = calculate_orion_signal(ohlcv.copy(), window_local=True)
+    np.testing.assert_allclose(local['output_signal'], live['output_signal'], rtol=0, atol=1e-6)
+    assert local['plFound'].equals(live['plFound'])
+    assert local['phFound'].equals(live['phFound'])
@@ -0,0 +1,143 @@
+# tests/test_resample.py
+import asyncio
+
+import numpy as np
+import pytest
+
+import runner
+from fake_exchange import synthetic_ohlcv
+from feed import BarUpdate
+from metrics import METRICS
+from ohlcv_store import timeframe_to_ms
+from replay import intrabar_updates
+from resample import Resampler, resample_frame
+
+TIMEFRAMES = ['5m', '15m', '1h', '4h', '1d']
+ROWS = synthetic_ohlcv(2 * 1440 + 123)     # two days and part of a third
+FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def _values(update):
+    return [update.open, update.high, update.low, update.close, update.volume]
+
+
+def _complete_bars(timeframe):
+    # ts -> values of every complete bar, from the batch resampler
+    frame = resample_frame(runner._history_frame(ROWS), timeframe)
+    return dict(zip(frame.index.as_unit('ms').asi8.tolist()[:-1], frame[FIELDS].values.tolist()[:-1]))
+
+
+def test_closed_base_bars_match_intrabar_updates():
+    resampler = Resampler('BTCUSDT', '1m', TIMEFRAMES)
+    states = {timeframe: [] for timeframe in TIMEFRAMES}   # the bar after every base bar
+    for row in ROWS:
+        last = {update.timeframe: update for update in resampler.update(BarUpdate.from_row('BTCUSDT', '1m', row,
+                                                                                          closed=True))}
+        for timeframe in TIMEFRAMES:
+            states[timeframe].append(last[timeframe])
+
+    fine = runner._history_frame(ROWS)
+    for timeframe in TIMEFRAMES:
+        expected = intrabar_updates(fine, '1m', timeframe)
+        got = states[timeframe]
+        assert [u.ts for u in got] == expected['ts']
+        assert [u.closed for u in got] == expected['closed']
+        np.testing.assert_allclose([_values(u) for u in got], np.array([expected[f] for f in FIELDS]).T,
+                                   rtol=1e-12)
+
+
+def test_partial_updates_with_dropped_closes_give_every_closed_bar():
+    rng = np.random.default_rng(1)
+    resampler = Resampler('BTCUSDT', '1m', TIMEFRAMES)
+    emitted = []
+    for ts, o, h, l, c, v in ROWS:
+        # Two forming updates (the last with the final values), then the closed one, lost 20% of the time
+        updates = [[ts, o, max(o, c), min(o, c), c, v / 2], [ts, o, h, l, c, v]]
+        for row in updates:
+            emitted += resampler.update(BarUpdate.from_row('BTCUSDT', '1m', row))
+        if rng.random() >= 0.2:
+            emitted += resampler.update(BarUpdate.from_row('BTCUSDT', '1m', updates[-1], closed=True))
+
+    for timeframe in TIMEFRAMES:
+        closed = {u.ts: _values(u) for u in emitted if u.timeframe == timeframe and u.closed}
+        expected = _complete_bars(timeframe)
+        # The last complete bar may still wait for the next base bar when its closing update was lost
+        missing = set(expected) - set(closed)
+        assert missing <= {max(expected)}, timeframe
+        assert set(closed) <= set(expected)
+        for ts, values in closed.items():
+            np.testing.assert_allclose(values, expected[ts], rtol=1e-12)
+        # Each bar closes once, forming updates never go back in time
+        assert len([u for u in emitted if u.timeframe == timeframe and u.closed]) == len(closed)
+
+
+def test_seed_continues_the_forming_bars():
+    now = ROWS[-1][0] + 30_000
+    resampler = Resampler('BTCUSDT', '1m', TIMEFRAMES)
+    since = resampler.since(now)
+    resampler.seed([row for row in ROWS if row[0] >= since])
+    for timeframe in TIMEFRAMES:
+        frame = resample_frame(runner._history_frame(ROWS), timeframe)
+        expected = [frame.index.as_unit('ms').asi8[-1], *frame[FIELDS].iloc[-1].tolist()]
+        np.testing.assert_allclose(resampler.forming(timeframe), expected, rtol=1e-12)
+
+
+def test_runner_rejects_two_traders_on_one_symbol():
+    instruments = [runner.Instrument('BTCUSDT', '15m', 'strategy3'), runner.Instrument('BTCUSDT', '1h', 'strategy3')]
+    with pytest.raises(ValueError, match='one trading instrument per symbol'):
+        runner.Runner(None, instruments)
+    with pytest.raises(ValueError, match='one instrument per symbol and timeframe'):
+        runner.Runner(None, [runner.Instrument('BTCUSDT', '1h', 'strategy3'),
+                             runner.Instrument('BTCUSDT', '1h', 'strategy1', trade=False)])
+
+
+@pytest.fixture(scope='module')
+def multi_timeframe():
+    instruments = [
+        runner.Instrument('BTCUSDT', '15m', 'strategy1', 0.01),
+        runner.Instrument('BTCUSDT', '1h', 'strategy3', 0.01, trade=False),
+        runner.Instrument('ETHUSDT', '30m', 'strategy2', 0.1),
+        runner.Instrument('ETHUSDT', '2h', 'strategy1', 0.1, trade=False),
+    ]
+    committed = {}
+    for inst in instruments:
+        bars = committed[inst.market] = []
+        push = inst.signal.push
+
+        def recording_push(bar, push=push, bars=bars):
+            bars.append([bar.ts, *_values(bar)])
+            push(bar)
+
+        inst.signal.push = recording_push
+    METRICS.reset()     # the counters checked below are the process-wide ones
+    sim = asyncio.run(runner.simulate(instruments, bars=200, measure=False, base_timeframe='15m'))
+    return sim, instruments, committed
+
+
+def test_one_base_market_per_symbol(multi_timeframe):
+    sim, instruments, _ = multi_timeframe
+    assert sim.feed_markets == [('BTCUSDT', '15m'), ('ETHUSDT', '15m')]
+    assert all(inst.updates > 0 for inst in instruments)
+
+
+def test_every_timeframe_gets_the_aggregated_candles(multi_timeframe):
+    sim, instruments, committed = multi_timeframe
+    for inst in instruments:
+        bars = committed[inst.market]
+        rows = {row[0]: row[1:] for row in sim.exchange.ohlcv[inst.market]}
+        assert len(bars) >= 200 * timeframe_to_ms('15m') // timeframe_to_ms(inst.timeframe) - 1
+        for ts, *values in bars:
+            np.testing.assert_allclose(values, rows[ts], rtol=1e-12, err_msg=inst.label)
+
+
+def test_only_the_trading_instrument_sends_orders(multi_timeframe):
+    sim, instruments, _ = multi_timeframe
+    counters = sim.metrics.snapshot()['counters']
+    assert len(sim.exchange.orders) == counters['signals'] > 0
+    assert counters.get('signals.paper', 0) > 0
+    for inst in instruments:
+        if inst.trade:
+            held = sim.exchange.positions.get(inst.symbol, 0.0)
+            assert held == pytest.approx({'long': inst.quantity, 'short': -inst.quantity, None: 0.0}[inst.position])
+            assert {o['amount'] for o in sim.exchange.orders if o['symbol'] == inst.symbol} <= {
+                inst.quantity, 2 * inst.quantity}
@@ -0,0 +1,144 @@
+# tests/test_runner.py
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+import indicator_graph as ig
+import runner
+from fake_exchange import synthetic_ohlcv
+from feed import BarUpdate
+from metrics import METRICS
+from ohlcv_store import timeframe_to_ms
+from strategy1 import calculate_orion_signal
+from strategy2 import calculate_ema_super_signal
+from strategy3 import calculate_trend_forecast_signal
+
+BATCH = {'strategy1': calculate_orion_signal, 'strategy2': calculate_ema_super_signal,
+         'strategy3': calculate_trend_forecast_signal}
+
+
+def _record(inst, log):
+    # Every evaluated bar with the signal the instrument saw, and where its history starts
+    signal = inst.signal
+    seed, evaluate = signal.seed, signal.evaluate
+
+    def recording_seed(history):
+        log['first'] = int(history.index.as_unit('ms').asi8[0])
+        seed(history)
+
+    def recording_evaluate(bar):
+        row = evaluate(bar)
+        log['bars'].append((list(bar[2:8]), bool(row['plFound']), bool(row['phFound'])))
+        return row
+
+    signal.seed, signal.evaluate = recording_seed, recording_evaluate
+
+
+@pytest.fixture(scope='module')
+def simulated():
+    instruments = [
+        runner.Instrument('BTCUSDT', '15m', 'strategy1', 0.01),
+        runner.Instrument('ETHUSDT', '1h', 'strategy2', 0.1),
+        runner.Instrument('SOLUSDT', '30m', 'strategy3', 1.0),
+    ]
+    logs = {}
+    for inst in instruments:
+        logs[inst.symbol] = {'bars': []}
+        _record(inst, logs[inst.symbol])
+    METRICS.reset()     # the counters checked below are the process-wide ones
+    sim = asyncio.run(runner.simulate(instruments, bars=300, measure=False))
+    return sim, instruments, logs
+
+
+def _expected_orders(bars):
+    # One reversal per signal that changes the position, at most one per bar
+    position, acted, current, orders = None, False, None, []
+    for (ts, *_), long_signal, short_signal in bars:
+        if ts != current:
+            current, acted = ts, False
+        if (long_signal or short_signal) and not acted:
+            side = 'long' if long_signal else 'short'
+            if side != position:
+                orders.append(('buy' if long_signal else 'sell', ts))
+                position, acted = side, True
+    return orders, position
+
+
+def test_signals_match_batch_functions(simulated):
+    sim, instruments, logs = simulated
+    for inst in instruments:
+        rows = sim.exchange.ohlcv[inst.market]
+        index = {row[0]: i for i, row in enumerate(rows)}
+        first = index[logs[inst.symbol]['first']]
+        bars = logs[inst.symbol]['bars']
+        assert len(bars) > 300
+        for n, (bar, long_signal, short_signal) in enumerate(bars):
+            if n % 25 and not (long_signal or short_signal):
+                continue
+            i = index[bar[0]]
+            # FrameSignal sees the last `lookback` closed bars, the engine everything since its seed
+            start = first if inst.strategy == 'strategy3' else i - inst.lookback
+            out = BATCH[inst.strategy](runner._history_frame(rows[start:i] + [bar])).iloc[-1]
+            assert (bool(out['plFound']), bool(out['phFound'])) == (long_signal, short_signal), (inst.label, bar[0])
+
+
+def test_reversals_follow_signals_once_per_bar(simulated):
+    sim, instruments, logs = simulated
+    orders = sim.exchange.orders
+    assert len(orders) == sim.metrics.snapshot()['counters']['signals']
+    latched = 0
+    for inst in instruments:
+        bars = logs[inst.symbol]['bars']
+        expected, position = _expected_orders(bars)
+        placed = [o for o in orders if o['symbol'] == inst.symbol]
+        assert placed, inst.label
+        assert [o['side'] for o in placed] == [side for side, _ in expected]
+        assert len(placed) == len({ts for _, ts in expected})
+        # Flat -> quantity, then a single order of held + quantity per reversal
+        assert [o['amount'] for o in placed] == [inst.quantity] + [2 * inst.quantity] * (len(placed) - 1)
+        assert inst.position == position
+
+        # The latch held: the signal fired again within a bar that had already reversed
+        acted = {ts for _, ts in expected}
+        latched += sum(1 for (ts, *_), pl, ph in bars if (pl or ph) and ts in acted) - len(acted)
+    assert latched > 0
+
+
+def test_positions_match_exchange(simulated):
+    sim, instruments, _ = simulated
+    for inst in instruments:
+        held = sim.exchange.positions.get(inst.symbol, 0.0)
+        expected = {'long': inst.quantity, 'short': -inst.quantity, None: 0.0}[inst.position]
+        assert held == pytest.approx(expected)
+
+
+def test_instruments_update_independently(simulated):
+    sim, instruments, logs = simulated
+    shortest = min(timeframe_to_ms(inst.timeframe) for inst in instruments)
+    for inst in instruments:
+        bars = {bar[0] for bar, _, _ in logs[inst.symbol]['bars']}
+        # Every bar of the instrument's own timeframe over the 300 shortest bars was evaluated
+        assert len(bars) >= 300 * shortest // timeframe_to_ms(inst.timeframe)
+        assert all(ts % timeframe_to_ms(inst.timeframe) == 0 for ts in bars)
+
+
+@pytest.mark.parametrize('strategy', ['strategy1', 'strategy2'])
+def test_frame_signal_bypasses_indicator_cache(strategy):
+    rows = synthetic_ohlcv(300)
+    inst = runner.Instrument('BTCUSDT', '1m', strategy, 0.01)
+    inst.start(runner._history_frame(rows[:-10]), rows[-10])
+    ig.CACHE.clear()
+    for row in rows[-10:]:
+        inst.on_update(BarUpdate.from_row('BTCUSDT', '1m', row))
+    assert len(ig.CACHE) == 0 and ig.CACHE.misses == 0
+
+
+def test_library_modules_do_not_import_the_bot_script():
+    # live_bot is the entry point (and pulls in ccxt); it imports runner, never the other way round
+    code = "import sys, runner, exchange_state, execution; print('live_bot' in sys.modules, 'ccxt' in sys.modules)"
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(runner.__file__))).stdout
+    assert out.split() == ['False', 'False']
@@ -0,0 +1,178 @@
+# tests/test_snapshot.py
+import asyncio
+
+import pytest
+
+import runner
+from fake_exchange import FakeExchange, synthetic_ohlcv
+from feed import TickerSource
+from metrics import Metrics
+from ohlcv_store import timeframe_to_ms
+
+END = 1_577_836_800_000 + 1_000 * 86_400_000
+BARS = 300          # 15m bars replayed
+POLLS = 4           # ticker polls per 15m bar
+
+
+def _instruments(btc_params=None):
+    return [runner.Instrument('BTCUSDT', '15m', 'strategy1', 0.01, params=btc_params),
+            runner.Instrument('SOLUSDT', '30m', 'strategy3', 1.0)]
+
+
+@pytest.fixture(scope='module')
+def market():
+    # Candles of both markets and the ticker stream over them, recorded once as
+    # (exchange clock, update) so every run below sees exactly the same updates
+    ohlcv = {}
+    for seed, inst in enumerate(_instruments()):
+        tf_ms = timeframe_to_ms(inst.timeframe)
+        count = inst.lookback + BARS * 900_000 // tf_ms + 1
+        ohlcv[inst.market] = synthetic_ohlcv(count, inst.timeframe, start=END - count * tf_ms, seed=seed)
+    start = max(rows[runner.LOOKBACK][0] for rows in ohlcv.values())
+    exchange = FakeExchange(ohlcv, now=start)
+    fetch_tickers = exchange.fetch_tickers
+
+    def advancing_fetch_tickers(symbols=None, params=None):
+        exchange.now += 900_000 // POLLS
+        return fetch_tickers(symbols, params)
+
+    exchange.fetch_tickers = advancing_fetch_tickers
+
+    async def record():
+        stream = []
+        async for update in TickerSource(exchange, list(ohlcv), interval=0).updates():
+            if exchange.now >= END - 900_000:
+                return stream
+            stream.append((exchange.now, update))
+
+    return ohlcv, start, asyncio.run(record())
+
+
+async def _start(exchange, instruments, path=None):
+    run = runner.Runner(exchange, instruments, heartbeat_interval=3_600, metrics=Metrics(), snapshot_path=path)
+    await run.start()
+    return run
+
+
+async def _replay(run, exchange, stream, log, offset=0):
+    # Every evaluated update (by its index in the stream): the signal the instrument saw
+    # and the position it left
+    for i, (now, update) in enumerate(stream, offset):
+        exchange.now = now
+        inst = run.by_market[update.symbol, update.timeframe]
+        updates = inst.updates
+        await run.on_update(update)
+        await run.drain()
+        if inst.updates != updates:
+            log.append((i, inst.label, update.ts, bool(inst.signal_row['plFound']),
+                        bool(inst.signal_row['phFound']), inst.position))
+
+
+@pytest.fixture(scope='module')
+def uninterrupted(market):
+    ohlcv, start, stream = market
+    exchange = FakeExchange(ohlcv, now=start)
+    log = []
+
+    async def main():
+        run = await _start(exchange, _instruments())
+        await _replay(run, exchange, stream, log)
+        return run
+
+    return asyncio.run(main()), exchange, log
+
+
+def _after_poll(stream, i):
+    # Index of the first update of the poll after the one update i came from
+    return next(j for j in range(i, len(stream)) if stream[j][0] != stream[i][0])
+
+
+def _latched_reversal(stream, log):
+    # (stream index, label) of a reversal whose signal fires again at a later poll of the same bar
+    positions = {}
+    for i, label, ts, _, _, position in log:
+        if position != positions.setdefault(label, None) and any(
+                entry[1:3] == (label, ts) and (entry[3] or entry[4]) and stream[entry[0]][0] > stream[i][0]
+                for entry in log):
+            return i, label
+        positions[label] = position
+    raise AssertionError('no bar whose signal repeats after its reversal')
+
+
+def _restart_points(stream, log):
+    # Between two polls: right after a latched reversal (the latch has to survive the
+    # restart), and after a closed bar
+    closed = next(i for i, (_, update) in enumerate(stream) if i > len(stream) // 2 and update.closed)
+    return {'latched': _after_poll(stream, _latched_reversal(stream, log)[0]), 'closed': _after_poll(stream, closed)}
+
+
+@pytest.mark.parametrize('point', ['latched', 'closed'])
+def test_restart_from_snapshot_matches_uninterrupted_run(market, uninterrupted, tmp_path, point):
+    ohlcv, start, stream = market
+    full, full_exchange, full_log = uninterrupted
+    stop = _restart_points(stream, full_log)[point]
+    exchange = FakeExchange(ohlcv, now=start)
+    path = str(tmp_path / 'snapshot.json')
+    log = []
+
+    async def main():
+        first = await _start(exchange, _instruments(), path)
+        await _replay(first, exchange, stream[:stop], log)
+        first.save_snapshot(wait=True)      # what run() does on the way out
+        latched = {inst.label: inst.acted_this_bar for inst in first.instruments}
+
+        second = await _start(exchange, _instruments(), path)
+        assert {inst.label: inst.acted_this_bar for inst in second.instruments} == latched
+        await _replay(second, exchange, stream[stop:], log, stop)
+        return second
+
+    second = asyncio.run(main())
+    assert log == full_log
+    assert [(o['symbol'], o['side'], o['amount']) for o in exchange.orders] == \
+        [(o['symbol'], o['side'], o['amount']) for o in full_exchange.orders]
+    assert exchange.positions == full_exchange.positions
+    assert [inst.position for inst in second.instruments] == [inst.position for inst in full.instruments]
+    assert [inst.signal.get_state() for inst in second.instruments] == \
+        [inst.signal.get_state() for inst in full.instruments]
+
+
+def test_latch_survives_restart_within_the_bar(market, uninterrupted, tmp_path):
+    ohlcv, start, stream = market
+    _, _, full_log = uninterrupted
+    i, label = _latched_reversal(stream, full_log)
+    stop = _after_poll(stream, i)
+    exchange = FakeExchange(ohlcv, now=start)
+    path = str(tmp_path / 'snapshot.json')
+
+    async def main():
+        first = await _start(exchange, _instruments(), path)
+        await _replay(first, exchange, stream[:stop], [])
+        first.save_snapshot(wait=True)
+        second = await _start(exchange, _instruments(), path)
+        return second.instruments
+
+    instruments = {inst.label: inst for inst in asyncio.run(main())}
+    assert instruments[label].acted_this_bar
+
+
+def test_snapshot_with_changed_params_starts_cold(market, tmp_path, capsys):
+    ohlcv, start, stream = market
+    exchange = FakeExchange(ohlcv, now=start)
+    path = str(tmp_path / 'snapshot.json')
+
+    async def main():
+        first = await _start(exchange, _instruments(), path)
+        await _replay(first, exchange, stream[:len(stream) // 2], [])
+        first.save_snapshot(wait=True)
+        saved = first.states()
+        capsys.readouterr()
+        second = await _start(exchange, _instruments(btc_params={'hma_period': 30}), path)
+        return saved, second
+
+    saved, second = asyncio.run(main())
+    btc, sol = second.instruments
+    assert not btc.accepts(saved[btc.label])
+    assert sol.accepts(saved[sol.label])
+    assert '| 1 resumed from snapshot' in capsys.readouterr().out
+    # The unchanged instrument continued its engine where the snapshot left it
+    assert sol.signal.get_state() == saved[sol.label]['signal']
@@ -0,0 +1,103 @@
+# tests/test_strategy3.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import strategy3
+from fake_exchange import synthetic_frame
+
+
+def loop_trend_state(df, samples):
+    # The per-bar loops calculate_trend_forecast_signal used before vectorizing
+    trend_series = pd.Series(dtype=bool)
+    current_trend = np.nan
+    for i in range(len(df)):
+        if df['trend_up_signal'].iloc[i]:
+            current_trend = True
+        elif df['trend_dn_signal'].iloc[i]:
+            current_trend = False
+        trend_series.at[df.index[i]] = current_trend
+    df['trend'] = trend_series
+
+    bullish_counts = []
+    bearish_counts = []
+    current_trend_count = 0
+    df['probable_long_length'] = np.nan
+    df['probable_short_length'] = np.nan
+    for i in range(1, len(df)):
+        current_trend = df['trend'].iloc[i]
+        prev_trend = df['trend'].iloc[i-1]
+        if pd.notna(current_trend):
+            current_trend_count += 1
+            if current_trend != prev_trend:
+                finished_trend_length = current_trend_count - 1
+                if prev_trend is True:
+                    bullish_counts.append(finished_trend_length)
+                    if len(bullish_counts) > samples:
+                        bullish_counts.pop(0)
+                elif prev_trend is False:
+                    bearish_counts.append(finished_trend_length)
+                    if len(bearish_counts) > samples:
+                        bearish_counts.pop(0)
+                current_trend_count = 1
+            avg_bullish = np.mean(bullish_counts) if bullish_counts else np.nan
+            avg_bearish = np.mean(bearish_counts) if bearish_counts else np.nan
+            df.loc[df.index[i], 'probable_long_length'] = avg_bullish
+            df.loc[df.index[i], 'probable_short_length'] = avg_bearish
+
+    df['plFound'] = (df['trend'] == True) & (df['trend'].shift(1) == False)
+    df['phFound'] = (df['trend'] == False) & (df['trend'].shift(1) == True)
+    return df
+
+
+def with_signals(monkeypatch, up, dn):
+    # Feed calculate_trend_forecast_signal these rising / falling flags instead of the HMA's
+    def evaluate(df, nodes, cache=None):
+        return {'hma': pd.Series(np.nan, index=df.index),
+                'trend_up_signal': pd.Series(up, index=df.index),
+                'trend_dn_signal': pd.Series(dn, index=df.index)}
+    monkeypatch.setattr(strategy3.ig, 'evaluate', evaluate)
+
+
+def assert_matches_loop(out, samples):
+    expected = loop_trend_state(out[['trend_up_signal', 'trend_dn_signal']].copy(), samples)
+    for column in ('trend', 'probable_long_length', 'probable_short_length', 'plFound', 'phFound'):
+        pd.testing.assert_series_equal(out[column], expected[column])
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('samples', [1, 3, 10])
+def test_trend_state_matches_loop_on_random_signals(monkeypatch, seed, samples):
+    rng = np.random.default_rng(seed)
+    up = rng.random(400) < 0.15
+    dn = ~up & (rng.random(400) < 0.15)
+    with_signals(monkeypatch, up, dn)
+    out = strategy3.calculate_trend_forecast_signal(pd.DataFrame({'close': np.ones(400)}), samples=samples)
+    assert_matches_loop(out, samples)
+
+
+@pytest.mark.parametrize('up, dn', [
+    (np.zeros(60, bool), np.zeros(60, bool)),                  # all-NaN HMA: never a signal
+    (np.arange(60) >= 20, np.zeros(60, bool)),                 # one long trend after a na stretch
+    (np.ones(60, bool), np.zeros(60, bool)),                   # one trend from the first bar (bool column)
+    (np.arange(60) % 2 == 0, np.arange(60) % 2 == 1),          # alternating every bar
+    (np.arange(60) % 2 == 1, np.arange(60) % 2 == 0),          # alternating, na on the first bar
+    (np.arange(60) % 7 == 3, np.arange(60) % 5 == 0),          # both set on some bars: up wins
+    (np.zeros(1, bool), np.ones(1, bool)),                     # a single bar
+    (np.zeros(0, bool), np.zeros(0, bool)),                    # empty frame
+])
+def test_trend_state_matches_loop_on_edge_cases(monkeypatch, up, dn):
+    with_signals(monkeypatch, up, dn)
+    out = strategy3.calculate_trend_forecast_signal(pd.DataFrame({'close': np.ones(len(up))}), samples=3)
+    assert_matches_loop(out, 3)
+
+
+@pytest.mark.parametrize('close', [
+    synthetic_frame(3_000, seed=5)['close'],
+    pd.Series(np.full(120, np.nan)),                           # all-NaN HMA
+    pd.Series(np.linspace(100, 200, 300)),                     # one long trend
+    pd.Series(100 + np.arange(300) % 2),                       # alternating bars
+], ids=['random', 'nan', 'trend', 'alternating'])
+def test_trend_state_matches_loop_on_prices(close):
+    out = strategy3.calculate_trend_forecast_signal(pd.DataFrame({'close': close}), cache=None)
+    assert_matches_loop(out, 10)